@@ -2,19 +2,27 @@
 import json, pandas as pd, pathlib, sys
 facts = "data/processed/sec_edgar/facts.jsonl"
 tax   = "datasets/sec_edgar/taxonomy/usgaap_combined.csv"
+stats = "data/processed/sec_edgar/concept_stats.json"
 
-# 1) observed full concepts in facts
+# 1) observed full concepts (from the concept stats store when available, else facts)
 full=set(); short=set()
-with open(facts,"r",encoding="utf-8") as f:
-    for ln in f:
-        if not ln.strip(): continue
-        r=json.loads(ln)
-        ns=(r.get("ns") or "").strip()
-        c =(r.get("concept") or "").strip()
-        if not c: continue
-        if ns and not c.startswith(ns+":"): full.add(f"{ns}:{c}"); short.add(c)
-        elif ":" in c: full.add(c); short.add(c.split(":",1)[1])
-        else: full.add(f"us-gaap:{c}"); short.add(c)
+if pathlib.Path(stats).exists():
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[3]))
+    from src.utils.concept_stats import ConceptStatsStore
+    store = ConceptStatsStore.load(stats)
+    store.scan_facts(facts); store.save()
+    full = store.full_set(); short = {c.split(":",1)[1] for c in full}
+else:
+    with open(facts,"r",encoding="utf-8") as f:
+        for ln in f:
+            if not ln.strip(): continue
+            r=json.loads(ln)
+            ns=(r.get("ns") or "").strip()
+            c =(r.get("concept") or "").strip()
+            if not c: continue
+            if ns and not c.startswith(ns+":"): full.add(f"{ns}:{c}"); short.add(c)
+            elif ":" in c: full.add(c); short.add(c.split(":",1)[1])
+            else: full.add(f"us-gaap:{c}"); short.add(c)
 
 df = pd.read_csv(tax)
 assert {"child","parent"}.issubset({c.lower() for c in df.columns}), "taxonomy must have child,parent"
@@ -4,17 +4,26 @@ import json, pandas as pd, pathlib, sys
 facts = "data/processed/sec_edgar/facts.jsonl"
 tax   = "datasets/sec_edgar/taxonomy/usgaap_combined.csv"
 
-# load concepts observed in facts
+stats = "data/processed/sec_edgar/concept_stats.json"
+
+# load concepts observed in facts (via the concept stats store when available)
 concepts=set()
-with open(facts,"r",encoding="utf-8") as f:
-    for ln in f:
-        if not ln.strip(): continue
-        r=json.loads(ln)
-        ns=(r.get("ns") or "").strip()
-        c =(r.get("concept") or "").strip()
-        if not c: continue
-        cc = f"{ns}:{c}" if ns and not c.startswith(ns+":") else c
-        concepts.add(cc)
+if pathlib.Path(stats).exists():
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[3]))
+    from src.utils.concept_stats import ConceptStatsStore
+    store = ConceptStatsStore.load(stats)
+    store.scan_facts(facts); store.save()
+    concepts = store.full_set()
+else:
+    with open(facts,"r",encoding="utf-8") as f:
+        for ln in f:
+            if not ln.strip(): continue
+            r=json.loads(ln)
+            ns=(r.get("ns") or "").strip()
+            c =(r.get("concept") or "").strip()
+            if not c: continue
+            cc = f"{ns}:{c}" if ns and not c.startswith(ns+":") else c
+            concepts.add(cc)
 
 df = pd.read_csv(tax)
 cols = [c.lower() for c in df.columns]
@@ -18,7 +18,11 @@ Usage:
     # Run both (default)
     python scripts/m10_statistical_validation.py
 
+All 10 runs share one featurisation (corpus, TF-IDF, aligned concept features)
+published in shared memory and are fitted concurrently in a process pool.
+
 Outputs:
+    - reports/tables/m10_runs.jsonl (one line per finished run, streamed)
     - reports/tables/m10_seed{X}_baseline_text_metrics.json (X=42,43,44,45,46)
     - reports/tables/m10_seed{X}_text_concept_metrics.json
     - reports/tables/m10_statistical_summary.csv (mean, std, 95% CI)
@@ -27,7 +31,6 @@ Outputs:
 import argparse
 import json
 import pathlib
-import subprocess
 import sys
 from typing import Dict, List
 
@@ -35,97 +38,51 @@ import numpy as np
 import pandas as pd
 from scipy import stats
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from src.cli.baseline_tfidf import load_corpus, scheduled_fit
+from src.utils.experiments import SharedArrays, run_jobs
+from src.utils.feature_join import aligned_concept_features
+from src.utils.feature_store import INDEX_FILE, FeatureStore
+from src.utils.text_features import tfidf_features
+
 
 # Configuration
 SEEDS = [42, 43, 44, 45, 46]
+MODES = ["text", "text+concept"]
 FACTS_PATH = "data/processed/sec_edgar/facts.jsonl"
 TAXONOMY_PATH = "datasets/sec_edgar/taxonomy/usgaap_combined.csv"
 CONCEPT_FEATURES_NPZ = "data/processed/sec_edgar/features/concept_features_filing.npz"
 CONCEPT_FEATURES_INDEX = "data/processed/sec_edgar/features/concept_features_index.csv"
+FEATURE_STORE = "data/processed/sec_edgar/feature_store"
 OUTPUT_DIR = pathlib.Path("reports/tables")
 TEST_SIZE = 0.25  # 25% test split (matches baseline_tfidf.py default)
 
 
-def run_baseline_experiment(seed: int) -> Dict:
+def concept_feature_entry() -> str:
     """
-    Run text-only baseline experiment for a given seed.
+    Import the concept .npz into the memory-mapped feature store once, so every
+    seed's process maps the same uncompressed arrays instead of decompressing.
 
     Returns:
-        metrics dict with micro_f1, macro_f1, etc.
+        Feature-store entry directory (keyed by the .npz/index content hash)
     """
-    output_path = OUTPUT_DIR / f"m10_seed{seed}_baseline_text_metrics.json"
-
-    cmd = [
-        sys.executable, "-m", "src.cli.baseline_tfidf",
-        "--facts", FACTS_PATH,
-        "--taxonomy", TAXONOMY_PATH,
-        "--out", str(output_path),
-        "--random_state", str(seed),
-        "--test_size", str(TEST_SIZE),
-    ]
-
-    print(f"\n{'='*60}")
-    print(f"Running baseline (text-only) with seed={seed}")
-    print(f"{'='*60}")
-
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    entry = FeatureStore(FEATURE_STORE).import_npz(CONCEPT_FEATURES_NPZ, CONCEPT_FEATURES_INDEX)
+    return str(entry.path)
 
-    if result.returncode != 0:
-        print(f"ERROR: Baseline experiment failed for seed {seed}")
-        print(result.stderr)
-        raise RuntimeError(f"Baseline experiment failed for seed {seed}")
 
-    print(result.stdout)
+def result_path(seed: int, mode: str) -> pathlib.Path:
+    name = "baseline_text" if mode == "text" else "text_concept"
+    return OUTPUT_DIR / f"m10_seed{seed}_{name}_metrics.json"
 
-    # Load and return metrics
-    metrics = json.loads(output_path.read_text())
-    print(f"OK Baseline seed={seed}: micro_f1={metrics['micro_f1']:.4f}, macro_f1={metrics['macro_f1']:.4f}")
 
-    return metrics
-
-
-def run_text_concept_experiment(seed: int) -> Dict:
+def run_all_experiments(workers: int = 0, threads_per_job: int = 1, memory_mb: int = 0):
     """
-    Run text+concept experiment for a given seed.
+    Run all seed x mode experiments in a process pool over one featurisation.
 
-    Returns:
-        metrics dict with micro_f1, macro_f1, etc.
+    The corpus, TF-IDF and aligned concept features are built once and shared
+    with the workers; each finished run is written to its per-seed JSON and
+    appended to m10_runs.jsonl as soon as it completes.
     """
-    output_path = OUTPUT_DIR / f"m10_seed{seed}_text_concept_metrics.json"
-
-    cmd = [
-        sys.executable, "-m", "src.cli.baseline_tfidf",
-        "--facts", FACTS_PATH,
-        "--taxonomy", TAXONOMY_PATH,
-        "--concept_features_npz", CONCEPT_FEATURES_NPZ,
-        "--concept_features_index", CONCEPT_FEATURES_INDEX,
-        "--out", str(output_path),
-        "--random_state", str(seed),
-        "--test_size", str(TEST_SIZE),
-    ]
-
-    print(f"\n{'='*60}")
-    print(f"Running text+concept with seed={seed}")
-    print(f"{'='*60}")
-
-    result = subprocess.run(cmd, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        print(f"ERROR: Text+concept experiment failed for seed {seed}")
-        print(result.stderr)
-        raise RuntimeError(f"Text+concept experiment failed for seed {seed}")
-
-    print(result.stdout)
-
-    # Load and return metrics
-    metrics = json.loads(output_path.read_text())
-    print(f"OK Text+concept seed={seed}: micro_f1={metrics['micro_f1']:.4f}, macro_f1={metrics['macro_f1']:.4f}")
-
-    return metrics
-
-
-def run_all_experiments():
-    """Run all experiments for all seeds."""
     print("\n" + "="*60)
     print("M10 STATISTICAL VALIDATION: Running experiments")
     print("="*60)
@@ -135,22 +92,46 @@ def run_all_experiments():
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    baseline_results = []
-    text_concept_results = []
-
-    for seed in SEEDS:
-        # Run baseline (text-only)
-        baseline_metrics = run_baseline_experiment(seed)
-        baseline_results.append(baseline_metrics)
-
-        # Run text+concept
-        text_concept_metrics = run_text_concept_experiment(seed)
-        text_concept_results.append(text_concept_metrics)
+    features = concept_feature_entry()
+    print(f"Concept features: {features}")
+
+    # One featurisation for all runs
+    docs, texts, Y, labels = load_corpus(FACTS_PATH, TAXONOMY_PATH)
+    X_text, _ = tfidf_features(texts, docs, min_df=2, max_features=20000, store=FEATURE_STORE)
+    X_concept = aligned_concept_features(features, str(pathlib.Path(features) / INDEX_FILE), docs)
+    print(f"Featurised {len(docs)} docs: text={X_text.shape[1]} "
+          f"concept={X_concept.shape[1]} columns")
+
+    runs_path = OUTPUT_DIR / "m10_runs.jsonl"
+    runs_path.write_text("")
+    results = {}
+
+    def write_result(job, metrics):
+        result_path(job["seed"], job["mode"]).write_text(json.dumps(metrics, indent=2))
+        with open(runs_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"seed": job["seed"], "mode": job["mode"],
+                                "micro_f1": metrics["micro_f1"],
+                                "macro_f1": metrics["macro_f1"]}) + "\n")
+        results[(job["seed"], job["mode"])] = metrics
+        print(f"OK {job['mode']} seed={job['seed']}: micro_f1={metrics['micro_f1']:.4f}, "
+              f"macro_f1={metrics['macro_f1']:.4f}")
+
+    jobs = [{"seed": seed, "mode": mode, "test_size": TEST_SIZE}
+            for seed in SEEDS for mode in MODES]
+    with SharedArrays() as shared:
+        shared.publish("X_text", X_text)
+        shared.publish("X_concept", X_concept)
+        shared.publish("Y", Y)
+        shared.publish("labels", np.array(labels))
+        run_jobs(scheduled_fit, jobs, shared, max_workers=workers,
+                 threads_per_job=threads_per_job, memory_mb=memory_mb, on_result=write_result)
 
     print("\n" + "="*60)
     print("OK All experiments completed successfully")
     print("="*60)
 
+    baseline_results = [results[(seed, "text")] for seed in SEEDS]
+    text_concept_results = [results[(seed, "text+concept")] for seed in SEEDS]
     return baseline_results, text_concept_results
 
 
@@ -345,6 +326,12 @@ def main():
                     help="Run all experiments for 5 seeds")
     ap.add_argument("--compute_statistics", action="store_true",
                     help="Compute statistics from saved results")
+    ap.add_argument("--workers", type=int, default=0,
+                    help="Parallel runs (0 = all cores / threads_per_job)")
+    ap.add_argument("--threads_per_job", type=int, default=1,
+                    help="BLAS/OpenMP threads per run")
+    ap.add_argument("--memory_mb", type=int, default=0,
+                    help="Per-worker address-space limit in MiB (0 = unlimited)")
     args = ap.parse_args()
 
     # Default: run both if no flags specified
@@ -353,7 +340,7 @@ def main():
         args.compute_statistics = True
 
     if args.run_experiments:
-        run_all_experiments()
+        run_all_experiments(args.workers, args.threads_per_job, args.memory_mb)
 
     if args.compute_statistics:
         compute_statistics()
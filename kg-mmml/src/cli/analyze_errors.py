@@ -10,35 +10,16 @@ import pathlib
 import json
 import numpy as np
 import pandas as pd
-from scipy import sparse
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import MultiLabelBinarizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.multiclass import OneVsRestClassifier
 from sklearn.model_selection import train_test_split
 
 from ..utils.data_utils import (
     build_corpus_from_facts,
     load_taxonomy_parents
 )
-
-def align_and_concat(X_text, tfidf_docs, concept_npz, concept_index_csv, tfidf_docs_list):
-    """Align concept-feature rows to TF-IDF rows and hstack."""
-    Xc = sparse.load_npz(concept_npz)
-    idx = pd.read_csv(concept_index_csv)["doc_id"].tolist()
-    row_of = {d: i for i, d in enumerate(idx)}
-    
-    # Build aligned rows for concept features
-    sel = []
-    for d in tfidf_docs_list:
-        i = row_of.get(d, None)
-        if i is None:
-            sel.append(sparse.csr_matrix((1, Xc.shape[1]), dtype=Xc.dtype))
-        else:
-            sel.append(Xc[i])
-    
-    Xc_aligned = sparse.vstack(sel)
-    return sparse.hstack([X_text, Xc_aligned], format="csr")
+from ..utils.feature_join import join_features
+from ..utils.linear_models import SOLVERS, MultiLabelLinear
+from ..utils.text_features import tfidf_features
 
 def main():
     ap = argparse.ArgumentParser()
@@ -50,12 +31,25 @@ def main():
     ap.add_argument("--random_state", type=int, default=42)
     ap.add_argument("--max_features", type=int, default=20000)
     ap.add_argument("--min_df", type=int, default=2)
+    ap.add_argument("--n_jobs", type=int, default=-1,
+                    help="TF-IDF worker processes (-1 = all cores)")
+    ap.add_argument("--tfidf_store", default="",
+                    help="Feature store directory reusing TF-IDF per corpus version")
     
     # KG-as-features arguments (Required for production model)
     ap.add_argument("--concept_features_npz", required=True,
                     help="Path to concept_features_filing.npz")
     ap.add_argument("--concept_features_index", required=True,
                     help="Path to concept_features_index.csv")
+    ap.add_argument("--feature_cache", default="",
+                    help="Optional directory caching concept features aligned to doc order")
+    ap.add_argument("--solver", choices=SOLVERS, default="liblinear")
+    ap.add_argument("--clf_jobs", type=int, default=None,
+                    help="Labels fitted in parallel (-1 = all cores)")
+    ap.add_argument("--C", type=float, default=1.0)
+    ap.add_argument("--max_iter", type=int, default=200)
+    ap.add_argument("--batch_size", type=int, default=0,
+                    help="sgd minibatch size (0 = full passes)")
     
     args = ap.parse_args()
     
@@ -93,20 +87,20 @@ def main():
     # TF-IDF text features
     print("[M9] Vectorizing text...")
     try:
-        vec = TfidfVectorizer(max_features=args.max_features, min_df=args.min_df)
-        X_text = vec.fit_transform(texts)
+        X_text, _ = tfidf_features(texts, docs, min_df=args.min_df, max_features=args.max_features,
+                                   n_jobs=args.n_jobs, store=args.tfidf_store or None)
     except ValueError as e:
-        print(f"[ERROR] TfidfVectorizer failed: {e}")
+        print(f"[ERROR] TF-IDF featurisation failed: {e}")
         print(f"[DEBUG] First 3 texts: {texts[:3]}")
         raise
     
     # Add concept features (KG-as-features)
     print("[M9] Aligning concept features...")
-    X = align_and_concat(
-        X_text, docs, 
-        args.concept_features_npz, 
-        args.concept_features_index, 
-        docs
+    X = join_features(
+        X_text, docs,
+        args.concept_features_npz,
+        args.concept_features_index,
+        cache_dir=args.feature_cache or None,
     )
     
     # Train/test split (stratified)
@@ -122,9 +116,8 @@ def main():
     
     # Train Classifier
     print("[M9] Training production model (LogisticRegression)...")
-    clf = OneVsRestClassifier(
-        LogisticRegression(max_iter=200, n_jobs=None, solver="liblinear")
-    )
+    clf = MultiLabelLinear(args.solver, n_jobs=args.clf_jobs, C=args.C, max_iter=args.max_iter,
+                           batch_size=args.batch_size, random_state=args.random_state)
     clf.fit(Xtr, Ytr)
     
     # Predict
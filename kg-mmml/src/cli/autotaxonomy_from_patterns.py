@@ -4,19 +4,15 @@ Generate auto-taxonomy edges from regex pattern rules.
 Applies pattern-based rules to infer parent-child relationships from observed concepts.
 Conservative: first matching rule per concept wins.
 """
-import argparse, json, pathlib, re
+import argparse, json, pathlib
 import pandas as pd
 
+from ..utils.pattern_rules import PatternMatcher, load_pattern_rules
+
 def load_patterns(yaml_path):
-    import yaml
-    with open(yaml_path, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
-    parents = cfg.get("parents", {}) or {}
-    compiled = []
-    for parent, pats in parents.items():
-        for pat in (pats or []):
-            compiled.append((parent.strip(), re.compile(pat)))
-    return compiled
+    """Compile rules once; ``first()`` keeps YAML order (first hit wins)."""
+    rules = [(parent.strip(), pat) for parent, pat in load_pattern_rules(yaml_path)]
+    return PatternMatcher(rules, anchored=True)
 
 def iter_concepts(facts_path):
     seen = set()
@@ -44,11 +40,10 @@ def main():
     matched = 0
 
     for child in iter_concepts(args.facts):
-        for parent, rgx in patterns:
-            if rgx.match(child):
-                rows.append({"child": child, "parent": parent, "source": "auto"})
-                matched += 1
-                break  # first hit wins (conservative)
+        parent = patterns.first(child)  # first hit wins (conservative)
+        if parent is not None:
+            rows.append({"child": child, "parent": parent, "source": "auto"})
+            matched += 1
 
     outp = pathlib.Path(args.out)
     outp.parent.mkdir(parents=True, exist_ok=True)
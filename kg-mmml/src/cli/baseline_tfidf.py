@@ -5,73 +5,47 @@ Train and evaluate baseline sklearn LogisticRegression classifier.
 Supports two modes:
 1. Text-only: TF-IDF features from filing narratives
 2. Text+concept: TF-IDF + binary concept indicators
+
+``load_corpus``/``fit_evaluate`` are shared with the multi-seed scheduler
+(``scheduled_fit``), which runs many fits over one featurisation.
 """
 import argparse
 import json
 import pathlib
+from typing import Optional
+
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
 from sklearn.preprocessing import MultiLabelBinarizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.multiclass import OneVsRestClassifier
 from sklearn.metrics import f1_score, classification_report
 from sklearn.model_selection import train_test_split
-from scipy import sparse
 
 from ..utils.data_utils import (
     build_corpus_from_facts,
     load_taxonomy_parents
 )
+from ..utils.feature_join import concept_feature_names, join_features
+from ..utils.linear_models import SOLVERS, MultiLabelLinear, load_coefficients
+from ..utils.serving import save_artifact
+from ..utils.text_features import tfidf_features
 
 
-def align_and_concat(X_text, tfidf_docs, concept_npz, concept_index_csv, tfidf_docs_list):
-    """Align concept-feature rows to TF-IDF rows and hstack."""
-    import pandas as pd
-    
-    Xc = sparse.load_npz(concept_npz)
-    idx = pd.read_csv(concept_index_csv)["doc_id"].tolist()
-    row_of = {d: i for i, d in enumerate(idx)}
-    
-    # Build aligned rows for concept features
-    sel = []
-    for d in tfidf_docs_list:
-        i = row_of.get(d, None)
-        if i is None:
-            sel.append(sparse.csr_matrix((1, Xc.shape[1]), dtype=Xc.dtype))
-        else:
-            sel.append(Xc[i])
-    
-    Xc_aligned = sparse.vstack(sel)
-    return sparse.hstack([X_text, Xc_aligned], format="csr")
-
+def load_corpus(facts: str, taxonomy: str):
+    """
+    Build the labelled corpus used by the baseline.
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--facts", default="data/processed/sec_edgar/facts.jsonl")
-    ap.add_argument("--taxonomy", default="datasets/sec_edgar/taxonomy/usgaap_combined.csv")
-    ap.add_argument("--out", default="reports/tables/baseline_text_metrics.json")
-    
-    ap.add_argument("--test_size", type=float, default=0.25)
-    ap.add_argument("--random_state", type=int, default=42)
-    ap.add_argument("--max_features", type=int, default=20000)
-    ap.add_argument("--min_df", type=int, default=2)
-    
-    # Optional KG-as-features concatenation
-    ap.add_argument("--concept_features_npz", default="", 
-                    help="Path to concept_features_filing.npz")
-    ap.add_argument("--concept_features_index", default="", 
-                    help="Path to concept_features_index.csv")
-    args = ap.parse_args()
-    
+    Returns:
+        (doc_ids, texts, Y multi-hot array, label names)
+    """
     # Load taxonomy
-    tax_path = pathlib.Path(args.taxonomy)
+    tax_path = pathlib.Path(taxonomy)
     if not tax_path.exists():
         tax_path = pathlib.Path("datasets/sec_edgar/taxonomy/usgaap_min.csv")
     
     child_to_parents = load_taxonomy_parents(str(tax_path))
     
     # Build corpus with labels
-    docs, texts, labels, _ = build_corpus_from_facts(args.facts, child_to_parents)
+    docs, texts, labels, _ = build_corpus_from_facts(facts, child_to_parents)
     
     # Filter docs with no labels
     keep = [i for i, l in enumerate(labels) if len(l) > 0]
@@ -88,60 +62,167 @@ def main():
     # Multi-label binarization
     mlb = MultiLabelBinarizer(sparse_output=False)
     Y = mlb.fit_transform(labels)
-    label_names = list(mlb.classes_)
-    
-    # TF-IDF text features
-    vec = TfidfVectorizer(max_features=args.max_features, min_df=args.min_df)
-    X_text = vec.fit_transform(texts)
-    
-    # Optional: add concept features (KG-as-features)
-    if args.concept_features_npz and args.concept_features_index:
-        X = align_and_concat(
-            X_text, docs, 
-            args.concept_features_npz, 
-            args.concept_features_index, 
-            docs
-        )
-        mode = "text+concept"
-    else:
-        X = X_text
-        mode = "text"
-    
+    return docs, texts, Y, list(mlb.classes_)
+
+
+def fit_evaluate(X, Y, label_names, mode: str, test_size: float = 0.25,
+                 random_state: int = 42, init=None, **clf_params):
+    """
+    Split, fit the one-vs-rest logistic classifier and score it.
+
+    Args:
+        X: Feature matrix (rows aligned with Y)
+        Y: Multi-hot label array
+        label_names: Label per Y column
+        mode: "text" or "text+concept" (recorded in the metrics)
+        test_size, random_state: Stratified split parameters
+        init: Optional (coef, intercept) warm start (see ``load_coefficients``)
+        clf_params: ``MultiLabelLinear`` options (solver, n_jobs, C, ...)
+
+    Returns:
+        (metrics dict with micro/macro F1, sizes and per-label report, fitted model)
+    """
     # Train/test split (using sklearn for stratification - matches train_joint.py)
     train_idx, test_idx = train_test_split(
-        np.arange(len(docs)),
-        test_size=args.test_size,
-        random_state=args.random_state,
+        np.arange(Y.shape[0]),
+        test_size=test_size,
+        random_state=random_state,
         stratify=Y.argmax(1)  # Stratify by most-frequent label
     )
     
     Xtr, Xte = X[train_idx], X[test_idx]
     Ytr, Yte = Y[train_idx], Y[test_idx]
     
-    # Classifier
-    clf = OneVsRestClassifier(
-        LogisticRegression(max_iter=200, n_jobs=None, solver="liblinear")
-    )
-    clf.fit(Xtr, Ytr)
+    # Classifier (defaults: per-label liblinear, as before)
+    params = dict(random_state=random_state)
+    params.update(clf_params)
+    clf = MultiLabelLinear(**params)
+    clf.fit(Xtr, Ytr, init=init)
     Yhat = clf.predict(Xte)
     
-    n_total = len(docs)
     metrics = {
         "mode": mode,
-        "n_docs_total": n_total,
+        "n_docs_total": int(Y.shape[0]),
         "n_docs_train": int(Xtr.shape[0]),
         "n_docs_test": int(Xte.shape[0]),
         "micro_f1": float(f1_score(Yte, Yhat, average="micro", zero_division=0)),
         "macro_f1": float(f1_score(Yte, Yhat, average="macro", zero_division=0)),
-        "labels": label_names,
+        "labels": list(label_names),
     }
     
     # Per-label report
     report = classification_report(
-        Yte, Yhat, target_names=label_names, 
+        Yte, Yhat, target_names=list(label_names),
         output_dict=True, zero_division=0
     )
     metrics["per_label"] = report
+    if clf_params:
+        metrics["clf_params"] = clf_params
+    return metrics, clf
+
+
+def scheduled_fit(arrays, mode: str, seed: int, test_size: float = 0.25,
+                  config: Optional[dict] = None) -> dict:
+    """
+    Scheduler job: fit one (seed, mode, config) run on shared features.
+
+    ``arrays`` holds ``X_text``, ``Y`` and ``labels`` and, for text+concept,
+    ``X_concept`` aligned to the same rows.
+    """
+    X = arrays["X_text"]
+    if mode == "text+concept":
+        X = sparse.hstack([X, arrays["X_concept"]], format="csr")
+    labels = [str(l) for l in arrays["labels"]]
+    metrics, _ = fit_evaluate(X, arrays["Y"], labels, mode, test_size, seed, **(config or {}))
+    return metrics
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--facts", default="data/processed/sec_edgar/facts.jsonl")
+    ap.add_argument("--taxonomy", default="datasets/sec_edgar/taxonomy/usgaap_combined.csv")
+    ap.add_argument("--out", default="reports/tables/baseline_text_metrics.json")
+    
+    ap.add_argument("--test_size", type=float, default=0.25)
+    ap.add_argument("--random_state", type=int, default=42)
+    ap.add_argument("--max_features", type=int, default=20000)
+    ap.add_argument("--min_df", type=int, default=2)
+    ap.add_argument("--n_jobs", type=int, default=-1,
+                    help="TF-IDF worker processes (-1 = all cores)")
+    ap.add_argument("--tfidf_store", default="",
+                    help="Feature store directory reusing TF-IDF per corpus version")
+    
+    # Optional KG-as-features concatenation
+    ap.add_argument("--concept_features_npz", default="", 
+                    help="Path to concept_features_filing.npz")
+    ap.add_argument("--concept_features_index", default="", 
+                    help="Path to concept_features_index.csv")
+    ap.add_argument("--feature_cache", default="",
+                    help="Optional directory caching concept features aligned to doc order")
+    
+    # Classifier backend
+    ap.add_argument("--solver", choices=SOLVERS, default="liblinear",
+                    help="liblinear (default), saga, or sgd for very large corpora")
+    ap.add_argument("--clf_jobs", type=int, default=None,
+                    help="Labels fitted in parallel (-1 = all cores)")
+    ap.add_argument("--C", type=float, default=1.0)
+    ap.add_argument("--alpha", type=float, default=1e-4, help="sgd L2 penalty")
+    ap.add_argument("--max_iter", type=int, default=200)
+    ap.add_argument("--batch_size", type=int, default=0,
+                    help="sgd minibatch size (0 = full passes)")
+    ap.add_argument("--warm_start", default="",
+                    help="Coefficients .npz from a previous run (saga/sgd)")
+    ap.add_argument("--save_coef", default="",
+                    help="Write fitted coefficients .npz for later warm starts")
+    ap.add_argument("--save_model", default="",
+                    help="Write a servable model artifact .npz (text mode only; see serve_model)")
+    args = ap.parse_args()
+    if args.save_model and args.concept_features_npz:
+        ap.error("--save_model serves text features only; drop the concept features")
+    
+    docs, texts, Y, label_names = load_corpus(args.facts, args.taxonomy)
+    
+    # TF-IDF text features
+    X_text, vec = tfidf_features(texts, docs, min_df=args.min_df, max_features=args.max_features,
+                                 n_jobs=args.n_jobs, store=args.tfidf_store or None)
+    feature_names = [f"text:{t}" for t in vec.get_feature_names_out()]
+    
+    # Optional: add concept features (KG-as-features)
+    if args.concept_features_npz and args.concept_features_index:
+        X = join_features(
+            X_text, docs,
+            args.concept_features_npz,
+            args.concept_features_index,
+            cache_dir=args.feature_cache or None,
+        )
+        mode = "text+concept"
+        n_concept = X.shape[1] - X_text.shape[1]
+        feature_names += [f"concept:{c}" for c in
+                          concept_feature_names(args.concept_features_npz, n_concept)]
+    else:
+        X = X_text
+        mode = "text"
+    
+    clf_params = {}
+    for name, default in (("solver", "liblinear"), ("n_jobs", None), ("C", 1.0), ("alpha", 1e-4),
+                          ("max_iter", 200), ("batch_size", 0)):
+        value = getattr(args, "clf_jobs" if name == "n_jobs" else name)
+        if value != default:
+            clf_params[name] = value
+    init = None
+    if args.warm_start:
+        init = load_coefficients(args.warm_start, label_names, feature_names)
+    
+    metrics, clf = fit_evaluate(X, Y, label_names, mode, args.test_size, args.random_state,
+                                init=init, **clf_params)
+    if args.save_coef:
+        clf.save_coefficients(args.save_coef, label_names, feature_names)
+    if args.save_model:
+        save_artifact(args.save_model, vec.get_feature_names_out(), vec.idf_, clf.coef_,
+                      clf.intercept_, label_names,
+                      meta={"source": "baseline_tfidf", "mode": mode,
+                            "micro_f1": metrics["micro_f1"], "macro_f1": metrics["macro_f1"]})
+        print(f"[baseline] wrote model {args.save_model}")
     
     outp = pathlib.Path(args.out)
     outp.parent.mkdir(parents=True, exist_ok=True)
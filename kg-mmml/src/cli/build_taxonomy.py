@@ -9,76 +9,123 @@ Merges parent-child relations from:
 Optionally materializes transitive closure.
 """
 # datasets/sec_edgar/scripts/build_taxonomy.py
-import argparse, pathlib, re, yaml, json
+import argparse, json, pathlib, re
 import pandas as pd
-from collections import defaultdict
 
-def load_concepts_from_facts(facts_path, min_cik_support=1):
-    """Extract observed concepts with CIK support counts."""
-    short2ciks = defaultdict(set)
-    full_set = set()
-    with open(facts_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip(): continue
-            r = json.loads(line)
-            ns = (r.get("ns") or "").strip()
-            c = (r.get("concept") or "").strip()
-            cik = str(r.get("cik") or "").strip()
-            if not c: continue
-            
-            full = f"{ns}:{c}" if ns and not c.startswith(ns + ":") else (c if ":" in c else f"us-gaap:{c}")
-            short = c if ":" not in c else c.split(":", 1)[1]
-            
-            full_set.add(full)
-            if cik: short2ciks[short].add(cik)
-    
-    short_supported = {s: len(ciks) for s, ciks in short2ciks.items() if len(ciks) >= min_cik_support}
-    return full_set, short_supported
+from ..utils.concept_stats import ConceptStatsStore
+from ..utils.pattern_rules import PatternMatcher
+from ..utils.taxonomy_cache import RuleDecisionCache, rules_key
+from ..utils.taxonomy_closure import TaxonomyClosure
+from ..utils.taxonomy_validate import validate_taxonomy
 
-def apply_pattern_rules(concepts_full, concepts_short, rules_yaml):
-    """Apply pattern-based taxonomy rules."""
-    y = yaml.safe_load(pathlib.Path(rules_yaml).read_text())
-    parents_map = y.get("parents", {}) or {}
+# Frequency families: (regex, parent); first match wins.
+FREQUENCY_FAMILIES = [
+    (r"^AccountsReceivable.*", "us-gaap:CurrentAssets"),
+    (r"^AccountsPayable.*", "us-gaap:CurrentLiabilities"),
+    (r"^Inventory.*", "us-gaap:CurrentAssets"),
+    (r"^PropertyPlantAndEquipment.*", "us-gaap:NoncurrentAssets"),
+    (r"^Goodwill$|^.*IntangibleAssets.*$", "us-gaap:NoncurrentAssets"),
+    (r"^OperatingLease.*Asset.*", "us-gaap:NoncurrentAssets"),
+    (r"^OperatingLease.*Liability.*", "us-gaap:NoncurrentLiabilities"),
+    (r"^DeferredRevenue.*|^ContractWithCustomerLiability.*", "us-gaap:CurrentLiabilities"),
+    (r"^ResearchAndDevelopmentExpense.*", "us-gaap:OperatingExpenses"),
+    (r"^SellingGeneralAndAdministrativeExpense.*", "us-gaap:OperatingExpenses"),
+    (r"^Revenue.*|^SalesRevenue.*", "us-gaap:Revenues"),
+    (r"^CostOfRevenue.*|^CostOfGoodsSold.*", "us-gaap:CostOfRevenue"),
+]
+_FAMILY_RX = [(re.compile(rx, re.I), parent) for rx, parent in FREQUENCY_FAMILIES]
+
+def load_concepts_from_facts(facts_path, min_cik_support=1, stats_path=""):
+    """
+    Extract observed concepts with CIK support counts.
+    
+    With ``stats_path`` the persistent concept-statistics store is read and only
+    facts appended since its last update are scanned.
+    """
+    store = ConceptStatsStore.load(stats_path) if stats_path else ConceptStatsStore()
+    # without a saved store nothing picks up a partial last line later, so read it now
+    n_new = store.scan_facts(facts_path, include_partial=not stats_path)
+    if stats_path:
+        store.save()
+        print(f"[taxonomy] concept stats {stats_path}: +{n_new} facts, {len(store)} concepts")
+    return store.full_set(), store.support(min_cik_support)
+
+def pattern_parents(matcher, short):
+    """Namespaced parents of every pattern rule matching ``short``."""
+    return [p if ":" in p else f"us-gaap:{p}" for p in matcher.matches(short)]
+
+def frequency_family(short):
+    """Parent of the first frequency family matching ``short`` (or None)."""
+    for rx, parent in _FAMILY_RX:
+        if rx.match(short):
+            return parent
+    return None
+
+def apply_pattern_rules(concepts_full, concepts_short, rules_yaml, decide=None):
+    """
+    Apply pattern-based taxonomy rules (every matching parent, case-insensitive search).
+    
+    ``decide`` maps a short name to its parents; defaults to compiling ``rules_yaml``.
+    """
+    if decide is None:
+        matcher = PatternMatcher.from_yaml(rules_yaml, flags=re.IGNORECASE)
+        decide = lambda short: pattern_parents(matcher, short)
     
     edges = set()
-    for parent, patterns in parents_map.items():
-        parent_full = parent if ":" in parent else f"us-gaap:{parent}"
-        for pattern_str in (patterns or []):
-            rx = re.compile(pattern_str, re.IGNORECASE)
-            # Match on short names
-            for short in concepts_short.keys():
-                if rx.search(short):
-                    full = f"us-gaap:{short}"
-                    if full in concepts_full:
-                        edges.add((full, parent_full))
+    # Match on short names
+    for short in concepts_short.keys():
+        full = f"us-gaap:{short}"
+        if full not in concepts_full:
+            continue
+        for parent_full in decide(short):
+            edges.add((full, parent_full))
     return edges
 
-def apply_frequency_rules(short_supported, min_support=3):
+def apply_frequency_rules(short_supported, min_support=3, decide=frequency_family):
     """Frequency-based rules for common concepts."""
-    FAMILIES = [
-        (re.compile(r"^AccountsReceivable.*", re.I), "us-gaap:CurrentAssets"),
-        (re.compile(r"^AccountsPayable.*", re.I), "us-gaap:CurrentLiabilities"),
-        (re.compile(r"^Inventory.*", re.I), "us-gaap:CurrentAssets"),
-        (re.compile(r"^PropertyPlantAndEquipment.*", re.I), "us-gaap:NoncurrentAssets"),
-        (re.compile(r"^Goodwill$|^.*IntangibleAssets.*$", re.I), "us-gaap:NoncurrentAssets"),
-        (re.compile(r"^OperatingLease.*Asset.*", re.I), "us-gaap:NoncurrentAssets"),
-        (re.compile(r"^OperatingLease.*Liability.*", re.I), "us-gaap:NoncurrentLiabilities"),
-        (re.compile(r"^DeferredRevenue.*|^ContractWithCustomerLiability.*", re.I), "us-gaap:CurrentLiabilities"),
-        (re.compile(r"^ResearchAndDevelopmentExpense.*", re.I), "us-gaap:OperatingExpenses"),
-        (re.compile(r"^SellingGeneralAndAdministrativeExpense.*", re.I), "us-gaap:OperatingExpenses"),
-        (re.compile(r"^Revenue.*|^SalesRevenue.*", re.I), "us-gaap:Revenues"),
-        (re.compile(r"^CostOfRevenue.*|^CostOfGoodsSold.*", re.I), "us-gaap:CostOfRevenue"),
-    ]
-    
     edges = set()
     for short, support_count in short_supported.items():
         if support_count < min_support: continue
-        for rx, parent in FAMILIES:
-            if rx.match(short):
-                edges.add((f"us-gaap:{short}", parent))
-                break
+        parent = decide(short)
+        if parent is not None:
+            edges.add((f"us-gaap:{short}", parent))
     return edges
 
+def load_concepts_cached(args):
+    """
+    Concept support + cached rule decisions for an incremental rebuild.
+    
+    Returns (concepts_full, concepts_short, pattern_decide, freq_decide) where the
+    decide callables read cached per-concept decisions. Only concepts without a
+    cached decision (new names, or all names after a rules change) are evaluated.
+    """
+    stats_path = args.concept_stats or str(pathlib.Path(args.cache).with_name("concept_stats.json"))
+    concepts_full, concepts_short = load_concepts_from_facts(
+        args.facts, args.min_cik_support, stats_path
+    )
+    cache = RuleDecisionCache.load(args.cache, rules_key(args.rules, FREQUENCY_FAMILIES))
+    
+    todo = cache.pending(concepts_short)
+    if todo:
+        matcher = PatternMatcher.from_yaml(args.rules, flags=re.IGNORECASE)
+        for short in todo:
+            cache.decisions[short] = {
+                "pattern": pattern_parents(matcher, short),
+                "freq": frequency_family(short),
+            }
+    cache.save()
+    print(f"[taxonomy] rule cache {args.cache}: "
+          f"evaluated {len(todo)}/{len(concepts_short)} concepts"
+          + (" (rules changed)" if cache.rules_changed else ""))
+    
+    decisions = cache.decisions
+    return (
+        concepts_full,
+        concepts_short,
+        lambda short: decisions[short]["pattern"],
+        lambda short: decisions[short]["freq"],
+    )
+
 def add_backbone():
     """Core structural relationships."""
     return [
@@ -94,27 +141,11 @@ def add_backbone():
     ]
 
 def transitive_closure(edges_df):
-    """Materialize all ancestor paths."""
-    parents = defaultdict(set)
-    for c, p in edges_df.itertuples(index=False):
-        parents[c].add(p)
-    
-    memo = {}
-    def ancestors(c):
-        if c in memo: return memo[c]
-        A = set()
-        for p in parents.get(c, ()):
-            A.add(p)
-            A |= ancestors(p)
-        memo[c] = A
-        return A
-    
-    rows = set()
-    for c in set(edges_df["child"]):
-        for a in ancestors(c):
-            if c != a:
-                rows.add((c, a))
-    return pd.DataFrame(sorted(rows), columns=["child", "parent"])
+    """Materialize all ancestor paths (cycle-closing edges are skipped and reported)."""
+    closure = TaxonomyClosure.from_edges(edges_df[["child", "parent"]].itertuples(index=False))
+    if closure.cycles:
+        print(f"[taxonomy] WARNING {closure.report()}")
+    return closure.to_frame()
 
 def normalize_df(df):
     """Ensure consistent format and deduplication."""
@@ -143,20 +174,32 @@ def main():
     ap.add_argument("--out", default="datasets/sec_edgar/taxonomy/usgaap_combined.csv")
     ap.add_argument("--min_cik_support", type=int, default=3)
     ap.add_argument("--with_closure", action="store_true")
+    ap.add_argument("--cache", default="",
+                    help="Rule-decision cache (JSON); enables incremental rebuilds")
+    ap.add_argument("--concept_stats", default="",
+                    help="Concept statistics store (JSON); updated from the facts delta")
+    ap.add_argument("--report", default="",
+                    help="Write a structural validation report (JSON) for the combined edges")
     args = ap.parse_args()
     
     # Load manual base
     manual_df = normalize_df(pd.read_csv(args.manual))
     
-    # Extract concepts from facts
-    concepts_full, concepts_short = load_concepts_from_facts(args.facts, args.min_cik_support)
+    # Extract concepts from facts (incrementally when a cache/stats store is given)
+    pattern_decide, freq_decide = None, frequency_family
+    if args.cache:
+        concepts_full, concepts_short, pattern_decide, freq_decide = load_concepts_cached(args)
+    else:
+        concepts_full, concepts_short = load_concepts_from_facts(
+            args.facts, args.min_cik_support, args.concept_stats
+        )
     
     # Apply pattern rules
-    pattern_edges = apply_pattern_rules(concepts_full, concepts_short, args.rules)
+    pattern_edges = apply_pattern_rules(concepts_full, concepts_short, args.rules, pattern_decide)
     pattern_df = pd.DataFrame(sorted(pattern_edges), columns=["child", "parent"])
     
     # Apply frequency rules
-    freq_edges = apply_frequency_rules(concepts_short, args.min_cik_support)
+    freq_edges = apply_frequency_rules(concepts_short, args.min_cik_support, freq_decide)
     freq_df = pd.DataFrame(sorted(freq_edges), columns=["child", "parent"])
     
     # Add backbone
@@ -166,6 +209,17 @@ def main():
     combined = pd.concat([manual_df[["child", "parent"]], pattern_df, freq_df, backbone_df], ignore_index=True)
     combined = normalize_df(combined)
     
+    # Optional structural validation (before closure, which is redundant by design)
+    if args.report:
+        report = validate_taxonomy(
+            combined[["child", "parent"]].itertuples(index=False),
+            expected_roots=set(manual_df["child"]) | set(manual_df["parent"]),
+        )
+        rep = pathlib.Path(args.report)
+        rep.parent.mkdir(parents=True, exist_ok=True)
+        rep.write_text(json.dumps(report.to_dict(), indent=2))
+        print(f"[taxonomy] validation -> {rep}\n{report.to_text(limit=3)}")
+    
     # Optional transitive closure
     if args.with_closure:
         closed = transitive_closure(combined)
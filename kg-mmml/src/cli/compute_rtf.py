@@ -58,6 +58,36 @@ def create_probe_dataset(facts_path, entity_vocab, embeddings):
     
     return np.array(X), np.array(y), relation_encoder
 
+def probe_scores(X, y, test_size=0.3, seed=42):
+    """
+    Fits the relation probe on a stratified split; returns accuracy and F1.
+
+    Relations with a single row cannot be stratified and are dropped; if the
+    test share is too small to hold every relation the split is not stratified.
+    """
+    X, y = np.asarray(X), np.asarray(y)
+    labels, counts = np.unique(y, return_counts=True)
+    keep = np.isin(y, labels[counts >= 2])
+    X, y = X[keep], y[keep]
+    if len(np.unique(y)) < 2:
+        raise ValueError("RTF probe needs at least two relation types with two or more triples")
+    try:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, random_state=seed, stratify=y
+        )
+    except ValueError:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, random_state=seed
+        )
+    classifier = LogisticRegression(random_state=seed, max_iter=1000)
+    classifier.fit(X_train, y_train)
+    y_pred = classifier.predict(X_test)
+    return {
+        "rtf_accuracy": accuracy_score(y_test, y_pred),
+        "rtf_f1_weighted": f1_score(y_test, y_pred, average='weighted'),
+        "rtf_f1_macro": f1_score(y_test, y_pred, average='macro'),
+    }
+
 def main():
     parser = argparse.ArgumentParser(description="Compute RTF score")
     parser.add_argument("--facts", type=Path, required=True)
@@ -85,21 +115,10 @@ def main():
 
     print(f"Dataset: {len(X)} samples, {len(relation_encoder.classes_)} relation types")
 
-    # Train/test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=args.test_size, random_state=args.seed, stratify=y
-    )
-
-    # Train classifier
-    classifier = LogisticRegression(random_state=args.seed, max_iter=1000)
-    classifier.fit(X_train, y_train)
-
-    # Evaluate
-    y_pred = classifier.predict(X_test)
-
-    rtf_accuracy = accuracy_score(y_test, y_pred)
-    rtf_f1_weighted = f1_score(y_test, y_pred, average='weighted')
-    rtf_f1_macro = f1_score(y_test, y_pred, average='macro')
+    scores = probe_scores(X, y, args.test_size, args.seed)
+    rtf_accuracy = scores["rtf_accuracy"]
+    rtf_f1_weighted = scores["rtf_f1_weighted"]
+    rtf_f1_macro = scores["rtf_f1_macro"]
 
     print(f"\nRTF Results:")
     print(f"  Accuracy: {rtf_accuracy:.4f}")
@@ -0,0 +1,41 @@
+# src/cli/concept_stats.py
+"""
+Build, update or merge the per-concept statistics store.
+
+Each --facts file is folded in incrementally (only bytes appended since the
+last run are read). Shard stores passed via --merge are combined into --out.
+Optionally exports a flat CSV (support, fact count, units, period range).
+"""
+import argparse
+
+from ..utils.concept_stats import ConceptStatsStore
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--facts", default="",
+                    help="facts.jsonl to scan into --out (incremental)")
+    ap.add_argument("--merge", nargs="*", default=[],
+                    help="Shard stores to merge into --out")
+    ap.add_argument("--out", default="data/processed/sec_edgar/concept_stats.json")
+    ap.add_argument("--csv", default="", help="Optional flat CSV export")
+    args = ap.parse_args()
+    
+    store = ConceptStatsStore.load(args.out)
+    if args.facts:
+        n_new = store.scan_facts(args.facts)
+        print(f"[concept-stats] scanned +{n_new} facts from {args.facts}")
+    for shard in args.merge:
+        store.merge(ConceptStatsStore.load(shard))
+        print(f"[concept-stats] merged {shard}")
+    store.save(args.out)
+    
+    if args.csv:
+        store.to_frame().to_csv(args.csv, index=False)
+    
+    n_sketch = sum(1 for cs in store.concepts.values() if not cs.ciks.exact)
+    print(f"[concept-stats] concepts={len(store)} sketched={n_sketch} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
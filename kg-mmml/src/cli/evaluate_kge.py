@@ -0,0 +1,75 @@
+# src/cli/evaluate_kge.py
+"""
+Filtered link-prediction evaluation of saved KG embeddings.
+
+Ranks every test triple against all entities (head and tail side) in
+--chunk entity blocks and reports MRR, mean rank and Hits@1/3/10, with other
+known triples filtered out. Known triples come from the compiled triples
+(``<embeddings_dir>/triples`` as written by ``train_kge --fast``) or from
+--known (an edge file or compiled-triples directory). Results go to
+link_prediction_eval.json, next to the training-time link_prediction.json.
+
+    python -m src.cli.train_kge --facts data/kg/kge_facts.jsonl --outdir data/kg/transe \
+        --fast --eval_size 0.05
+    python -m src.cli.evaluate_kge --embeddings_dir data/kg/transe
+"""
+import argparse
+import json
+import pathlib
+import time
+
+import numpy as np
+
+from ..utils.kge import MODEL_FILE, MODELS, load_triples
+from ..utils.link_prediction import KnownTriples, evaluate_link_prediction
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--embeddings_dir", required=True,
+                    help="Directory with entity_embeddings.npy / relation_embeddings.npy")
+    ap.add_argument("--test", default="",
+                    help="Test triples .npy (default: <embeddings_dir>/test_triples.npy)")
+    ap.add_argument("--known", default="",
+                    help="Edge file or compiled triples dir for filtering "
+                         "(default: <embeddings_dir>/triples)")
+    ap.add_argument("--model", choices=sorted(MODELS), default=None,
+                    help="Scoring model (default: from kge_model.json, else transe)")
+    ap.add_argument("--batch", type=int, default=128, help="Test queries scored together")
+    ap.add_argument("--chunk", type=int, default=32768, help="Entities scored together")
+    ap.add_argument("--max_test", type=int, default=0,
+                    help="Evaluate the first N test triples (0 = all)")
+    ap.add_argument("--out", default="",
+                    help="Metrics JSON (default: <embeddings_dir>/link_prediction_eval.json)")
+    args = ap.parse_args()
+
+    emb_dir = pathlib.Path(args.embeddings_dir)
+    name = args.model
+    if name is None:
+        meta = emb_dir / MODEL_FILE
+        name = json.loads(meta.read_text(encoding="utf-8"))["model"] if meta.exists() else "transe"
+    model = MODELS[name].from_embeddings(np.load(emb_dir / "entity_embeddings.npy"),
+                                         np.load(emb_dir / "relation_embeddings.npy"))
+    known_triples, entities, relations = load_triples(args.known or emb_dir / "triples")
+    if len(entities) != model.entity_embeddings.num_embeddings:
+        raise ValueError(f"{len(entities)} entities in the known triples, "
+                         f"{model.entity_embeddings.num_embeddings} embeddings")
+    known = KnownTriples(known_triples, len(entities), len(relations))
+    test = np.load(args.test or emb_dir / "test_triples.npy")
+    if args.max_test:
+        test = test[:args.max_test]
+
+    print(f"[kge-eval] {name}: {len(test)} test triples, {len(entities)} entities, "
+          f"{len(known_triples)} known")
+    t0 = time.perf_counter()
+    metrics = evaluate_link_prediction(model, test, known, args.batch, args.chunk)
+    metrics["seconds"] = time.perf_counter() - t0
+
+    out = pathlib.Path(args.out) if args.out else emb_dir / "link_prediction_eval.json"
+    out.write_text(json.dumps(metrics, indent=2), encoding="utf-8")
+    print(f"[kge-eval] MRR {metrics['mrr']:.4f}, Hits@1/3/10 {metrics['hits@1']:.3f}/"
+          f"{metrics['hits@3']:.3f}/{metrics['hits@10']:.3f} in {metrics['seconds']:.1f}s -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,11 +17,11 @@ import platform
 import numpy as np
 import pandas as pd
 from collections import defaultdict
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import normalize
 from sklearn.decomposition import TruncatedSVD
 
 from src.utils.data_utils import build_corpus_from_facts
+from src.utils.text_features import tfidf_features
 
 
 def mem_mb():
@@ -145,6 +145,10 @@ def main():
     ap.add_argument("--drop_warmup", type=int, default=5)
     ap.add_argument("--seed", type=int, default=42)
     ap.add_argument("--threads", type=int, default=1, help="Set OMP/BLAS threads")
+    ap.add_argument("--n_jobs", type=int, default=-1,
+                    help="TF-IDF worker processes (-1 = all cores)")
+    ap.add_argument("--tfidf_store", default="",
+                    help="Feature store directory reusing TF-IDF per corpus version")
     args = ap.parse_args()
     
     os.environ["OMP_NUM_THREADS"] = str(args.threads)
@@ -156,8 +160,8 @@ def main():
     if len(docs) == 0:
         raise SystemExit("No documents built from facts.jsonl — cannot benchmark.")
     
-    vec = TfidfVectorizer(min_df=2, max_features=50000)
-    X = vec.fit_transform(texts)
+    X, _ = tfidf_features(texts, docs, min_df=2, max_features=50000,
+                          n_jobs=args.n_jobs, store=args.tfidf_store or None)
     
     sizes = [min(int(s), X.shape[0]) for s in args.sizes]
     rows = []
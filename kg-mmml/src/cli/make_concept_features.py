@@ -2,20 +2,30 @@
 """
 Generate concept feature matrices for KG-as-features baseline.
 
-Creates binary or count-based sparse matrices from SEC EDGAR facts.
+Creates sparse doc x concept matrices from SEC EDGAR facts, weighted as
+binary, count, log-count, TF-IDF or BM25. Facts are integer-coded in one
+streaming pass and the matrix is built with np.unique/bincount. With
+--taxonomy, each doc's activations are also spread to decayed ancestors
+(and optionally descendants) via one sparse product with a cached
+taxonomy propagation matrix. With --store, the result is also kept as a
+memory-mapped feature-store entry keyed by facts hash and parameters, and an
+existing entry is copied to --outdir instead of rebuilding.
 Outputs:
 - concept_features_filing.npz (sparse matrix)
 - concept_features_index.csv (doc-to-row mapping)
-- concept_features_vocab.csv (concept vocabulary)
+- concept_features_vocab.csv (concept vocabulary, with df and idf)
 """
 import argparse
 import pathlib
 import numpy as np
 import pandas as pd
-from collections import Counter
 from scipy import sparse
 
-from ..utils.data_utils import build_corpus_from_facts
+from ..utils.concept_features import (
+    WEIGHTINGS, apply_weighting, count_matrix, encode_facts, hierarchy_propagation,
+    idf_weights, propagate, top_vocab
+)
+from ..utils.feature_store import FeatureStore, entry_key, file_hash
 
 
 def main():
@@ -24,60 +34,91 @@ def main():
     ap.add_argument("--outdir", default="data/processed/sec_edgar/features")
     ap.add_argument("--vocab_size", type=int, default=5000,
                     help="Top-K concepts by document frequency")
+    ap.add_argument("--weighting", choices=WEIGHTINGS, default="count",
+                    help="Feature weighting scheme")
     ap.add_argument("--binary", action="store_true",
-                    help="Use binary features instead of counts")
+                    help="Use binary features instead of counts (same as --weighting binary)")
+    ap.add_argument("--bm25_k1", type=float, default=1.2)
+    ap.add_argument("--bm25_b", type=float, default=0.75)
+    ap.add_argument("--taxonomy", default="",
+                    help="Taxonomy CSV; enables hierarchy-propagated features")
+    ap.add_argument("--up_decay", type=float, default=0.5,
+                    help="Activation weight per hop towards ancestors")
+    ap.add_argument("--down_decay", type=float, default=0.0,
+                    help="Activation weight per hop towards descendants")
+    ap.add_argument("--max_depth", type=int, default=0,
+                    help="Max propagation hops (0 = unbounded)")
+    ap.add_argument("--propagation_cache", default="",
+                    help="Cache dir for propagation matrices (default: --outdir)")
+    ap.add_argument("--store", default="",
+                    help="Feature store directory (mmap-able entries keyed by facts hash + params)")
     args = ap.parse_args()
-    
+    weighting = "binary" if args.binary else args.weighting
+
     outdir = pathlib.Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
-    
-    # Build corpus (no taxonomy needed)
-    docs, _, _, concept_lists = build_corpus_from_facts(args.facts)
-    
-    # Count document frequency for each concept
-    df_counts = Counter()
-    doc_concept_counts = {}
-    
-    for i, concepts in enumerate(concept_lists):
-        counts = Counter(concepts)
-        doc_concept_counts[docs[i]] = counts
-        for c in counts.keys():
-            df_counts[c] += 1
-    
-    # Build vocabulary by document frequency
-    vocab = [c for c, _ in df_counts.most_common(args.vocab_size)]
-    vocab_index = {c: i for i, c in enumerate(vocab)}
-    doc_index = {d: i for i, d in enumerate(docs)}
-    
-    rows, cols, data = [], [], []
-    for d in docs:
-        for c, cnt in doc_concept_counts[d].items():
-            j = vocab_index.get(c)
-            if j is None:
-                continue
-            rows.append(doc_index[d])
-            cols.append(j)
-            data.append(1 if args.binary else cnt)
-    
-    X = sparse.csr_matrix(
-        (data, (rows, cols)),
-        shape=(len(docs), len(vocab)),
-        dtype=np.float32
-    )
-    
+
+    store, key = None, None
+    if args.store:
+        params = {
+            "vocab_size": args.vocab_size, "weighting": weighting,
+            "bm25_k1": args.bm25_k1, "bm25_b": args.bm25_b,
+        }
+        if args.taxonomy:
+            params.update(taxonomy=file_hash(args.taxonomy), up_decay=args.up_decay,
+                          down_decay=args.down_decay, max_depth=args.max_depth)
+        store, key = FeatureStore(args.store), entry_key(file_hash(args.facts), params)
+        if key in store:
+            npz_path = store.get(key).export(outdir, "concept_features")
+            print(f"[concept-features] store hit {store.path(key)} -> {npz_path}")
+            return
+
+    # Integer-code (doc, concept) pairs in one pass over facts
+    docs, concepts, doc_codes, concept_codes = encode_facts(args.facts)
+    counts = count_matrix(doc_codes, concept_codes, len(docs), len(concepts))
+    del doc_codes, concept_codes
+
+    # Optional hierarchy propagation (one sparse product for all docs)
+    if args.taxonomy:
+        tax_concepts, P = hierarchy_propagation(
+            args.taxonomy, args.up_decay, args.down_decay, args.max_depth,
+            cache_dir=args.propagation_cache or str(outdir),
+        )
+        nnz = counts.nnz
+        counts, concepts = propagate(counts, concepts, tax_concepts, P)
+        print(f"[concept-features] propagated over {len(tax_concepts)} taxonomy concepts: "
+              f"nnz {nnz} -> {counts.nnz}")
+
+    # Vocabulary by document frequency
+    cols = top_vocab(counts, args.vocab_size)
+    vocab = [concepts[j] for j in cols]
+    counts = counts[:, cols]
+    counts.sort_indices()
+    df = np.bincount(counts.indices, minlength=len(vocab))
+
+    idf = None
+    if weighting in ("tfidf", "bm25"):
+        idf = idf_weights(df, len(docs), weighting)
+    X = apply_weighting(counts, weighting, idf=idf, k1=args.bm25_k1, b=args.bm25_b)
+
     # Save outputs
     npz_path = outdir / "concept_features_filing.npz"
     sparse.save_npz(npz_path, X)
     pd.DataFrame({"doc_id": docs}).to_csv(
         outdir / "concept_features_index.csv", index=False
     )
-    pd.DataFrame({"concept": vocab}).to_csv(
-        outdir / "concept_features_vocab.csv", index=False
-    )
-    
+    vocab_df = pd.DataFrame({"concept": vocab, "df": df})
+    if idf is not None:
+        vocab_df["idf"] = idf
+    vocab_df.to_csv(outdir / "concept_features_vocab.csv", index=False)
+
     print(f"[concept-features] docs={len(docs)} vocab={len(vocab)} "
-          f"nnz={X.nnz} -> {npz_path}")
+          f"nnz={X.nnz} weighting={weighting} -> {npz_path}")
+
+    if store is not None:
+        store.put(key, X, docs, vocab_df, meta={"facts": args.facts, **params})
+        print(f"[concept-features] stored -> {store.path(key)}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,67 @@
+# src/cli/make_numeric_features.py
+"""
+Generate numeric fact-value features per filing.
+
+Signed-log magnitudes per concept, standard financial ratios and
+period-over-period growth per CIK, as a sparse matrix whose rows follow
+the same doc ids as the concept features (join with --concept_features_*
+style arguments via feature_join).
+Outputs:
+- numeric_features_filing.npz (sparse matrix)
+- numeric_features_index.csv (doc-to-row mapping)
+- numeric_features_vocab.csv (feature names)
+"""
+import argparse
+import pathlib
+import pandas as pd
+from scipy import sparse
+
+from ..utils.feature_store import FeatureStore, entry_key, file_hash
+from ..utils.numeric_features import build_numeric_features
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--facts", default="data/processed/sec_edgar/facts.jsonl")
+    ap.add_argument("--outdir", default="data/processed/sec_edgar/features")
+    ap.add_argument("--vocab_size", type=int, default=500,
+                    help="Top-K concepts (by docs reporting a value) for log/growth columns")
+    ap.add_argument("--no_ratios", action="store_true")
+    ap.add_argument("--no_growth", action="store_true")
+    ap.add_argument("--store", default="",
+                    help="Feature store directory (entries keyed by facts hash + params)")
+    args = ap.parse_args()
+
+    outdir = pathlib.Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    store, key = None, None
+    params = {"kind": "numeric", "vocab_size": args.vocab_size,
+              "ratios": not args.no_ratios, "growth": not args.no_growth}
+    if args.store:
+        store, key = FeatureStore(args.store), entry_key(file_hash(args.facts), params)
+        if key in store:
+            npz_path = store.get(key).export(outdir, "numeric_features")
+            print(f"[numeric-features] store hit {store.path(key)} -> {npz_path}")
+            return
+
+    X, docs, names = build_numeric_features(
+        args.facts, args.vocab_size, ratios=not args.no_ratios, growth=not args.no_growth
+    )
+
+    npz_path = outdir / "numeric_features_filing.npz"
+    sparse.save_npz(npz_path, X)
+    pd.DataFrame({"doc_id": docs}).to_csv(outdir / "numeric_features_index.csv", index=False)
+    vocab_df = pd.DataFrame({"feature": names})
+    vocab_df.to_csv(outdir / "numeric_features_vocab.csv", index=False)
+
+    print(f"[numeric-features] docs={len(docs)} features={len(names)} "
+          f"nnz={X.nnz} -> {npz_path}")
+
+    if store is not None:
+        store.put(key, X, docs, vocab_df, meta={"facts": args.facts, **params})
+        print(f"[numeric-features] stored -> {store.path(key)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# src/cli/serve_model.py
+"""
+Classify filings with a saved model artifact.
+
+Batch mode scores a file of filings (``--input``: one JSON filing per line,
+as a concept list, ``{"concepts": ...}``, ``{"facts": ...}`` or ``{"text":
+...}``, optionally with an ``"id"``) or raw fact records grouped by filing
+(``--facts``), writing one prediction per line.
+
+``--http`` starts a local JSON endpoint instead. Concurrent requests are
+micro-batched (``--max_batch``, ``--max_wait_ms``):
+- ``POST /predict`` with one filing, or ``{"filings": [...]}`` for a batch
+- ``GET /stats`` request latency p50/p95/p99 and batch sizes
+- ``GET /health``
+
+    python -m src.cli.baseline_tfidf --save_model outputs/models/baseline.npz
+    python -m src.cli.serve_model --model outputs/models/baseline.npz --facts new_facts.jsonl
+    python -m src.cli.serve_model --model outputs/models/baseline.npz --http --port 8080
+"""
+import argparse
+import json
+import pathlib
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..utils.data_utils import build_corpus_from_facts
+from ..utils.serving import MicroBatcher, ModelArtifact, filing_text, latency_summary
+
+
+def read_filings(args):
+    """(ids, filings) from --facts or --input."""
+    if args.facts:
+        docs, texts, _, _ = build_corpus_from_facts(args.facts)
+        return docs, [{"text": t} for t in texts]
+    ids, filings = [], []
+    with open(args.input, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            ids.append(rec.get("id", len(ids)) if isinstance(rec, dict) else len(ids))
+            filings.append(rec)
+    return ids, filings
+
+
+def run_batch(model: ModelArtifact, args) -> None:
+    ids, filings = read_filings(args)
+    batch_ms, results = [], []
+    model.predict(filings[:1], args.threshold, args.top_k)  # warm-up
+    for s in range(0, len(filings), args.max_batch):
+        t0 = time.perf_counter()
+        results.extend(model.predict(filings[s:s + args.max_batch], args.threshold, args.top_k))
+        batch_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for doc_id, res in zip(ids, results):
+            out.write(json.dumps({"id": doc_id, **res}) + "\n")
+    finally:
+        if args.out:
+            out.close()
+    stats = {"docs": len(filings), "batches": len(batch_ms),
+             "per_doc_ms": sum(batch_ms) / max(1, len(filings)), **latency_summary(batch_ms)}
+    print(f"[serve] {json.dumps(stats)}", file=sys.stderr)
+
+
+def make_handler(batcher: MicroBatcher):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, payload) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok"})
+            elif self.path == "/stats":
+                self._send(200, batcher.stats())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError as e:
+                self._send(400, {"error": f"invalid JSON: {e}"})
+                return
+            try:
+                if isinstance(payload, dict) and "filings" in payload:
+                    filings = payload["filings"]
+                    if not isinstance(filings, list):
+                        raise ValueError("'filings' must be a list")
+                    self._send(200, {"predictions": batcher(filings)})
+                else:
+                    self._send(200, batcher([payload])[0])
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", required=True, help="Artifact .npz from --save_model")
+    ap.add_argument("--input", default="", help="JSONL of filings (concept lists / fact records)")
+    ap.add_argument("--facts", default="", help="Fact records JSONL, grouped by filing")
+    ap.add_argument("--out", default="", help="Predictions JSONL (default: stdout)")
+    ap.add_argument("--threshold", type=float, default=0.5)
+    ap.add_argument("--top_k", type=int, default=5, help="Scores returned per filing")
+    ap.add_argument("--max_batch", type=int, default=64)
+    ap.add_argument("--max_wait_ms", type=float, default=1.0,
+                    help="Longest a request waits for a batch to fill (--http)")
+    ap.add_argument("--http", action="store_true", help="Serve POST /predict on a local port")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    args = ap.parse_args()
+    if not args.http and not (args.input or args.facts):
+        ap.error("give --input or --facts, or --http")
+
+    model = ModelArtifact(args.model)
+    print(f"[serve] loaded {pathlib.Path(args.model).name}: {len(model.terms)} terms, "
+          f"{len(model.labels)} labels", file=sys.stderr)
+    if not args.http:
+        run_batch(model, args)
+        return
+
+    # filings are converted one by one so a malformed one fails only its own request
+    batcher = MicroBatcher(lambda texts: model.predict_texts(texts, args.threshold, args.top_k),
+                           max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                           prepare=filing_text)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher))
+    print(f"[serve] listening on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        print(f"[serve] {json.dumps(batcher.stats())}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
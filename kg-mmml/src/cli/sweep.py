@@ -0,0 +1,231 @@
+# src/cli/sweep.py
+"""
+Hyperparameter sweep with successive halving.
+
+Searches a ``train_joint`` (budget = epochs) or ``baseline_tfidf`` SGD
+(budget = passes) space from a YAML config (see configs/sweep_joint.yaml):
+- the corpus, labels and a stratified train/val/test split are built once;
+  TF-IDF is computed once per distinct (max_features, min_df), through the
+  feature store when ``data.tfidf_store`` is set, and shared with workers
+- each rung trains the surviving configurations in a process pool, resuming
+  every trial from its own checkpoint, and scores them on the validation
+  split; the top 1/eta continue with eta times the budget
+- test metrics are computed only for the final rung
+
+Outputs in --out_dir: trials.jsonl (every rung result as it finishes),
+leaderboard.csv and sweep_summary.json (best config and budget spent
+versus the full grid).
+"""
+import argparse
+import json
+import pathlib
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+import torch
+import yaml
+from sklearn.metrics import f1_score
+from sklearn.preprocessing import MultiLabelBinarizer
+
+from ..utils.batching import set_threads
+from ..utils.checkpoint import load_checkpoint, save_checkpoint
+from ..utils.data_utils import build_corpus_from_facts
+from ..utils.experiments import SharedArrays, run_jobs
+from ..utils.linear_models import MultiLabelLinear
+from ..utils.sweep import budget_spent, expand_space, leaderboard, rung_budgets, successive_halving
+from ..utils.taxonomy_index import TaxonomyIndex
+from ..utils.text_features import tfidf_features
+from .train_joint import (
+    LogReg, eval_metrics, make_parent_support, prepare_features, run_epoch, split_indices
+)
+
+# parameters not in the search space take the CLI defaults of each target
+DEFAULTS = {
+    "joint": {"consistency_weight": 0.1, "lr": 2e-3, "batch": 128, "max_features": 50000,
+              "min_df": 2},
+    "baseline": {"alpha": 1e-4, "batch_size": 64, "max_features": 20000, "min_df": 2},
+}
+
+
+def feature_key(config: dict) -> str:
+    return f"X:{int(config['max_features'])}:{int(config['min_df'])}"
+
+
+def _f1(Y, Yhat) -> dict:
+    return {
+        "micro_f1": float(f1_score(Y, Yhat, average="micro", zero_division=0)),
+        "macro_f1": float(f1_score(Y, Yhat, average="macro", zero_division=0)),
+    }
+
+
+def joint_trial(arrays, config, budget, prev_budget, final, trial_dir, seed, threads):
+    """Train a joint model from ``prev_budget`` to ``budget`` epochs."""
+    set_threads(threads)
+    X, Y, S = arrays[feature_key(config)], arrays["Y"], arrays["S"]
+    tr, va, te = arrays["train"], arrays["val"], arrays["test"]
+    Xtr, Xva = prepare_features(X[tr]), prepare_features(X[va])
+
+    torch.manual_seed(seed)
+    np.random.seed(seed)
+    model = LogReg(X.shape[1], Y.shape[1])
+    opt = torch.optim.Adam(model.parameters(), lr=float(config["lr"]))
+    ckpt = pathlib.Path(trial_dir) / "last.pt"
+    if prev_budget:
+        state = load_checkpoint(ckpt)
+        model.load_state_dict(state["model"])
+        opt.load_state_dict(state["optimizer"])
+        np.random.set_state(state["numpy_rng"])
+        torch.set_rng_state(state["torch_rng"])
+    for _ in range(prev_budget, budget):
+        run_epoch(model, opt, Xtr, Y[tr], S[tr], int(config["batch"]),
+                  float(config["consistency_weight"]), prefetch=0)
+    save_checkpoint(ckpt, {"model": model.state_dict(), "optimizer": opt.state_dict(),
+                           "numpy_rng": np.random.get_state(), "torch_rng": torch.get_rng_state()})
+
+    result = eval_metrics(model, Xva, Y[va])
+    if final:
+        result["test"] = eval_metrics(model, prepare_features(X[te]), Y[te])
+    return result
+
+
+def baseline_trial(arrays, config, budget, prev_budget, final, trial_dir, seed, threads):
+    """
+    Train the SGD baseline from ``prev_budget`` to ``budget`` passes.
+
+    Resuming continues the minibatch shuffle sequence, so a staged trial
+    matches an uninterrupted one when ``batch_size`` > 0.
+    """
+    X, Y = arrays[feature_key(config)], arrays["Y"].astype(int)
+    tr, va, te = arrays["train"], arrays["val"], arrays["test"]
+    path = pathlib.Path(trial_dir) / "clf.joblib"
+    if prev_budget:
+        clf = joblib.load(path)
+        clf.partial_fit(X[tr], Y[tr], epochs=budget - prev_budget, start_epoch=prev_budget)
+    else:
+        clf = MultiLabelLinear(solver="sgd", alpha=float(config["alpha"]), max_iter=budget,
+                               tol=None, batch_size=int(config["batch_size"]),
+                               random_state=seed)
+        clf.fit(X[tr], Y[tr])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(clf, path)
+
+    result = _f1(Y[va], clf.predict(X[va]))
+    if final:
+        result["test"] = _f1(Y[te], clf.predict(X[te]))
+    return result
+
+
+TRIALS = {"joint": joint_trial, "baseline": baseline_trial}
+
+
+def sweep_trial(arrays, target, trial, config, budget, prev_budget, final, trial_dir, seed,
+                threads):
+    """Scheduler job: one trial at one rung."""
+    return TRIALS[target](arrays, config, budget, prev_budget, final, trial_dir, seed, threads)
+
+
+def load_data(facts: str, taxonomy: str, with_support: bool):
+    """(docs, texts, Y float32, S parent support or None) for labelled docs."""
+    child_to_parents = TaxonomyIndex.from_csv(taxonomy)
+    docs, texts, labels, concepts = build_corpus_from_facts(facts, child_to_parents)
+    keep = [i for i, l in enumerate(labels) if len(l) > 0]
+    if not keep:
+        raise RuntimeError("No labelled documents found after taxonomy mapping.")
+    docs, texts = [docs[i] for i in keep], [texts[i] for i in keep]
+    labels, concepts = [labels[i] for i in keep], [concepts[i] for i in keep]
+    mlb = MultiLabelBinarizer(sparse_output=False)
+    Y = mlb.fit_transform(labels).astype(np.float32)
+    S = None
+    if with_support:
+        S = make_parent_support(concepts, list(mlb.classes_), child_to_parents)
+    return docs, texts, Y, S
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="configs/sweep_joint.yaml")
+    ap.add_argument("--out_dir", default="reports/sweeps/joint")
+    ap.add_argument("--workers", type=int, default=0, help="Trials trained in parallel (0 = auto)")
+    ap.add_argument("--threads_per_job", type=int, default=1)
+    ap.add_argument("--n_jobs", type=int, default=-1,
+                    help="TF-IDF worker processes (-1 = all cores)")
+    ap.add_argument("--keep_checkpoints", action="store_true",
+                    help="Keep per-trial checkpoints (deleted after the sweep by default)")
+    args = ap.parse_args()
+
+    cfg = yaml.safe_load(open(args.config, "r", encoding="utf-8"))
+    sw, data = cfg.get("sweep", {}), cfg.get("data", {})
+    target = sw.get("target", "joint")
+    if target not in TRIALS:
+        raise ValueError(f"Unknown sweep target '{target}' (expected one of {sorted(TRIALS)})")
+    seed, metric, eta = int(sw.get("seed", 42)), sw.get("metric", "macro_f1"), int(sw.get("eta", 3))
+    budgets = rung_budgets(int(sw.get("min_budget", 1)), int(sw.get("max_budget", 9)), eta)
+    configs = [dict(DEFAULTS[target], **c)
+               for c in expand_space(cfg.get("space", {}), int(sw.get("n_trials", 0)), seed)]
+
+    out_dir = pathlib.Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    trials_path = out_dir / "trials.jsonl"
+    trials_path.write_text("", encoding="utf-8")
+
+    docs, texts, Y, S = load_data(
+        data.get("facts", "data/processed/sec_edgar/facts.jsonl"),
+        data.get("taxonomy", "datasets/sec_edgar/taxonomy/usgaap_combined.csv"),
+        with_support=target == "joint")
+    tr, va, te = split_indices(Y, seed, test_size=float(sw.get("test_size", 0.25)),
+                               val_size=float(sw.get("val_size", 0.2)))
+    print(f"[sweep] {target}: {len(configs)} configs, budgets {budgets}, "
+          f"{len(tr)}/{len(va)}/{len(te)} train/val/test docs")
+
+    with SharedArrays() as shared:
+        for key in sorted({feature_key(c) for c in configs}):
+            _, mf, md = key.split(":")
+            X, _ = tfidf_features(texts, docs, min_df=int(md), max_features=int(mf),
+                                  n_jobs=args.n_jobs, store=data.get("tfidf_store"))
+            shared.publish(key, X)
+        shared.publish("Y", Y)
+        if S is not None:
+            shared.publish("S", np.asarray(S, dtype=np.float32))
+        for name, idx in (("train", tr), ("val", va), ("test", te)):
+            shared.publish(name, idx)
+
+        def on_result(job, result):
+            row = {k: job[k] for k in ("trial", "budget", "config")}
+            with open(trials_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(dict(row, **result)) + "\n")
+
+        def evaluate(jobs):
+            jobs = [dict(job, target=target,
+                         trial_dir=str(out_dir / "trials" / f"{job['trial']:03d}"),
+                         seed=seed, threads=args.threads_per_job) for job in jobs]
+            results = run_jobs(sweep_trial, jobs, shared, max_workers=args.workers,
+                               threads_per_job=args.threads_per_job, on_result=on_result)
+            return [res for _, res in results]
+
+        def on_rung(rung, results):
+            best = max(r[metric] for r in results)
+            print(f"[sweep] rung {rung} (budget {budgets[min(rung, len(budgets) - 1)]}): "
+                  f"{len(results)} trials, best val {metric} {best:.4f}")
+
+        trials = successive_halving(configs, evaluate, budgets, eta, metric, on_rung)
+
+    board = leaderboard(trials)
+    pd.DataFrame(board).to_csv(out_dir / "leaderboard.csv", index=False)
+    spent, grid = budget_spent(trials), len(configs) * budgets[-1]
+    summary = {"target": target, "metric": metric, "budgets": budgets, "n_configs": len(configs),
+               "budget_spent": spent, "full_grid_budget": grid, "fraction_of_grid": spent / grid,
+               "best": {k: board[0][k] for k in board[0] if k != "config"},
+               "best_config": trials[board[0]["trial"]]["config"]}
+    (out_dir / "sweep_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    if not args.keep_checkpoints:
+        shutil.rmtree(out_dir / "trials", ignore_errors=True)
+
+    print(f"[sweep] wrote {out_dir / 'leaderboard.csv'}")
+    keys = ("best_config", "budget_spent", "full_grid_budget")
+    print(json.dumps({k: summary[k] for k in keys}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ import torch
 import yaml
 
 from src.utils.data_utils import build_corpus_from_facts
+from src.utils.experiments import SharedArrays, run_jobs
 
 
 def set_seed(s):
@@ -39,16 +40,11 @@ def load_taxonomy(path):
     return mp
 
 
-def run_baseline(cfg, seed):
-    """TF-IDF baseline."""
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.linear_model import LogisticRegression
-    from sklearn.metrics import f1_score
-    from sklearn.multiclass import OneVsRestClassifier
-    from sklearn.model_selection import train_test_split
+def load_baseline_features(cfg):
+    """Build the TF-IDF baseline inputs once: (X, Y)."""
     from sklearn.preprocessing import MultiLabelBinarizer
+    from src.utils.text_features import tfidf_features
     
-    set_seed(seed)
     data_cfg = cfg.get("data", {})
     taxonomy = first_present(
         data_cfg,
@@ -66,37 +62,63 @@ def run_baseline(cfg, seed):
         else:
             raise FileNotFoundError(f"Facts file not found: {facts}")
     tax = load_taxonomy(taxonomy)
-    _, texts, labels, _ = build_corpus_from_facts(facts, tax)
+    docs, texts, labels, _ = build_corpus_from_facts(facts, tax)
     
     # Filter docs with labels
     keep = [i for i, l in enumerate(labels) if len(l) > 0]
+    docs = [docs[i] for i in keep]
     texts = [texts[i] for i in keep]
     labels = [labels[i] for i in keep]
     if not labels:
         raise RuntimeError("No labelled documents found after taxonomy mapping.")
     
     # Features
-    vec = TfidfVectorizer(min_df=2, max_features=20000)
-    X = vec.fit_transform(texts)
+    X, _ = tfidf_features(texts, docs, min_df=2, max_features=20000,
+                          n_jobs=data_cfg.get("n_jobs", -1), store=data_cfg.get("tfidf_store"))
     
     # Labels
     mlb = MultiLabelBinarizer(sparse_output=False)
     Y = mlb.fit_transform(labels)
+    return X, Y
+
+
+def baseline_fit(arrays, seed, trainer=None):
+    """
+    TF-IDF baseline fit for one seed on shared (X, Y).
+
+    ``trainer`` holds ``MultiLabelLinear`` options (config ``trainer:`` section),
+    e.g. ``{"solver": "saga", "n_jobs": 4}``; the default is per-label liblinear.
+    """
+    from sklearn.metrics import f1_score
+    from sklearn.model_selection import train_test_split
+    from src.utils.linear_models import MultiLabelLinear
+    
+    set_seed(seed)
     
     # Split
-    Xtr, Xte, Ytr, Yte = train_test_split(X, Y, test_size=0.25, random_state=seed)
+    Xtr, Xte, Ytr, Yte = train_test_split(arrays["X"], arrays["Y"], test_size=0.25,
+                                          random_state=seed)
     
     # Train
-    clf = OneVsRestClassifier(LogisticRegression(max_iter=200, solver="liblinear"))
+    clf = MultiLabelLinear(**(trainer or {}))
     clf.fit(Xtr, Ytr)
     Yhat = clf.predict(Xte)
     
     return {"micro_f1": float(f1_score(Yte, Yhat, average="micro", zero_division=0)), "macro_f1": float(f1_score(Yte, Yhat, average="macro", zero_division=0))}
 
 
+def run_baseline(cfg, seed):
+    """TF-IDF baseline."""
+    X, Y = load_baseline_features(cfg)
+    return baseline_fit({"X": X, "Y": Y}, seed, cfg.get("trainer"))
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--config", required=True)
+    ap.add_argument("--workers", type=int, default=0,
+                    help="Parallel seed jobs "
+                         "(0 = config experiment.workers or all cores; 1 = serial)")
     args = ap.parse_args()
     
     with open(args.config, "r", encoding="utf-8") as f:
@@ -110,19 +132,38 @@ def main():
         one_seed = cfg.get("experiment", {}).get("seed", 13)
         seeds = [one_seed]
     
+    if model_type == "joint_model":
+        raise NotImplementedError(
+            "train.py does not implement joint training. Use src/cli/train_joint.py directly "
+            "to avoid ambiguous placeholder metrics."
+        )
+    if model_type not in {"vl_baseline", "tfidf", "baseline_tfidf"}:
+        raise ValueError(f"Unknown model type: {model_type}")
+    
+    # Featurise once; seeds run as parallel jobs on the shared matrices
+    X, Y = load_baseline_features(cfg)
+    workers = args.workers or cfg.get("experiment", {}).get("workers", 0)
+    trainer = cfg.get("trainer")
+    
+    def report(job, metrics):
+        print(f"[train] seed={job['seed']} micro_f1={metrics['micro_f1']:.4f} "
+              f"macro_f1={metrics['macro_f1']:.4f}")
+    
+    if workers == 1 or len(seeds) == 1:
+        runs = []
+        for s in seeds:
+            runs.append(({"seed": s}, baseline_fit({"X": X, "Y": Y}, s, trainer)))
+            report(*runs[-1])
+    else:
+        with SharedArrays() as shared:
+            shared.publish("X", X)
+            shared.publish("Y", Y)
+            runs = run_jobs(baseline_fit, [{"seed": s, "trainer": trainer} for s in seeds], shared,
+                            max_workers=workers, on_result=report)
+    
     results = []
-    for s in seeds:
-        if model_type in {"vl_baseline", "tfidf", "baseline_tfidf"}:
-            metrics = run_baseline(cfg, s)
-        elif model_type == "joint_model":
-            raise NotImplementedError(
-                "train.py does not implement joint training. Use src/cli/train_joint.py directly "
-                "to avoid ambiguous placeholder metrics."
-            )
-        else:
-            raise ValueError(f"Unknown model type: {model_type}")
-        
-        metrics["seed"] = s
+    for job, metrics in runs:
+        metrics["seed"] = job["seed"]
         results.append(metrics)
     
     # Aggregate
@@ -1,11 +1,35 @@
 # src/cli/train_kge.py
 """
 Train TransE model to generate entity embeddings for RTF computation.
+
+Batches (shuffle, negative sampling, tensor slicing) are produced --prefetch
+batches ahead in a background thread while the optimiser step runs.
+
+--fast trains from int32 triples compiled once per edge file (--facts may
+also be kg_edges.csv), with sparse embedding gradients, a sparse-aware
+optimiser and --negatives corruptions per positive scored in one fused
+pass; see src/utils/kge.py. --model picks TransE, DistMult, ComplEx or
+RotatE; --target_rtf stops training once the relation probe of
+compute_rtf reaches that accuracy, and kge_model.json records the model
+and the epochs it took.
+
+--partitions P trains graphs whose embeddings do not fit in memory: entity
+embeddings and row-wise Adagrad state live on disk per partition, triples
+are bucketed by (head, tail) partition and each bucket trains with only its
+two partitions loaded (src/utils/partitioned_kge.py). --hogwild N trains
+with N processes that update shared-memory embeddings without locks,
+checkpointing to hogwild.pt between epochs (src/utils/hogwild_kge.py).
+The output files are the same in every mode. With --eval_size a share of the triples is held
+out (saved as test_triples.npy) and scored by filtered MRR / Hits@k
+(src/utils/link_prediction.py), written to link_prediction.json.
 """
 
 import argparse
 import json
+import math
 import random
+import shutil
+import time
 from pathlib import Path
 
 import numpy as np
@@ -15,6 +39,16 @@ import torch.nn as nn
 import torch.optim as optim
 from tqdm import tqdm
 
+from src.cli.compute_rtf import probe_scores
+from src.utils.batching import Prefetcher, set_threads, triple_batches
+from src.utils.checkpoint import load_checkpoint, save_checkpoint
+from src.utils.hogwild_kge import train_hogwild
+from src.utils.kge import (
+    MODEL_FILE, MODELS, load_triples, make_model, make_sparse_optimizer, save_vocab, train_epoch
+)
+from src.utils.link_prediction import KnownTriples, evaluate_link_prediction, split_triples
+from src.utils.partitioned_kge import PartitionStore, train_partitioned_epoch
+
 class TransE(nn.Module):
     """TransE model: head + relation ≈ tail in embedding space."""
     def __init__(self, num_entities, num_relations, embedding_dim, margin=1.0):
@@ -62,6 +96,175 @@ def create_triples(facts_path, entity_vocab, relation_vocab):
                 continue
     return torch.LongTensor(triples)
 
+
+def train_fast(args, sampler):
+    """--fast: compiled int32 triples, sparse gradients, vectorised negatives, any --model."""
+    t0 = time.perf_counter()
+    cache = args.triples_cache or args.outdir / "triples"
+    triples, entity_list, relation_list = load_triples(args.facts, cache)
+    triples = torch.from_numpy(np.array(triples))  # copy out of the memory map
+    print(f"Loaded {len(triples)} triples, {len(entity_list)} entities, "
+          f"{len(relation_list)} relations in {time.perf_counter() - t0:.2f}s")
+
+    test, known = None, None
+    if args.eval_size > 0:
+        known = KnownTriples(triples.numpy(), len(entity_list), len(relation_list))
+        train_idx, test_idx = split_triples(len(triples), args.eval_size, args.seed)
+        triples, test = triples[train_idx], triples[test_idx].numpy()
+        np.save(args.outdir / "test_triples.npy", test)
+        print(f"Holding out {len(test)} triples for link prediction")
+
+    def evaluate(epoch):
+        t0 = time.perf_counter()
+        metrics = evaluate_link_prediction(model, test, known, args.eval_batch, args.eval_chunk)
+        print(f"Epoch {epoch}: MRR {metrics['mrr']:.4f}, Hits@1/3/10 {metrics['hits@1']:.3f}/"
+              f"{metrics['hits@3']:.3f}/{metrics['hits@10']:.3f} ({time.perf_counter() - t0:.2f}s)")
+        return dict(metrics, epoch=epoch)
+
+    probe_rows = None
+    if args.target_rtf:
+        if len(relation_list) < 2:
+            raise ValueError("--target_rtf needs at least two relation types")
+        rng = np.random.default_rng(args.seed)
+        probe_rows = triples[np.sort(rng.permutation(len(triples))[:args.rtf_samples])].numpy()
+
+    def rtf(epoch):
+        E = model.entity_embeddings.weight.data.numpy()
+        scores = probe_scores(np.concatenate([E[probe_rows[:, 0]], E[probe_rows[:, 2]]], axis=1),
+                              probe_rows[:, 1], seed=args.seed)
+        print(f"Epoch {epoch}: RTF accuracy {scores['rtf_accuracy']:.4f}")
+        return dict(scores, epoch=epoch)
+
+    model = make_model(args.model, len(entity_list), len(relation_list), args.embedding_dim,
+                       args.margin, args.loss)
+    optimizer = make_sparse_optimizer(model, args.optimizer, args.learning_rate)
+    history, rtf_history, trained, t_train = [], [], 0, time.perf_counter()
+    rtf_error = None
+    for epoch in range(args.epochs):
+        t0 = time.perf_counter()
+        loss = train_epoch(model, optimizer, triples, args.batch_size, args.negatives, sampler)
+        trained = epoch + 1
+        print(f"Epoch {trained}/{args.epochs}, Average Loss: {loss:.4f} "
+              f"({time.perf_counter() - t0:.2f}s)")
+        if probe_rows is not None and trained % args.rtf_every == 0:
+            try:
+                rtf_history.append(rtf(trained))
+            except ValueError as e:  # keep training (and saving) without the probe
+                print(f"RTF probe failed, training all epochs: {e}")
+                rtf_error, probe_rows = str(e), None
+            else:
+                if rtf_history[-1]["rtf_accuracy"] >= args.target_rtf:
+                    print(f"Reached target RTF {args.target_rtf} after {trained} epochs")
+                    break
+        if (test is not None and args.eval_every and trained % args.eval_every == 0
+                and trained < args.epochs):
+            history.append(evaluate(trained))
+    train_seconds = time.perf_counter() - t_train
+    if test is not None:
+        history.append(evaluate(trained))
+        out = dict(history[-1], history=history[:-1])
+        (args.outdir / "link_prediction.json").write_text(json.dumps(out, indent=2),
+                                                          encoding="utf-8")
+
+    summary = {"model": args.model, "loss": model.loss, "embedding_dim": args.embedding_dim,
+               "margin": args.margin, "epochs": trained, "train_seconds": train_seconds}
+    if args.target_rtf:
+        reached = bool(rtf_history) and rtf_history[-1]["rtf_accuracy"] >= args.target_rtf
+        summary.update(target_rtf=args.target_rtf, rtf=rtf_history, reached_target=reached)
+        if rtf_error:
+            summary["rtf_error"] = rtf_error
+    (args.outdir / MODEL_FILE).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    print(f"Saving embeddings to {args.outdir}")
+    np.save(args.outdir / "entity_embeddings.npy", model.entity_embeddings.weight.data.numpy())
+    np.save(args.outdir / "relation_embeddings.npy", model.relation_embeddings.weight.data.numpy())
+    save_vocab(args.outdir, entity_list, relation_list)
+    print("Done")
+
+
+def train_partitioned(args, sampler):
+    """--partitions: entity embeddings and triple buckets on disk, two partitions in memory."""
+    t0 = time.perf_counter()
+    cache = args.triples_cache or args.outdir / "triples"
+    triples, entity_list, relation_list = load_triples(args.facts, cache)
+    part_dir = args.partition_dir or args.outdir / "partitions"
+    store = PartitionStore.create(part_dir, triples, len(entity_list), args.partitions,
+                                  args.embedding_dim, args.seed)
+    print(f"Bucketed {len(triples)} triples over {args.partitions}x{args.partitions} "
+          f"partition pairs ({len(entity_list)} entities) in {time.perf_counter() - t0:.2f}s")
+
+    model = make_model(args.model, 1, len(relation_list), args.embedding_dim, args.margin,
+                       args.loss)
+    relation_state = torch.zeros(len(relation_list))
+    rng = np.random.default_rng(args.seed)
+    t_train = time.perf_counter()
+    for epoch in range(args.epochs):
+        t0 = time.perf_counter()
+        loss = train_partitioned_epoch(model, relation_state, store, args.learning_rate,
+                                       args.batch_size, args.negatives, rng, sampler)
+        print(f"Epoch {epoch+1}/{args.epochs}, Average Loss: {loss:.4f} "
+              f"({time.perf_counter() - t0:.2f}s)")
+    train_seconds = time.perf_counter() - t_train
+
+    print(f"Saving embeddings to {args.outdir}")
+    store.export(args.outdir / "entity_embeddings.npy")
+    np.save(args.outdir / "relation_embeddings.npy", model.relation_embeddings.weight.data.numpy())
+    save_vocab(args.outdir, entity_list, relation_list)
+    summary = {"model": args.model, "loss": model.loss, "embedding_dim": args.embedding_dim,
+               "margin": args.margin, "epochs": args.epochs, "train_seconds": train_seconds,
+               "partitions": args.partitions}
+    (args.outdir / MODEL_FILE).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    if not args.keep_partitions:
+        shutil.rmtree(part_dir, ignore_errors=True)
+    print("Done")
+
+
+def train_multiprocess(args):
+    """--hogwild: worker processes update shared-memory embeddings without locks."""
+    t0 = time.perf_counter()
+    cache = args.triples_cache or args.outdir / "triples"
+    triples, entity_list, relation_list = load_triples(args.facts, cache)
+    triples = torch.from_numpy(np.array(triples, dtype=np.int64))
+    print(f"Loaded {len(triples)} triples, {len(entity_list)} entities, "
+          f"{len(relation_list)} relations in {time.perf_counter() - t0:.2f}s")
+
+    model = make_model(args.model, len(entity_list), len(relation_list), args.embedding_dim,
+                       args.margin, args.loss)
+    ckpt_path = args.outdir / "hogwild.pt"
+    start_epoch, states = 0, {}
+    if args.resume and ckpt_path.exists():
+        state = load_checkpoint(ckpt_path)
+        if state["model_name"] != args.model:
+            raise ValueError(f"Checkpoint is a {state['model_name']} model, not {args.model}")
+        model.load_state_dict(state["model"])
+        start_epoch = state["epoch"]
+        states = {k: state[k] for k in ("entity_state", "relation_state")}
+        print(f"Resuming from epoch {start_epoch} ({ckpt_path})")
+
+    def on_epoch(epoch, loss, seconds, shared_states):
+        print(f"Epoch {epoch+1}/{args.epochs}, Average Loss: {loss:.4f} "
+              f"({seconds:.2f}s, {len(triples) / seconds:,.0f} triples/s)")
+        if (epoch + 1) % args.checkpoint_every == 0 or epoch + 1 == args.epochs:
+            save_checkpoint(ckpt_path, {"epoch": epoch + 1, "model_name": args.model,
+                                        "model": model.state_dict(), **shared_states})
+
+    t_train = time.perf_counter()
+    train_hogwild(model, triples, args.epochs, args.hogwild, args.learning_rate, args.batch_size,
+                  args.negatives, args.seed, args.threads_per_worker, start_epoch,
+                  on_epoch=on_epoch, **states)
+    train_seconds = time.perf_counter() - t_train
+
+    print(f"Saving embeddings to {args.outdir}")
+    np.save(args.outdir / "entity_embeddings.npy", model.entity_embeddings.weight.data.numpy())
+    np.save(args.outdir / "relation_embeddings.npy", model.relation_embeddings.weight.data.numpy())
+    save_vocab(args.outdir, entity_list, relation_list)
+    summary = {"model": args.model, "loss": model.loss, "embedding_dim": args.embedding_dim,
+               "margin": args.margin, "epochs": args.epochs, "train_seconds": train_seconds,
+               "hogwild_workers": args.hogwild}
+    (args.outdir / MODEL_FILE).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    print("Done")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Train TransE KGE model")
     parser.add_argument("--facts", type=Path, required=True)
@@ -72,14 +275,80 @@ def main():
     parser.add_argument("--learning_rate", type=float, default=0.001)
     parser.add_argument("--margin", type=float, default=1.0)
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefetch", type=int, default=2,
+                        help="Batches prepared ahead in a background thread (0 = inline)")
+    parser.add_argument("--threads", type=int, default=-1,
+                        help="Torch intra-op threads (-1 = all cores but one)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Compiled int32 triples, sparse gradients and vectorised negatives")
+    parser.add_argument("--negatives", type=int, default=8,
+                        help="Negatives per positive (--fast)")
+    parser.add_argument("--optimizer", choices=["sparse_adam", "adagrad"], default="sparse_adam",
+                        help="Sparse-gradient optimiser (--fast)")
+    parser.add_argument("--triples_cache", type=Path, default=None,
+                        help="Compiled triples directory (--fast; default: <outdir>/triples)")
+    parser.add_argument("--model", choices=sorted(MODELS), default="transe",
+                        help="Scoring model (models other than transe need --fast)")
+    parser.add_argument("--loss", choices=["margin", "logistic"], default=None,
+                        help="Training loss "
+                             "(--fast; default: margin for transe/rotate, logistic otherwise)")
+    parser.add_argument("--target_rtf", type=float, default=0.0,
+                        help="Stop once the RTF probe accuracy reaches this "
+                             "(--fast; 0 = train all epochs)")
+    parser.add_argument("--rtf_every", type=int, default=1, help="Epochs between RTF probes")
+    parser.add_argument("--rtf_samples", type=int, default=20000,
+                        help="Triples used by the RTF probe")
+    parser.add_argument("--partitions", type=int, default=0,
+                        help="Train out of core over P entity partitions with row-wise Adagrad "
+                             "(0 = off)")
+    parser.add_argument("--partition_dir", type=Path, default=None,
+                        help="Partition embeddings and triple buckets "
+                             "(default: <outdir>/partitions)")
+    parser.add_argument("--keep_partitions", action="store_true",
+                        help="Keep --partition_dir after exporting the embeddings")
+    parser.add_argument("--hogwild", type=int, default=0,
+                        help="Train with N lock-free worker processes over shared memory "
+                             "(-1 = all cores, 0 = off)")
+    parser.add_argument("--threads_per_worker", type=int, default=1,
+                        help="Torch threads per --hogwild worker")
+    parser.add_argument("--checkpoint_every", type=int, default=1,
+                        help="Epochs between synchronised --hogwild checkpoints "
+                             "(<outdir>/hogwild.pt)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue --hogwild training from hogwild.pt")
+    parser.add_argument("--eval_size", type=float, default=0.0,
+                        help="Share of triples held out for filtered link prediction (--fast)")
+    parser.add_argument("--eval_every", type=int, default=0,
+                        help="Also evaluate every N epochs (0 = only after training)")
+    parser.add_argument("--eval_batch", type=int, default=128, help="Test queries scored together")
+    parser.add_argument("--eval_chunk", type=int, default=32768, help="Entities scored together")
     args = parser.parse_args()
+    if args.partitions or args.hogwild:
+        if args.partitions and args.hogwild:
+            parser.error("--partitions and --hogwild are separate modes")
+        if args.eval_size or args.target_rtf:
+            parser.error("--eval_size and --target_rtf need --fast")
+    elif (args.eval_size or args.target_rtf or args.model != "transe") and not args.fast:
+        parser.error("--model needs --fast, --partitions or --hogwild; "
+                     "--eval_size and --target_rtf need --fast")
 
     # Set random seeds
     random.seed(args.seed)
     np.random.seed(args.seed)
     torch.manual_seed(args.seed)
+    set_threads(args.threads)
+    sampler = torch.Generator().manual_seed(args.seed)
 
     args.outdir.mkdir(parents=True, exist_ok=True)
+    if args.partitions:
+        train_partitioned(args, sampler)
+        return
+    if args.hogwild:
+        train_multiprocess(args)
+        return
+    if args.fast:
+        train_fast(args, sampler)
+        return
 
     print("Building vocabularies...")
     entities = set()
@@ -112,36 +381,23 @@ def main():
         model.train()
         total_loss = 0
         
-        # Create a new DataLoader in each epoch to shuffle data
-        dataloader = torch.utils.data.DataLoader(triples, batch_size=args.batch_size, shuffle=True)
+        n_batches = math.ceil(len(triples) / args.batch_size)
+        batches = Prefetcher(
+            triple_batches(triples, args.batch_size, num_entities, sampler),
+            depth=args.prefetch, length=n_batches,
+        )
         
-        pbar = tqdm(dataloader, desc=f"Epoch {epoch+1}/{args.epochs}")
-        for batch_triples in pbar:
+        pbar = tqdm(batches, desc=f"Epoch {epoch+1}/{args.epochs}")
+        for batch_triples, negative_triples in pbar:
             optimizer.zero_grad()
             
-            # Generate negative samples by corrupting either head or tail
-            negative_triples = batch_triples.clone()
-            corruption_mask = torch.rand(len(negative_triples)) < 0.5
-            
-            # Corrupt tails
-            num_corrupt_tails = corruption_mask.sum()
-            if num_corrupt_tails > 0:
-                random_tails = torch.randint(0, num_entities, (num_corrupt_tails,))
-                negative_triples[corruption_mask, 2] = random_tails
-
-            # Corrupt heads
-            num_corrupt_heads = (~corruption_mask).sum()
-            if num_corrupt_heads > 0:
-                random_heads = torch.randint(0, num_entities, (num_corrupt_heads,))
-                negative_triples[~corruption_mask, 0] = random_heads
-
             loss = model(batch_triples, negative_triples)
             loss.backward()
             optimizer.step()
             total_loss += loss.item()
             pbar.set_postfix({'loss': loss.item()})
 
-        print(f"Epoch {epoch+1}/{args.epochs}, Average Loss: {total_loss / len(dataloader):.4f}")
+        print(f"Epoch {epoch+1}/{args.epochs}, Average Loss: {total_loss / n_batches:.4f}")
 
     print("Training complete")
 
@@ -0,0 +1,88 @@
+# src/cli/update_model.py
+"""
+Online refresh of the TF-IDF + linear baseline.
+
+First run (``--init``) fits the vectoriser, label set and SGD classifier on
+the given facts and saves them to ``--model_dir``. Later runs load that
+model, featurise only filings whose doc id has not been seen, fine-tune with
+``partial_fit`` and append a drift report to ``drift.jsonl``, so a nightly
+refresh costs time proportional to the new filings.
+
+    python -m src.cli.update_model --init --facts data/processed/sec_edgar/facts.jsonl
+    python -m src.cli.update_model --facts data/processed/sec_edgar/facts_new.jsonl
+"""
+import argparse
+import json
+import pathlib
+
+from ..utils.data_utils import build_corpus_from_facts, load_taxonomy_parents
+from ..utils.online import OnlineClassifier, labelled_docs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--facts", default="data/processed/sec_edgar/facts.jsonl")
+    ap.add_argument("--taxonomy", default="datasets/sec_edgar/taxonomy/usgaap_combined.csv")
+    ap.add_argument("--model_dir", default="outputs/online_baseline")
+    ap.add_argument("--init", action="store_true",
+                    help="Fit from scratch and overwrite the saved model")
+
+    # initial fit
+    ap.add_argument("--min_df", type=int, default=2)
+    ap.add_argument("--max_features", type=int, default=20000)
+    ap.add_argument("--overflow", type=int, default=1024,
+                    help="Hash buckets for terms outside the fitted vocabulary")
+    ap.add_argument("--alpha", type=float, default=1e-4, help="sgd L2 penalty")
+    ap.add_argument("--max_iter", type=int, default=200)
+    ap.add_argument("--random_state", type=int, default=42)
+    ap.add_argument("--n_jobs", type=int, default=-1,
+                    help="TF-IDF worker processes (-1 = all cores)")
+    ap.add_argument("--clf_jobs", type=int, default=None,
+                    help="Labels fitted in parallel (-1 = all cores)")
+
+    # updates
+    ap.add_argument("--epochs", type=int, default=1, help="partial_fit passes over the new filings")
+    ap.add_argument("--batch_size", type=int, default=64)
+    ap.add_argument("--artifact", default="",
+                    help="Also export the refreshed model as a servable .npz (see serve_model)")
+    args = ap.parse_args()
+
+    child_to_parents = load_taxonomy_parents(args.taxonomy)
+    docs, texts, label_sets, _ = build_corpus_from_facts(args.facts, child_to_parents)
+    docs, texts, label_sets = labelled_docs(docs, texts, label_sets)
+    if not docs:
+        raise RuntimeError("No labelled docs inferred from taxonomy.")
+
+    model_dir = pathlib.Path(args.model_dir)
+    if args.init:
+        labels = sorted({l for ls in label_sets for l in ls})
+        model = OnlineClassifier(
+            labels, overflow=args.overflow, min_df=args.min_df, max_features=args.max_features,
+            n_jobs=args.n_jobs, clf_jobs=args.clf_jobs, alpha=args.alpha, max_iter=args.max_iter,
+            random_state=args.random_state,
+        )
+        model.fit(docs, texts, label_sets)
+        report = {"update": 0, "n_docs": len(docs), "n_labels": len(labels),
+                  "n_terms": len(model.vectoriser.vocabulary_)}
+        print(f"[online] fitted {len(docs)} docs, {len(labels)} labels")
+    else:
+        model = OnlineClassifier.load(args.model_dir)
+        model.vectoriser.n_jobs = args.n_jobs
+        model.clf.n_jobs = args.clf_jobs
+        report = model.update(docs, texts, label_sets, epochs=args.epochs,
+                              batch_size=args.batch_size)
+        print(f"[online] update {report['update']}: {report['n_docs']} new docs, "
+              f"{report['n_skipped']} already seen")
+
+    path = model.save(args.model_dir)
+    with open(model_dir / "drift.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+    print(f"[online] wrote {path}")
+    if args.artifact:
+        model.export(args.artifact)
+        print(f"[online] wrote model {args.artifact}")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# src/cli/validate_taxonomy.py
+"""
+Validate a combined taxonomy CSV: cycles, redundant (transitively implied)
+edges, orphan parents and cross-root multi-parent conflicts.
+
+Writes a compact JSON report and, optionally, the transitively reduced,
+acyclic edge list. Roots found in --anchors (default: the manual taxonomy)
+are expected top-level parents; any other root is reported as an orphan.
+"""
+import argparse
+import json
+import pathlib
+
+import pandas as pd
+
+from ..utils.taxonomy_validate import validate_taxonomy
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--taxonomy", default="datasets/sec_edgar/taxonomy/usgaap_combined.csv")
+    ap.add_argument("--anchors", default="datasets/sec_edgar/taxonomy/usgaap_min.csv",
+                    help="CSV whose concepts are accepted as top-level parents "
+                         "('' disables orphan check)")
+    ap.add_argument("--report", default="reports/tables/taxonomy_validation.json")
+    ap.add_argument("--reduced_out", default="",
+                    help="Optional CSV for the transitively reduced, acyclic taxonomy")
+    ap.add_argument("--limit", type=int, default=50,
+                    help="Max detail entries per list in the report")
+    ap.add_argument("--strict", action="store_true",
+                    help="Exit non-zero on cycles, orphans or conflicts")
+    args = ap.parse_args()
+
+    tax = pd.read_csv(args.taxonomy)
+    edges = zip(tax["child"].astype(str).str.strip(), tax["parent"].astype(str).str.strip())
+
+    anchors = None
+    if args.anchors:
+        a = pd.read_csv(args.anchors)
+        anchors = set(a["child"].astype(str).str.strip()) | set(a["parent"].astype(str).str.strip())
+
+    report = validate_taxonomy(edges, anchors)
+
+    outp = pathlib.Path(args.report)
+    outp.parent.mkdir(parents=True, exist_ok=True)
+    outp.write_text(json.dumps(report.to_dict(limit=args.limit), indent=2))
+
+    if args.reduced_out:
+        red = pathlib.Path(args.reduced_out)
+        red.parent.mkdir(parents=True, exist_ok=True)
+        report.reduced_frame().to_csv(red, index=False)
+        print(f"[validate] reduced taxonomy -> {red}")
+
+    print(f"[validate] {args.taxonomy}")
+    print(report.to_text())
+    print(f"[validate] report -> {outp}")
+
+    if args.strict and not report.ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# src/utils/batching.py
+"""
+Background batch production for CPU training loops.
+
+``Prefetcher`` runs a batch generator (shuffling, slicing, negative sampling,
+tensor conversion) in a daemon thread and keeps up to ``depth`` finished
+batches in a bounded queue, so preparing batch i+1 overlaps the optimiser
+step on batch i. NumPy and torch release the GIL in their kernels, so one
+producer thread is enough to hide data preparation behind compute.
+"""
+import os
+import queue
+import threading
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import torch
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def set_threads(n: int = -1) -> int:
+    """
+    Set torch intra-op threads explicitly.
+
+    Args:
+        n: Thread count; <= 0 uses all cores but one (left for the batch producer)
+
+    Returns:
+        Thread count in effect
+    """
+    if n <= 0:
+        n = max(1, (os.cpu_count() or 1) - 1)
+    torch.set_num_threads(n)
+    return torch.get_num_threads()
+
+
+def index_batches(n: int, batch_size: int, shuffle: bool = True, rng=None) -> Iterator[np.ndarray]:
+    """Row-index minibatches over ``range(n)``, shuffled with ``rng`` (default ``np.random``)."""
+    idx = np.arange(n)
+    if shuffle:
+        (rng if rng is not None else np.random).shuffle(idx)
+    for s in range(0, n, batch_size):
+        yield idx[s:s + batch_size]
+
+
+def triple_batches(triples, batch_size, num_entities, generator=None):
+    """
+    Shuffled positive batches, each with one corrupted negative per triple.
+
+    Half of the negatives (in expectation) replace the tail, the rest the head.
+
+    Yields:
+        (positive triples, negative triples) LongTensors of shape (B, 3)
+    """
+    perm = torch.randperm(len(triples), generator=generator)
+    for s in range(0, len(perm), batch_size):
+        pos = triples[perm[s:s + batch_size]]
+        neg = pos.clone()
+        corrupt_tail = torch.rand(len(neg), generator=generator) < 0.5
+        n_tail = int(corrupt_tail.sum())
+        neg[corrupt_tail, 2] = torch.randint(0, num_entities, (n_tail,), generator=generator)
+        neg[~corrupt_tail, 0] = torch.randint(0, num_entities, (len(neg) - n_tail,),
+                                              generator=generator)
+        yield pos, neg
+
+
+class Prefetcher:
+    """
+    Iterate ``batches`` while a background thread prepares the next ``depth``.
+
+    Exceptions raised by the producer are re-raised in the consumer. Leaving
+    the loop early (``break`` or an error) stops the producer.
+
+    Args:
+        batches: Iterable producing ready-to-use batches
+        depth: Batches prepared ahead (0 = produce inline, no thread)
+        length: Optional number of batches, reported by ``len()``
+    """
+
+    def __init__(self, batches: Iterable, depth: int = 2, length: Optional[int] = None):
+        self._batches = batches
+        self.depth = depth
+        self.length = length
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        if self.length is None:
+            raise TypeError("Prefetcher length unknown")
+        return self.length
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, q: queue.Queue) -> None:
+        try:
+            for item in self._batches:
+                if not self._put(q, item):
+                    return
+        except BaseException as e:  # surfaced in the consumer thread
+            self._put(q, _Failure(e))
+        else:
+            self._put(q, _END)
+
+    def __iter__(self):
+        if self.depth <= 0:
+            yield from self._batches
+            return
+        q: queue.Queue = queue.Queue(maxsize=self.depth)
+        self._stop.clear()
+        worker = threading.Thread(target=self._produce, args=(q,), daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = q.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield item
+        finally:
+            self._stop.set()
+            worker.join()
@@ -0,0 +1,88 @@
+# src/utils/checkpoint.py
+"""
+Early stopping and atomic training checkpoints.
+
+Checkpoints are written to a temp file in the target directory and renamed,
+so an interrupted save never leaves a truncated ``last.pt`` behind.
+"""
+import copy
+import os
+import pathlib
+import tempfile
+from typing import Dict, Optional
+
+import torch
+
+
+class EarlyStopping:
+    """
+    Track a validation score and stop after ``patience`` epochs without gain.
+
+    Args:
+        patience: Epochs without improvement before stopping (0 = never stop)
+        min_delta: Minimum change that counts as an improvement
+        mode: "max" for scores such as F1, "min" for losses
+    """
+
+    def __init__(self, patience: int = 3, min_delta: float = 0.0, mode: str = "max"):
+        if mode not in ("max", "min"):
+            raise ValueError(f"Unknown mode '{mode}'")
+        self.patience = patience
+        self.min_delta = min_delta
+        self.mode = mode
+        self.best: Optional[float] = None
+        self.best_epoch = 0
+        self.bad_epochs = 0
+        self.best_state: Optional[Dict[str, torch.Tensor]] = None
+
+    def improved(self, score: float) -> bool:
+        if self.best is None:
+            return True
+        if self.mode == "max":
+            return score > self.best + self.min_delta
+        return score < self.best - self.min_delta
+
+    def step(self, score: float, epoch: int, model: Optional[torch.nn.Module] = None) -> bool:
+        """Record an epoch's score; returns True if it is the new best."""
+        if self.improved(score):
+            self.best, self.best_epoch, self.bad_epochs = score, epoch, 0
+            if model is not None:
+                self.best_state = copy.deepcopy(model.state_dict())
+            return True
+        self.bad_epochs += 1
+        return False
+
+    @property
+    def should_stop(self) -> bool:
+        return self.patience > 0 and self.bad_epochs >= self.patience
+
+    def state_dict(self) -> dict:
+        return {
+            "best": self.best, "best_epoch": self.best_epoch,
+            "bad_epochs": self.bad_epochs, "best_state": self.best_state,
+        }
+
+    def load_state_dict(self, state: dict) -> None:
+        self.best = state["best"]
+        self.best_epoch = state["best_epoch"]
+        self.bad_epochs = state["bad_epochs"]
+        self.best_state = state["best_state"]
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """Atomically write ``state`` with ``torch.save``."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            torch.save(state, f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def load_checkpoint(path: str) -> dict:
+    # checkpoints carry NumPy RNG state, so they are not weights-only
+    return torch.load(path, map_location="cpu", weights_only=False)
@@ -0,0 +1,226 @@
+# src/utils/concept_features.py
+"""
+Vectorised doc x concept feature matrices.
+
+Facts are streamed once into two flat int32 code arrays (doc, concept); no
+per-doc Counters or Python row/col/data lists are built, so memory grows by a
+few bytes per fact instead of a Python object per fact. Counts come from
+``np.unique`` over packed (doc, concept) keys and the CSR is assembled
+directly from the sorted keys.
+Weighting (binary, count, log, tfidf, bm25) is applied to the CSR data array.
+
+Optionally, activations are spread along the taxonomy (decayed ancestors and
+descendants) with one doc x concept @ concept x concept sparse product; the
+propagation matrix is cached on disk per taxonomy content and decay settings.
+"""
+import hashlib
+import json
+import pathlib
+from array import array
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .data_utils import doc_id_from_fact, normalise_concept
+from .taxonomy_index import TaxonomyIndex
+
+WEIGHTINGS = ("binary", "count", "log", "tfidf", "bm25")
+
+
+def encode_facts(facts_path: str) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+    """
+    Stream facts.jsonl into integer (doc, concept) codes.
+
+    Docs are numbered in sorted doc-id order (as in ``build_corpus_from_facts``);
+    concepts in first-seen order over that doc order.
+
+    Returns:
+        (doc_ids, concepts, doc_codes, concept_codes), one code pair per fact
+    """
+    doc_ids, concept_ids = {}, {}
+    d_buf, c_buf = array("i"), array("i")
+    with open(facts_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            did = doc_id_from_fact(rec)
+            if not did:
+                continue
+            c = normalise_concept(rec.get("ns"), rec.get("concept"))
+            if not c:
+                continue
+            d_buf.append(doc_ids.setdefault(did, len(doc_ids)))
+            c_buf.append(concept_ids.setdefault(c, len(concept_ids)))
+
+    d = np.frombuffer(d_buf, dtype=np.int32)
+    c = np.frombuffer(c_buf, dtype=np.int32)
+    docs = sorted(doc_ids)
+    pos = {did: i for i, did in enumerate(docs)}
+    d = np.fromiter((pos[did] for did in doc_ids), dtype=np.int32, count=len(docs))[d]
+
+    # renumber concepts by first appearance in (sorted doc, file) order
+    order = np.argsort(d, kind="stable")
+    uniq, first = np.unique(c[order], return_index=True)
+    seen = np.argsort(first, kind="stable")
+    remap = np.empty(len(concept_ids), dtype=np.int32)
+    remap[uniq[seen]] = np.arange(len(uniq), dtype=np.int32)
+    names = np.asarray(list(concept_ids), dtype=object)
+    concepts = names[uniq[seen]].tolist()
+    return docs, concepts, d, remap[c]
+
+
+def count_matrix(doc_codes: np.ndarray, concept_codes: np.ndarray, n_docs: int,
+                 n_concepts: int) -> sparse.csr_matrix:
+    """Doc x concept count matrix from code arrays via ``np.unique`` on packed keys."""
+    keys = doc_codes.astype(np.int64) * n_concepts + concept_codes
+    keys, counts = np.unique(keys, return_counts=True)
+    rows = keys // n_concepts
+    indptr = np.zeros(n_docs + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_docs), out=indptr[1:])
+    return sparse.csr_matrix(
+        (counts.astype(np.float32), (keys % n_concepts).astype(np.int32), indptr),
+        shape=(n_docs, n_concepts),
+    )
+
+
+def top_vocab(X: sparse.csr_matrix, k: int) -> np.ndarray:
+    """
+    Column ids of the ``k`` highest document-frequency concepts.
+
+    Ties keep column order (first-seen order), matching ``Counter.most_common``.
+    """
+    df = np.bincount(X.indices, minlength=X.shape[1])
+    order = np.argsort(-df, kind="stable")
+    return order[:k]
+
+
+def idf_weights(df: np.ndarray, n_docs: int, scheme: str) -> np.ndarray:
+    """Per-concept IDF for ``tfidf`` (smoothed, as in scikit-learn) or ``bm25``."""
+    df = df.astype(np.float64)
+    if scheme == "bm25":
+        return np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    return np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+
+
+def apply_weighting(
+    X: sparse.csr_matrix,
+    scheme: str = "count",
+    idf: Optional[np.ndarray] = None,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> sparse.csr_matrix:
+    """
+    Reweight a count matrix through its data array (returns a float32 copy).
+
+    Args:
+        X: Doc x concept counts (CSR)
+        scheme: One of ``WEIGHTINGS``
+        idf: Precomputed IDF (tfidf/bm25); computed from ``X`` when None
+        k1, b: BM25 saturation and length-normalisation parameters
+
+    Returns:
+        The reweighted matrix (float32); tfidf rows are L2-normalised
+    """
+    if scheme not in WEIGHTINGS:
+        raise ValueError(f"Unknown weighting '{scheme}' (expected one of {WEIGHTINGS})")
+    X = X.tocsr().astype(np.float32)
+    if scheme == "count":
+        return X
+    if scheme == "binary":
+        X.data[:] = 1.0
+        return X
+    if scheme == "log":
+        # sublinear counts; propagated fractional activations (< 1) are kept as-is,
+        # so decayed ancestors stay positive and below direct concepts
+        sub = 1.0 + np.log(np.maximum(X.data, 1.0))
+        X.data = np.where(X.data >= 1.0, sub, X.data).astype(np.float32)
+        return X
+
+    if idf is None:
+        idf = idf_weights(np.bincount(X.indices, minlength=X.shape[1]), X.shape[0], scheme)
+    col_idf = idf[X.indices]
+    row_len = np.diff(X.indptr)
+    rows = np.repeat(np.arange(X.shape[0]), row_len)
+    if scheme == "tfidf":
+        data = X.data * col_idf
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=X.shape[0]))
+        X.data = (data / np.where(norms > 0, norms, 1.0)[rows]).astype(np.float32)
+        return X
+
+    # bm25
+    dl = np.asarray(X.sum(axis=1)).ravel()
+    avgdl = dl.mean() if len(dl) and dl.mean() > 0 else 1.0
+    norm = (k1 * (1.0 - b + b * dl / avgdl))[rows]
+    tf = X.data.astype(np.float64)
+    X.data = (col_idf * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+    return X
+
+
+def hierarchy_propagation(
+    tax_path: str,
+    up_decay: float = 0.5,
+    down_decay: float = 0.0,
+    max_depth: int = 0,
+    cache_dir: Optional[str] = None,
+) -> Tuple[List[str], sparse.csr_matrix]:
+    """
+    Taxonomy propagation matrix, cached per taxonomy content and settings.
+
+    Returns:
+        (taxonomy concepts, n x n matrix from ``TaxonomyIndex.propagation_matrix``)
+    """
+    cache_file = None
+    if cache_dir:
+        h = hashlib.sha256(pathlib.Path(tax_path).read_bytes())
+        h.update(json.dumps([up_decay, down_decay, max_depth]).encode("utf-8"))
+        cache_file = pathlib.Path(cache_dir) / f"propagation_{h.hexdigest()[:16]}.npz"
+        names_file = cache_file.with_suffix(".concepts.txt")
+        if cache_file.exists() and names_file.exists():
+            names = names_file.read_text(encoding="utf-8").split("\n")
+            return names, sparse.load_npz(cache_file).tocsr()
+
+    index = TaxonomyIndex.from_csv(tax_path)
+    P = index.propagation_matrix(up_decay, down_decay, max_depth)
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        sparse.save_npz(cache_file, P)
+        names_file.write_text("\n".join(index.concepts), encoding="utf-8")
+    return list(index.concepts), P
+
+
+def propagate(
+    X: sparse.csr_matrix,
+    concepts: List[str],
+    tax_concepts: List[str],
+    P: sparse.csr_matrix,
+) -> Tuple[sparse.csr_matrix, List[str]]:
+    """
+    Add hierarchy-propagated activations to a doc x concept matrix.
+
+    Taxonomy concepts never observed in facts (e.g. abstract parents) are
+    appended as new columns.
+
+    Returns:
+        (X + X[:, tax] @ P scattered back onto columns, extended concept list)
+    """
+    col_of = {c: j for j, c in enumerate(concepts)}
+    extra = [c for c in tax_concepts if c not in col_of]
+    all_concepts = list(concepts) + extra
+    for c in extra:
+        col_of[c] = len(col_of)
+    n = len(all_concepts)
+
+    tax_cols = np.fromiter((col_of[c] for c in tax_concepts), dtype=np.int64,
+                           count=len(tax_concepts))
+    # doc x taxonomy-concept slice (columns in taxonomy order)
+    X = sparse.csr_matrix((X.data, X.indices, X.indptr), shape=(X.shape[0], n))
+    D = X[:, tax_cols]
+    E = (D @ P).tocoo()
+    spread = sparse.csr_matrix(
+        (E.data.astype(np.float32), (E.row, tax_cols[E.col])), shape=(X.shape[0], n)
+    )
+    out = (X + spread).tocsr()
+    out.sort_indices()
+    return out, all_concepts
@@ -0,0 +1,339 @@
+# src/utils/concept_stats.py
+"""
+Persistent per-concept statistics built from facts.jsonl.
+
+For every observed concept (full ``ns:Name`` id) the store keeps:
+- distinct supporting CIKs: an exact set while small, a HyperLogLog sketch
+  once it passes ``EXACT_LIMIT`` (fixed ~4 KB per concept, ~1.6% error)
+- fact count, unit mix and first/last-seen period
+
+Stores are mergeable (shards, incremental runs) and can be updated from only
+the bytes appended to facts.jsonl since the last scan. Frequency rules and
+audit scripts read support counts from here instead of rescanning facts.
+"""
+import base64
+import hashlib
+import json
+import os
+import pathlib
+from collections import Counter
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+EXACT_LIMIT = 128
+HLL_P = 12
+_HLL_M = 1 << HLL_P
+_HEAD_BYTES = 1 << 16
+_TAIL_BYTES = 1 << 12
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class DistinctCounter:
+    """Distinct-count estimator: exact set that upgrades to HyperLogLog."""
+
+    __slots__ = ("items", "registers")
+
+    def __init__(self):
+        self.items: Optional[Set[str]] = set()
+        self.registers: Optional[np.ndarray] = None
+
+    def add(self, value: str):
+        if self.items is not None:
+            self.items.add(value)
+            if len(self.items) > EXACT_LIMIT:
+                self._to_sketch()
+        else:
+            self._hll_add(value)
+
+    def _hll_add(self, value: str):
+        h = _hash64(value)
+        idx = h >> (64 - HLL_P)
+        rest = h & ((1 << (64 - HLL_P)) - 1)
+        rank = (64 - HLL_P) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def _to_sketch(self):
+        self.registers = np.zeros(_HLL_M, dtype=np.uint8)
+        items, self.items = self.items, None
+        for v in items:
+            self._hll_add(v)
+
+    def merge(self, other: "DistinctCounter"):
+        if other.items is not None:
+            for v in other.items:
+                self.add(v)
+            return
+        if self.items is not None:
+            self._to_sketch()
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    @property
+    def exact(self) -> bool:
+        return self.items is not None
+
+    def count(self) -> int:
+        if self.items is not None:
+            return len(self.items)
+        m = float(_HLL_M)
+        alpha = 0.7213 / (1.0 + 1.079 / m)
+        est = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * np.log(m / zeros)
+        return int(round(est))
+
+    def to_dict(self) -> dict:
+        if self.items is not None:
+            return {"ciks": sorted(self.items)}
+        return {"hll": base64.b64encode(self.registers.tobytes()).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "DistinctCounter":
+        dc = cls()
+        if "hll" in d:
+            dc.items = None
+            dc.registers = np.frombuffer(base64.b64decode(d["hll"]), dtype=np.uint8).copy()
+        else:
+            dc.items = set(d.get("ciks", []))
+        return dc
+
+
+class ConceptStats:
+    """Running statistics for one concept."""
+
+    __slots__ = ("n_facts", "units", "first_period", "last_period", "ciks")
+
+    def __init__(self):
+        self.n_facts = 0
+        self.units: Counter = Counter()
+        self.first_period = ""
+        self.last_period = ""
+        self.ciks = DistinctCounter()
+
+    def add(self, cik: str, unit: str, period: str):
+        self.n_facts += 1
+        if unit:
+            self.units[unit] += 1
+        if period:
+            self.add_period(period)
+        if cik:
+            self.ciks.add(cik)
+
+    def merge(self, other: "ConceptStats"):
+        self.n_facts += other.n_facts
+        self.units.update(other.units)
+        for p in (other.first_period, other.last_period):
+            if p:
+                self.add_period(p)
+        self.ciks.merge(other.ciks)
+
+    def add_period(self, period: str):
+        if not self.first_period or period < self.first_period:
+            self.first_period = period
+        if period > self.last_period:
+            self.last_period = period
+
+    def to_dict(self) -> dict:
+        return {
+            "n_facts": self.n_facts,
+            "units": dict(self.units),
+            "first_period": self.first_period,
+            "last_period": self.last_period,
+            **self.ciks.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ConceptStats":
+        cs = cls()
+        cs.n_facts = int(d.get("n_facts", 0))
+        cs.units = Counter(d.get("units", {}))
+        cs.first_period = d.get("first_period", "")
+        cs.last_period = d.get("last_period", "")
+        cs.ciks = DistinctCounter.from_dict(d)
+        return cs
+
+
+def fact_keys(r: dict) -> Optional[Tuple[str, str, str]]:
+    """(full, short, cik) for one fact record, or None if it has no concept."""
+    ns = (r.get("ns") or "").strip()
+    c = (r.get("concept") or "").strip()
+    cik = str(r.get("cik") or "").strip()
+    if not c:
+        return None
+    full = f"{ns}:{c}" if ns and not c.startswith(ns + ":") else (c if ":" in c else f"us-gaap:{c}")
+    short = c if ":" not in c else c.split(":", 1)[1]
+    return full, short, cik
+
+
+def _fingerprint(path: str, offset: int) -> str:
+    """Hash of the file head and of the bytes just before ``offset``."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        h.update(f.read(min(offset, _HEAD_BYTES)))
+        start = max(0, offset - _TAIL_BYTES)
+        f.seek(start)
+        h.update(f.read(offset - start))
+    return h.hexdigest()
+
+
+class ConceptStatsStore:
+    """
+    Mergeable, incrementally updated concept statistics keyed by full concept id.
+
+    Args:
+        path: Optional JSON location used by ``load``/``save``
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = pathlib.Path(path) if path else None
+        self.concepts: Dict[str, ConceptStats] = {}
+        self.facts = {"path": "", "offset": 0, "fingerprint": ""}
+
+    def __len__(self) -> int:
+        return len(self.concepts)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def load(cls, path: str) -> "ConceptStatsStore":
+        """Load a saved store (or return an empty one bound to ``path``)."""
+        store = cls(path)
+        p = pathlib.Path(path)
+        if not p.exists():
+            return store
+        state = json.loads(p.read_text(encoding="utf-8"))
+        if state.get("version") != cls.VERSION:
+            return store
+        store.facts = state.get("facts", store.facts)
+        store.concepts = {k: ConceptStats.from_dict(v)
+                          for k, v in state.get("concepts", {}).items()}
+        return store
+
+    def save(self, path: Optional[str] = None):
+        p = pathlib.Path(path) if path else self.path
+        state = {
+            "version": self.VERSION,
+            "facts": self.facts,
+            "concepts": {k: self.concepts[k].to_dict() for k in sorted(self.concepts)},
+        }
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(p.suffix + ".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, p)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def add_fact(self, r: dict):
+        keys = fact_keys(r)
+        if keys is None:
+            return
+        full, _, cik = keys
+        cs = self.concepts.get(full)
+        if cs is None:
+            cs = self.concepts[full] = ConceptStats()
+        period = str(r.get("period_end") or r.get("fy") or "").strip()
+        cs.add(cik, str(r.get("unit") or "").strip(), period)
+
+    def scan_facts(self, facts_path: str, include_partial: bool = False) -> int:
+        """
+        Fold fact records appended since the last scan into the store.
+
+        If the file was replaced or truncated the store is rebuilt from scratch.
+        A final line without a newline may still be being written, so it is
+        left for the next scan unless ``include_partial`` (for one-off scans
+        that are not saved).
+
+        Returns:
+            Number of fact records read
+        """
+        facts_path = str(facts_path)
+        size = os.path.getsize(facts_path)
+        offset = int(self.facts.get("offset", 0))
+        same_file = (
+            self.facts.get("path") == os.path.abspath(facts_path)
+            and offset <= size
+            and self.facts.get("fingerprint") == _fingerprint(facts_path, offset)
+        )
+        if not same_file:
+            offset = 0
+            self.concepts.clear()
+
+        n = 0
+        with open(facts_path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    if include_partial and raw.strip():
+                        self.add_fact(json.loads(raw))
+                        n += 1
+                    break  # partial trailing line; offset stays before it for the next run
+                offset += len(raw)
+                if not raw.strip():
+                    continue
+                self.add_fact(json.loads(raw))
+                n += 1
+
+        self.facts = {
+            "path": os.path.abspath(facts_path),
+            "offset": offset,
+            "fingerprint": _fingerprint(facts_path, offset),
+        }
+        return n
+
+    def merge(self, other: "ConceptStatsStore"):
+        """Merge another shard's statistics into this store."""
+        for full, cs in other.concepts.items():
+            mine = self.concepts.get(full)
+            if mine is None:
+                mine = self.concepts[full] = ConceptStats()
+            mine.merge(cs)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def full_set(self) -> Set[str]:
+        return set(self.concepts)
+
+    def short_counters(self) -> Dict[str, DistinctCounter]:
+        """Distinct-CIK counters per short name (merged across namespaces)."""
+        out: Dict[str, DistinctCounter] = {}
+        for full, cs in self.concepts.items():
+            short = full.split(":", 1)[1] if ":" in full else full
+            dc = out.get(short)
+            if dc is None:
+                out[short] = dc = DistinctCounter()
+            dc.merge(cs.ciks)
+        return out
+
+    def support(self, min_cik_support: int = 1) -> Dict[str, int]:
+        """Distinct-CIK support per short name, filtered by ``min_cik_support``."""
+        counts = {s: dc.count() for s, dc in self.short_counters().items()}
+        return {s: n for s, n in counts.items() if n >= min_cik_support and n > 0}
+
+    def to_frame(self):
+        """One row per concept: support, fact count, dominant unit, period range."""
+        import pandas as pd
+
+        rows = []
+        for full in sorted(self.concepts):
+            cs = self.concepts[full]
+            rows.append({
+                "concept": full,
+                "cik_support": cs.ciks.count(),
+                "cik_support_exact": cs.ciks.exact,
+                "n_facts": cs.n_facts,
+                "top_unit": cs.units.most_common(1)[0][0] if cs.units else "",
+                "n_units": len(cs.units),
+                "first_period": cs.first_period,
+                "last_period": cs.last_period,
+            })
+        return pd.DataFrame(rows)
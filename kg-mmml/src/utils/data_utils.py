@@ -25,6 +25,11 @@ def normalise_concept(ns: Optional[str], concept: Optional[str]) -> Optional[str
     return c if ":" in c else f"us-gaap:{c}"
 
 
+def concept_token(concept: str) -> str:
+    """Text token for a normalised concept ID (lowercased base name)."""
+    return concept.split(":", 1)[1].lower() if ":" in concept else concept.lower()
+
+
 def doc_id_from_fact(rec: dict) -> Optional[str]:
     """
     Extract standardised document ID from fact record.
@@ -46,14 +51,15 @@ def doc_id_from_fact(rec: dict) -> Optional[str]:
 
 def build_corpus_from_facts(
     facts_path: str,
-    child_to_parents: Optional[Dict[str, Set[str]]] = None
+    child_to_parents=None
 ) -> Tuple[List[str], List[str], List[List[str]], List[List[str]]]:
     """
     Build document corpus from facts.jsonl file.
     
     Args:
         facts_path: Path to facts.jsonl file
-        child_to_parents: Optional taxonomy mapping for label extraction
+        child_to_parents: Optional taxonomy for label extraction, either a
+            child -> parents dict or a TaxonomyIndex
     
     Returns:
         Tuple of (doc_ids, texts, labels, concept_lists)
@@ -63,7 +69,6 @@ def build_corpus_from_facts(
         - concept_lists: List of full concept IDs per document
     """
     doc_tokens = defaultdict(list)
-    doc_labels = defaultdict(set) if child_to_parents else None
     doc_concepts = defaultdict(list)
     
     with open(facts_path, "r", encoding="utf-8") as f:
@@ -80,20 +85,20 @@ def build_corpus_from_facts(
                 continue
             
             # Token for text features (lowercased base name)
-            token = c.split(":", 1)[1].lower() if ":" in c else c.lower()
-            doc_tokens[did].append(token)
+            doc_tokens[did].append(concept_token(c))
             doc_concepts[did].append(c)
-            
-            # Extract labels if taxonomy provided
-            if child_to_parents:
-                for p in child_to_parents.get(c, []):
-                    doc_labels[did].add(p)
     
     docs = sorted(doc_tokens.keys())
     texts = [" ".join(doc_tokens[d]) for d in docs]
-    labels = [sorted(doc_labels[d]) if doc_labels else [] for d in docs]
     concepts = [doc_concepts[d] for d in docs]
     
+    # Labels for the whole corpus in one sparse product (doc-concept @ child-parent)
+    if child_to_parents:
+        from .taxonomy_index import as_taxonomy_index
+        labels = as_taxonomy_index(child_to_parents).labels(concepts)
+    else:
+        labels = [[] for _ in docs]
+    
     return docs, texts, labels, concepts
 
 
@@ -0,0 +1,155 @@
+# src/utils/experiments.py
+"""
+In-process experiment scheduler with shared featurisation.
+
+The parent builds the corpus and feature matrices once and publishes them
+in POSIX shared memory (``SharedArrays``): dense arrays as one block each,
+CSR matrices as their data/indices/indptr blocks. Worker processes attach
+to those blocks once at start-up and rebuild zero-copy views, so each job
+only pays for its own model fit.
+
+Jobs (e.g. seed x mode x config) run in a process pool whose workers are
+capped in BLAS/OpenMP threads and, optionally, address space. Results are
+handed to an ``on_result`` callback as each job finishes, so summaries can
+be streamed to disk while slower jobs are still running.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+_SHARED: Dict[str, object] = {}
+_HANDLES: List[shared_memory.SharedMemory] = []
+
+
+class SharedArrays:
+    """
+    Owner of shared-memory copies of named arrays and CSR matrices.
+
+    Use as a context manager; blocks are unlinked on exit.
+    """
+
+    def __init__(self):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.spec: Dict[str, dict] = {}
+
+    def _block(self, arr: np.ndarray) -> Tuple[str, Tuple[int, ...], str]:
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        self._blocks.append(shm)
+        return shm.name, arr.shape, arr.dtype.str
+
+    def publish(self, name: str, value) -> None:
+        """Copy a dense array or sparse matrix into shared memory under ``name``."""
+        if sparse.issparse(value):
+            X = sparse.csr_matrix(value)
+            self.spec[name] = {
+                "kind": "csr", "shape": X.shape,
+                "parts": {p: self._block(getattr(X, p)) for p in ("data", "indices", "indptr")},
+            }
+        else:
+            self.spec[name] = {"kind": "dense", "parts": {"array": self._block(np.asarray(value))}}
+
+    def close(self) -> None:
+        for shm in self._blocks:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks.clear()
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach(spec: Dict[str, dict]) -> Dict[str, object]:
+    """Zero-copy views of published arrays (handles stay open for the process lifetime)."""
+    out = {}
+    for name, item in spec.items():
+        views = {}
+        for part, (shm_name, shape, dtype) in item["parts"].items():
+            shm = shared_memory.SharedMemory(name=shm_name)
+            _HANDLES.append(shm)
+            views[part] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        if item["kind"] == "csr":
+            out[name] = sparse.csr_matrix(
+                (views["data"], views["indices"], views["indptr"]), shape=item["shape"], copy=False
+            )
+        else:
+            out[name] = views["array"]
+    return out
+
+
+def _init_worker(spec: Dict[str, dict], threads: int, memory_mb: int) -> None:
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+    if memory_mb > 0:
+        import resource
+
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _SHARED.clear()
+    _SHARED.update(attach(spec))
+
+
+def _run(fn: Callable, job: dict):
+    return fn(_SHARED, **job)
+
+
+def run_jobs(
+    fn: Callable,
+    jobs: Iterable[dict],
+    shared: SharedArrays,
+    max_workers: int = 0,
+    threads_per_job: int = 1,
+    memory_mb: int = 0,
+    on_result: Optional[Callable[[dict, object], None]] = None,
+) -> List[Tuple[dict, object]]:
+    """
+    Run ``fn(arrays, **job)`` for every job in a process pool.
+
+    Args:
+        fn: Top-level (picklable) job function; ``arrays`` maps published names
+            to attached arrays/matrices
+        jobs: Keyword-argument dicts, one per job
+        shared: Published inputs
+        max_workers: Pool size (0 = min(#jobs, cores // threads_per_job))
+        threads_per_job: BLAS/OpenMP threads per worker
+        memory_mb: Per-worker address-space limit in MiB (0 = unlimited)
+        on_result: Called as ``on_result(job, result)`` when each job finishes
+
+    Returns:
+        (job, result) pairs in submission order
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    if max_workers <= 0:
+        max_workers = max(1, (os.cpu_count() or 1) // max(1, threads_per_job))
+    max_workers = min(max_workers, len(jobs))
+
+    results: List[object] = [None] * len(jobs)
+    with ProcessPoolExecutor(
+        max_workers, initializer=_init_worker, initargs=(shared.spec, threads_per_job, memory_mb)
+    ) as pool:
+        futures = {pool.submit(_run, fn, job): i for i, job in enumerate(jobs)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            results[i] = fut.result()
+            if on_result is not None:
+                on_result(jobs[i], results[i])
+    return list(zip(jobs, results))
@@ -0,0 +1,154 @@
+# src/utils/feature_join.py
+"""
+Align concept-feature rows to a target doc order and join them with text features.
+
+The concept matrix (concept_features_filing.npz + index CSV, or a memory-mapped
+feature-store entry) is loaded once per file version. Alignment is a single
+vectorised gather on the CSR arrays: doc ids are mapped to source rows with a
+hash-index lookup, and the aligned matrix's indptr/indices/data are built
+directly. Docs missing from the index become zero rows. Aligned matrices
+can optionally be cached on disk per (features, doc order) key.
+"""
+import hashlib
+import os
+import pathlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .feature_store import META_FILE, FeatureEntry, is_entry
+
+_FEATURE_CACHE: Dict[Tuple, Tuple[sparse.csr_matrix, pd.Index]] = {}
+
+
+def _stat_key(path: str) -> Tuple[str, float, int]:
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime, st.st_size
+
+
+def load_concept_features(npz_path: str, index_csv: str) -> Tuple[sparse.csr_matrix, pd.Index]:
+    """
+    Load a concept matrix and its doc index; reused while both files are unchanged.
+
+    ``npz_path`` may also be a feature-store entry directory, in which case the
+    matrix is memory-mapped and ``index_csv`` is ignored.
+
+    Returns:
+        (CSR matrix, doc-id Index); for duplicate doc ids the last row wins
+    """
+    if is_entry(npz_path):
+        key = (_stat_key(os.path.join(npz_path, META_FILE)),)
+        if key not in _FEATURE_CACHE:
+            entry = FeatureEntry(npz_path)
+            _FEATURE_CACHE[key] = (entry.matrix, entry.doc_ids)
+        return _FEATURE_CACHE[key]
+
+    key = (_stat_key(npz_path), _stat_key(index_csv))
+    if key not in _FEATURE_CACHE:
+        Xc = sparse.load_npz(npz_path).tocsr()
+        doc_ids = pd.read_csv(index_csv)["doc_id"].astype(str)
+        _FEATURE_CACHE[key] = (Xc, pd.Index(doc_ids))
+    return _FEATURE_CACHE[key]
+
+
+def concept_feature_names(npz_path: str, n_cols: int) -> List[str]:
+    """Concept column names from the vocab next to ``npz_path`` (positional if absent)."""
+    if is_entry(npz_path):
+        vocab = FeatureEntry(npz_path).vocab
+    else:
+        p = pathlib.Path(npz_path).with_name("concept_features_vocab.csv")
+        vocab = pd.read_csv(p) if p.exists() else pd.DataFrame({"concept": []})
+    names = vocab["concept"].astype(str).tolist() if "concept" in vocab else []
+    return names if len(names) == n_cols else [str(i) for i in range(n_cols)]
+
+
+def gather_rows(X: sparse.csr_matrix, rows: np.ndarray) -> sparse.csr_matrix:
+    """
+    Select CSR rows by index in one gather; ``-1`` yields an all-zero row.
+
+    Args:
+        X: Source CSR matrix
+        rows: Source row per output row (int array, -1 for missing)
+
+    Returns:
+        CSR matrix of shape (len(rows), X.shape[1]) with X's dtype
+    """
+    X = sparse.csr_matrix(X)
+    rows = np.asarray(rows, dtype=np.int64)
+    valid = rows >= 0
+    src = np.where(valid, rows, 0)
+    lengths = np.where(valid, np.diff(X.indptr)[src], 0)
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    # position of every output nonzero in X.indices / X.data
+    offsets = np.repeat(X.indptr[src] - indptr[:-1], lengths)
+    take = np.arange(indptr[-1], dtype=np.int64) + offsets
+    return sparse.csr_matrix(
+        (X.data[take], X.indices[take], indptr), shape=(len(rows), X.shape[1])
+    )
+
+
+def align_rows(Xc: sparse.csr_matrix, feature_docs: Sequence[str],
+               docs: Sequence[str]) -> sparse.csr_matrix:
+    """Reorder ``Xc`` (rows labelled by ``feature_docs``) to follow ``docs``."""
+    index = feature_docs if isinstance(feature_docs, pd.Index) else pd.Index(feature_docs)
+    if not index.is_unique:
+        last = ~index.duplicated(keep="last")
+        Xc = gather_rows(Xc, np.flatnonzero(last))
+        index = index[last]
+    return gather_rows(Xc, index.get_indexer(pd.Index(docs)))
+
+
+def aligned_concept_features(
+    npz_path: str,
+    index_csv: str,
+    docs: Sequence[str],
+    cache_dir: Optional[str] = None,
+) -> sparse.csr_matrix:
+    """
+    Concept features aligned to ``docs`` (zero rows for unknown docs).
+
+    Args:
+        npz_path: concept_features_filing.npz or a feature-store entry directory
+        index_csv: concept_features_index.csv (``doc_id`` column)
+        docs: Target doc order (e.g. TF-IDF rows)
+        cache_dir: Optional directory for aligned-matrix .npz caches
+
+    Returns:
+        CSR matrix with one row per entry of ``docs``
+    """
+    cache_file = None
+    if cache_dir:
+        if is_entry(npz_path):
+            sources = [os.path.join(npz_path, META_FILE)]
+        else:
+            sources = [npz_path, index_csv]
+        h = hashlib.sha1()
+        for part in (p for path in sources for p in _stat_key(path)):
+            h.update(str(part).encode("utf-8") + b"\0")
+        h.update("\n".join(docs).encode("utf-8"))
+        cache_file = pathlib.Path(cache_dir) / f"concept_aligned_{h.hexdigest()[:16]}.npz"
+        if cache_file.exists():
+            return sparse.load_npz(cache_file).tocsr()
+
+    Xc, feature_docs = load_concept_features(npz_path, index_csv)
+    aligned = align_rows(Xc, feature_docs, docs)
+
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        sparse.save_npz(cache_file, aligned)
+    return aligned
+
+
+def join_features(
+    X_text: sparse.spmatrix,
+    docs: Sequence[str],
+    npz_path: str,
+    index_csv: str,
+    cache_dir: Optional[str] = None,
+) -> sparse.csr_matrix:
+    """Horizontally join text features with concept features aligned to ``docs``."""
+    Xc = aligned_concept_features(npz_path, index_csv, docs, cache_dir)
+    return sparse.hstack([X_text, Xc], format="csr")
@@ -0,0 +1,189 @@
+# src/utils/feature_store.py
+"""
+Versioned, memory-mapped store for sparse feature matrices.
+
+Each entry is a directory holding the CSR arrays as uncompressed ``.npy``
+files (``indptr``, ``indices``, ``data``) plus the doc index, vocabulary and
+a ``meta.json``. Readers open the arrays with ``mmap_mode="r"``, so loading
+is O(1), only touched pages are read, and concurrent processes share the OS
+page cache instead of each decompressing its own copy of an ``.npz``.
+
+Entries are keyed by a hash of the source facts and the feature parameters,
+and are written to a temp directory then renamed, so readers never see a
+partially written entry.
+"""
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+INDEX_FILE = "concept_features_index.csv"
+VOCAB_FILE = "concept_features_vocab.csv"
+META_FILE = "meta.json"
+
+_HASH_CACHE: Dict[Tuple[str, float, int], str] = {}
+
+
+def file_hash(path: str, chunk: int = 1 << 20) -> str:
+    """Content sha256 of a file (memoised while the file is unchanged)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime, st.st_size)
+    if key not in _HASH_CACHE:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(chunk), b""):
+                h.update(block)
+        _HASH_CACHE[key] = h.hexdigest()
+    return _HASH_CACHE[key]
+
+
+def entry_key(source_hash: str, params: dict) -> str:
+    """Store key for features built from ``source_hash`` with ``params``."""
+    h = hashlib.sha256(source_hash.encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:20]
+
+
+def is_entry(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+class FeatureEntry:
+    """
+    Read-only view of one stored matrix.
+
+    Args:
+        path: Entry directory
+    """
+
+    def __init__(self, path: str):
+        self.path = pathlib.Path(path)
+        self.meta = json.loads((self.path / META_FILE).read_text(encoding="utf-8"))
+        self._matrix: Optional[sparse.csr_matrix] = None
+        self._docs: Optional[pd.Index] = None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return tuple(self.meta["shape"])
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """CSR matrix backed by memory-mapped arrays (no copy, no decompression)."""
+        if self._matrix is None:
+            data, indices, indptr = (
+                np.load(self.path / f"{name}.npy", mmap_mode="r")
+                for name in ("data", "indices", "indptr")
+            )
+            X = sparse.csr_matrix((data, indices, indptr), shape=self.shape, copy=False)
+            X.has_sorted_indices = True
+            self._matrix = X
+        return self._matrix
+
+    @property
+    def doc_ids(self) -> pd.Index:
+        if self._docs is None:
+            self._docs = pd.Index(pd.read_csv(self.path / INDEX_FILE)["doc_id"].astype(str))
+        return self._docs
+
+    @property
+    def vocab(self) -> pd.DataFrame:
+        p = self.path / VOCAB_FILE
+        return pd.read_csv(p) if p.exists() else pd.DataFrame({"concept": []})
+
+    def export(self, outdir: str, prefix: str = "concept_features") -> pathlib.Path:
+        """
+        Write the entry as ``{prefix}_filing.npz`` / ``_index.csv`` / ``_vocab.csv``.
+
+        Returns:
+            Path of the written ``.npz``
+        """
+        out = pathlib.Path(outdir)
+        out.mkdir(parents=True, exist_ok=True)
+        npz_path = out / f"{prefix}_filing.npz"
+        sparse.save_npz(npz_path, sparse.csr_matrix(self.matrix, copy=True))
+        pd.DataFrame({"doc_id": self.doc_ids}).to_csv(out / f"{prefix}_index.csv", index=False)
+        if (self.path / VOCAB_FILE).exists():
+            self.vocab.to_csv(out / f"{prefix}_vocab.csv", index=False)
+        return npz_path
+
+    def rows(self, docs: Sequence[str]) -> sparse.csr_matrix:
+        """Rows for ``docs`` in the given order (zero rows for unknown ids)."""
+        from .feature_join import align_rows
+
+        return align_rows(self.matrix, self.doc_ids, docs)
+
+
+class FeatureStore:
+    """
+    Directory of feature entries keyed by source hash and parameters.
+
+    Args:
+        root: Store directory (created on first write)
+    """
+
+    def __init__(self, root: str):
+        self.root = pathlib.Path(root)
+
+    def path(self, key: str) -> pathlib.Path:
+        return self.root / key
+
+    def __contains__(self, key: str) -> bool:
+        return is_entry(str(self.path(key)))
+
+    def get(self, key: str) -> FeatureEntry:
+        if key not in self:
+            raise KeyError(f"No feature entry '{key}' in {self.root}")
+        return FeatureEntry(str(self.path(key)))
+
+    def put(
+        self,
+        key: str,
+        X: sparse.spmatrix,
+        doc_ids: Sequence[str],
+        vocab: Optional[pd.DataFrame] = None,
+        meta: Optional[dict] = None,
+    ) -> FeatureEntry:
+        """Write an entry atomically; an existing entry with the same key is kept."""
+        if key in self:
+            return self.get(key)
+        X = sparse.csr_matrix(X)
+        X.sort_indices()
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = pathlib.Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.root))
+        try:
+            np.save(tmp / "data.npy", X.data)
+            np.save(tmp / "indices.npy", X.indices)
+            np.save(tmp / "indptr.npy", X.indptr)
+            pd.DataFrame({"doc_id": list(doc_ids)}).to_csv(tmp / INDEX_FILE, index=False)
+            if vocab is not None:
+                vocab.to_csv(tmp / VOCAB_FILE, index=False)
+            info = dict(meta or {}, key=key, shape=list(X.shape), nnz=int(X.nnz),
+                        dtype=str(X.dtype))
+            (tmp / META_FILE).write_text(json.dumps(info, indent=2), encoding="utf-8")
+            try:
+                os.replace(tmp, self.path(key))
+            except OSError:
+                # another writer won the race; theirs is identical by construction
+                if key not in self:
+                    raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+        return self.get(key)
+
+    def import_npz(self, npz_path: str, index_csv: str, vocab_csv: str = "") -> FeatureEntry:
+        """Add an existing ``.npz`` + index CSV, keyed by their content hashes."""
+        key = entry_key(file_hash(npz_path) + file_hash(index_csv), {"source": "npz"})
+        if key in self:
+            return self.get(key)
+        vocab = pd.read_csv(vocab_csv) if vocab_csv and os.path.exists(vocab_csv) else None
+        doc_ids = pd.read_csv(index_csv)["doc_id"].astype(str).tolist()
+        return self.put(key, sparse.load_npz(npz_path), doc_ids, vocab,
+                        meta={"source": os.path.abspath(npz_path)})
@@ -0,0 +1,176 @@
+# src/utils/hogwild_kge.py
+"""
+Lock-free multi-process (Hogwild) KGE training.
+
+The entity and relation tables, their row-wise Adagrad state and the
+triples live in shared memory. Each of W worker processes trains on its own
+shard of the triples every epoch, draws its own negatives and applies
+sparse row updates to the shared tables without locks: concurrent updates
+to the same row may interleave, which sparse KG batches rarely do and SGD
+tolerates.
+
+Workers stay up for the whole run. A barrier at the end of every epoch lets
+the parent log the loss and write a synchronised checkpoint while no
+worker is updating. Shards are a permutation seeded by (seed, epoch) split
+round-robin by rank, and each worker's generator is seeded by (seed,
+epoch, rank), so sampling is reproducible and a resumed run sees the same
+shards; only the interleaving of updates across workers is not.
+"""
+import os
+import queue
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from .batching import set_threads
+from .kge import KGEModel, corrupt, rowwise_adagrad
+
+# on_epoch(epoch, loss, seconds, states)
+EpochCallback = Callable[[int, float, float, Dict], None]
+
+
+def shard_indices(n: int, num_workers: int, rank: int, seed: int, epoch: int) -> torch.Tensor:
+    """Triples of worker ``rank`` in ``epoch`` (disjoint across ranks, covering all ``n``)."""
+    perm = np.random.default_rng([seed, epoch]).permutation(n)
+    return torch.from_numpy(perm[rank::num_workers])
+
+
+def worker_generator(seed: int, epoch: int, rank: int) -> torch.Generator:
+    state = np.random.SeedSequence([seed, epoch, rank]).generate_state(1)[0]
+    return torch.Generator().manual_seed(int(state))
+
+
+def train_shard(model: KGEModel, entity_state: torch.Tensor, relation_state: torch.Tensor,
+                triples: torch.Tensor, shard: torch.Tensor, lr: float, batch_size: int,
+                negatives: int, generator=None) -> float:
+    """One lock-free row-wise Adagrad pass over ``shard``; returns the mean batch loss."""
+    num_entities = model.entity_embeddings.num_embeddings
+    total, n_batches = 0.0, 0
+    for s in range(0, len(shard), batch_size):
+        pos = triples[shard[s:s + batch_size]]
+        neg, corrupt_tail = corrupt(pos, negatives, num_entities, generator)
+        loss = model(pos, neg, corrupt_tail)
+        loss.backward()
+        rowwise_adagrad(model.entity_embeddings.weight, entity_state, lr)
+        rowwise_adagrad(model.relation_embeddings.weight, relation_state, lr)
+        total += loss.item()
+        n_batches += 1
+    return total / max(1, n_batches)
+
+
+def _worker(rank: int, num_workers: int, model: KGEModel, entity_state: torch.Tensor,
+            relation_state: torch.Tensor, triples: torch.Tensor, config: dict,
+            start_epoch: int, epochs: int, barrier, results) -> None:
+    set_threads(config["threads"])
+    model.train()
+    try:
+        results.put((-1, rank, 0.0, 0))
+        barrier.wait()  # all workers up
+        for epoch in range(start_epoch, epochs):
+            shard = shard_indices(len(triples), num_workers, rank, config["seed"], epoch)
+            loss = train_shard(model, entity_state, relation_state, triples, shard, config["lr"],
+                               config["batch_size"], config["negatives"],
+                               worker_generator(config["seed"], epoch, rank))
+            results.put((epoch, rank, loss, len(shard)))
+            barrier.wait()  # epoch done everywhere: parent checkpoints
+            barrier.wait()  # parent done
+    except Exception as e:  # surfaced by the parent
+        results.put((None, rank, repr(e), 0))
+        barrier.abort()
+
+
+def _collect(results, procs, n: int) -> list:
+    """``n`` worker messages, failing if a worker reports an error or dies."""
+    got = []
+    while len(got) < n:
+        try:
+            item = results.get(timeout=1.0)
+        except queue.Empty:
+            if any(not p.is_alive() for p in procs):
+                raise RuntimeError("Hogwild worker exited unexpectedly")
+            continue
+        if item[0] is None:
+            raise RuntimeError(f"Hogwild worker {item[1]} failed: {item[2]}")
+        got.append(item)
+    return got
+
+
+def train_hogwild(model: KGEModel, triples: torch.Tensor, epochs: int, num_workers: int,
+                  lr: float, batch_size: int, negatives: int, seed: int = 42,
+                  threads_per_worker: int = 1, start_epoch: int = 0,
+                  entity_state: Optional[torch.Tensor] = None,
+                  relation_state: Optional[torch.Tensor] = None,
+                  on_epoch: Optional[EpochCallback] = None) -> List[float]:
+    """
+    Train ``model`` with ``num_workers`` Hogwild processes.
+
+    Args:
+        model: Scoring model; its tables are moved to shared memory
+        triples: (n, 3) int64 training triples
+        epochs: Last epoch (exclusive) to train
+        num_workers: Worker processes (0 = all cores // threads_per_worker)
+        lr: Row-wise Adagrad learning rate
+        batch_size, negatives: Per worker, as in ``kge.train_epoch``
+        seed: Shard and sampling seed
+        threads_per_worker: Torch intra-op threads per worker
+        start_epoch: First epoch (when resuming)
+        entity_state, relation_state: Adagrad state to resume from (zeros if None)
+        on_epoch: Called in the parent as ``on_epoch(epoch, loss, seconds,
+            states)`` after every epoch, while workers wait; ``states`` holds
+            the shared ``entity_state``/``relation_state`` for checkpointing
+
+    Returns:
+        Mean loss per trained epoch
+    """
+    if num_workers <= 0:
+        num_workers = max(1, (os.cpu_count() or 1) // max(1, threads_per_worker))
+    states = {
+        "entity_state": torch.zeros(model.entity_embeddings.num_embeddings)
+        if entity_state is None else entity_state.clone(),
+        "relation_state": torch.zeros(model.relation_embeddings.num_embeddings)
+        if relation_state is None else relation_state.clone(),
+    }
+    model.share_memory()
+    for t in states.values():
+        t.share_memory_()
+    triples = triples.to(torch.int64).share_memory_()
+    config = {"seed": seed, "lr": lr, "batch_size": batch_size, "negatives": negatives,
+              "threads": threads_per_worker}
+
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(num_workers + 1), ctx.Queue()
+    procs = [ctx.Process(target=_worker, daemon=True,
+                         args=(rank, num_workers, model, states["entity_state"],
+                               states["relation_state"], triples, config, start_epoch, epochs,
+                               barrier, results))
+             for rank in range(num_workers)]
+    for p in procs:
+        p.start()
+
+    losses = []
+    try:
+        _collect(results, procs, num_workers)
+        barrier.wait()
+        for epoch in range(start_epoch, epochs):
+            t0 = time.perf_counter()
+            got = _collect(results, procs, num_workers)
+            barrier.wait()
+            seconds = time.perf_counter() - t0
+            # weight each worker's mean batch loss by its shard size
+            loss = sum(l * n for _, _, l, n in got) / max(1, sum(n for _, _, _, n in got))
+            losses.append(loss)
+            if on_epoch is not None:
+                on_epoch(epoch, loss, seconds, states)
+            barrier.wait()
+    except BaseException:
+        barrier.abort()
+        for p in procs:
+            p.terminate()
+        raise
+    finally:
+        for p in procs:
+            p.join()
+    return losses
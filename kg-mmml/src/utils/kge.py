@@ -0,0 +1,378 @@
+# src/utils/kge.py
+"""
+Compact triple storage and a fast KGE training loop.
+
+KG edges (``kg_edges.csv`` with src_id/edge_type/dst_id, or KGE facts JSONL
+with head_id/relation/tail_id) are read once with pandas, integer-coded
+against sorted entity and relation vocabularies (the same order
+``train_kge`` has always used) and cached as an int32 ``triples.npy`` next
+to the vocab CSVs. Later runs memory-map the array instead of parsing text.
+
+Scoring models (``FastTransE``, ``DistMult``, ``ComplEx``, ``RotatE``; see
+``KGEModel``) keep both embedding tables with sparse gradients, so an
+optimiser step (``SparseAdam``/``Adagrad``) only touches the rows in the
+batch. ``corrupt`` draws ``k`` negatives per positive in one call (head or
+tail, per positive), and the model scores a positive and its negatives from
+one shared lookup of h, r and t.
+"""
+import json
+import pathlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+
+TRIPLES_FILE = "triples.npy"
+ENTITY_VOCAB = "entity_vocab.csv"
+RELATION_VOCAB = "relation_vocab.csv"
+META_FILE = "triples_meta.json"
+MODEL_FILE = "kge_model.json"
+
+# (head, relation, tail) column names per input format
+COLUMNS = {
+    ".csv": ("src_id", "edge_type", "dst_id"),
+    ".jsonl": ("head_id", "relation", "tail_id"),
+}
+
+
+def read_edges(path: str) -> Tuple[np.ndarray, List[str], List[str]]:
+    """
+    Integer-code a KG edge file in one pass.
+
+    Returns:
+        (int32 triples (n, 3), sorted entity ids, sorted relation ids)
+    """
+    path = pathlib.Path(path)
+    suffix = ".jsonl" if path.suffix in (".jsonl", ".json") else path.suffix
+    if suffix not in COLUMNS:
+        raise ValueError(f"Unsupported edge file '{path}' (expected .csv or .jsonl)")
+    h, r, t = COLUMNS[suffix]
+    if suffix == ".csv":
+        df = pd.read_csv(path, usecols=[h, r, t], dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_json(path, lines=True, dtype=False)[[h, r, t]].astype(str)
+    heads, rels, tails = (df[c].to_numpy(dtype=str) for c in (h, r, t))
+    entities = np.unique(np.concatenate([heads, tails]))
+    relations = np.unique(rels)
+    triples = np.stack([
+        np.searchsorted(entities, heads),
+        np.searchsorted(relations, rels),
+        np.searchsorted(entities, tails),
+    ], axis=1).astype(np.int32)
+    return triples, entities.tolist(), relations.tolist()
+
+
+def _source_meta(path: pathlib.Path) -> dict:
+    st = path.stat()
+    return {"source": str(path.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def save_vocab(outdir: str, entities: List[str], relations: List[str]) -> None:
+    """Entity/relation vocab CSVs in the layout ``compute_rtf`` reads."""
+    out = pathlib.Path(outdir)
+    pd.DataFrame(entities, columns=["entity_id"]).to_csv(out / ENTITY_VOCAB,
+                                                         index_label="entity_idx")
+    pd.DataFrame(relations, columns=["relation_id"]).to_csv(out / RELATION_VOCAB,
+                                                            index_label="relation_idx")
+
+
+def load_triples(source: str,
+                 cache_dir: Optional[str] = None) -> Tuple[np.ndarray, List[str], List[str]]:
+    """
+    Triples for ``source`` via the binary cache.
+
+    Args:
+        source: Edge file (.csv / .jsonl), or a directory holding ``triples.npy``
+        cache_dir: Where the compiled triples live (rebuilt when the source
+            file's size or mtime changes); None parses without caching
+
+    Returns:
+        (int32 triples (n, 3), entity ids, relation ids)
+    """
+    src = pathlib.Path(source)
+    cache = src if src.is_dir() else (pathlib.Path(cache_dir) if cache_dir else None)
+    if cache is not None and (cache / TRIPLES_FILE).exists():
+        meta_path = cache / META_FILE
+        fresh = src.is_dir() or (
+            meta_path.exists()
+            and json.loads(meta_path.read_text(encoding="utf-8")) == _source_meta(src)
+        )
+        if fresh:
+            read = dict(dtype=str, keep_default_na=False)
+            entities = pd.read_csv(cache / ENTITY_VOCAB, **read)["entity_id"].tolist()
+            relations = pd.read_csv(cache / RELATION_VOCAB, **read)["relation_id"].tolist()
+            return np.load(cache / TRIPLES_FILE, mmap_mode="r"), entities, relations
+    if src.is_dir():
+        raise FileNotFoundError(f"No {TRIPLES_FILE} in {src}")
+
+    triples, entities, relations = read_edges(src)
+    if cache is not None:
+        cache.mkdir(parents=True, exist_ok=True)
+        np.save(cache / TRIPLES_FILE, triples)
+        save_vocab(cache, entities, relations)
+        (cache / META_FILE).write_text(json.dumps(_source_meta(src)), encoding="utf-8")
+    return triples, entities, relations
+
+
+def corrupt(pos: torch.Tensor, k: int, num_entities: int,
+            generator=None) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    ``k`` random replacement entities per positive, all drawn at once.
+
+    Returns:
+        (negative entity ids (B, k), corrupt_tail (B,) bool: replace the tail
+        if True, else the head)
+    """
+    neg = torch.randint(0, num_entities, (len(pos), k), generator=generator)
+    corrupt_tail = torch.rand(len(pos), generator=generator) < 0.5
+    return neg, corrupt_tail
+
+
+class KGEModel(nn.Module):
+    """
+    Base for scoring models with sparse embeddings and fused negatives.
+
+    A model defines a higher-is-better score through a query and a match:
+    ``score(h, r, t) = match(tail_query(h, r), t) = match(head_query(r, t), h)``.
+    Training, corrupted-triple scoring and link-prediction ranking only go
+    through these, so one positive and its negatives (head or tail side)
+    share a single lookup of h, r and t.
+
+    Args:
+        num_entities, num_relations: Vocabulary sizes
+        embedding_dim: Entity embedding width (real and imaginary halves
+            for complex models)
+        margin: Ranking margin
+        loss: "margin" (pairwise hinge) or "logistic"; None = model default
+    """
+
+    default_loss = "margin"
+
+    def __init__(self, num_entities: int, num_relations: int, embedding_dim: int,
+                 margin: float = 1.0, loss: Optional[str] = None):
+        super().__init__()
+        self.entity_embeddings = nn.Embedding(num_entities, embedding_dim, sparse=True)
+        self.relation_embeddings = nn.Embedding(num_relations, self.relation_dim(embedding_dim),
+                                                sparse=True)
+        self.margin = margin
+        self.loss = loss or self.default_loss
+        if self.loss not in ("margin", "logistic"):
+            raise ValueError(f"Unknown KGE loss '{self.loss}'")
+        nn.init.xavier_uniform_(self.entity_embeddings.weight.data)
+        self.init_relations(self.relation_embeddings.weight.data)
+
+    def relation_dim(self, embedding_dim: int) -> int:
+        return embedding_dim
+
+    def init_relations(self, weight: torch.Tensor) -> None:
+        nn.init.xavier_uniform_(weight)
+
+    def tail_query(self, h: torch.Tensor, r: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+    def head_query(self, r: torch.Tensor, t: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+    def match(self, q: torch.Tensor, e: torch.Tensor) -> torch.Tensor:
+        """Score of query ``q`` against entity ``e`` (broadcast, reduces the last dim)."""
+        raise NotImplementedError
+
+    def pairwise(self, q: torch.Tensor, e: torch.Tensor) -> torch.Tensor:
+        """(B, C) scores of B queries against C entities."""
+        return self.match(q[:, None, :], e[None, :, :])
+
+    def forward(self, pos: torch.Tensor, neg: torch.Tensor,
+                corrupt_tail: torch.Tensor) -> torch.Tensor:
+        h = self.entity_embeddings(pos[:, 0])
+        r = self.relation_embeddings(pos[:, 1])
+        t = self.entity_embeddings(pos[:, 2])
+        tail_q = self.tail_query(h, r)
+        pos_score = self.match(tail_q, t)
+        q = torch.where(corrupt_tail[:, None], tail_q, self.head_query(r, t))
+        neg_score = self.match(q[:, None, :], self.entity_embeddings(neg))
+        if self.loss == "margin":
+            return torch.relu(self.margin - pos_score[:, None] + neg_score).mean()
+        softplus = nn.functional.softplus
+        return (softplus(-pos_score) + softplus(neg_score).mean(1)).mean()
+
+    # link-prediction scorer interface (see link_prediction.py)
+    def score(self, h, r, t) -> torch.Tensor:
+        E, R = self.entity_embeddings.weight, self.relation_embeddings.weight
+        return self.match(self.tail_query(E[h], R[r]), E[t])
+
+    def score_tails(self, h, r, start: int, stop: int) -> torch.Tensor:
+        E, R = self.entity_embeddings.weight, self.relation_embeddings.weight
+        return self.pairwise(self.tail_query(E[h], R[r]), E[start:stop])
+
+    def score_heads(self, r, t, start: int, stop: int) -> torch.Tensor:
+        E, R = self.entity_embeddings.weight, self.relation_embeddings.weight
+        return self.pairwise(self.head_query(R[r], E[t]), E[start:stop])
+
+    @classmethod
+    def from_embeddings(cls, entity: np.ndarray, relation: np.ndarray,
+                        margin: float = 1.0) -> "KGEModel":
+        """Wrap saved ``entity_embeddings.npy``/``relation_embeddings.npy`` for scoring."""
+        model = cls(entity.shape[0], relation.shape[0], entity.shape[1], margin)
+        model.entity_embeddings.weight.data = torch.from_numpy(np.array(entity, dtype=np.float32))
+        model.relation_embeddings.weight.data = torch.from_numpy(
+            np.array(relation, dtype=np.float32))
+        return model
+
+
+def _halves(x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    return x.chunk(2, dim=-1)
+
+
+class FastTransE(KGEModel):
+    """TransE: ``-||h + r - t||``."""
+
+    def tail_query(self, h, r):
+        return h + r
+
+    def head_query(self, r, t):
+        # ||e + r - t|| = ||e - (t - r)||
+        return t - r
+
+    def match(self, q, e):
+        return -torch.norm(q - e, p=2, dim=-1)
+
+    def pairwise(self, q, e):
+        return -torch.cdist(q, e)
+
+
+class DistMult(KGEModel):
+    """DistMult: ``<h, r, t>``."""
+
+    default_loss = "logistic"
+
+    def tail_query(self, h, r):
+        return h * r
+
+    def head_query(self, r, t):
+        return r * t
+
+    def match(self, q, e):
+        return (q * e).sum(-1)
+
+    def pairwise(self, q, e):
+        return q @ e.T
+
+
+class ComplEx(KGEModel):
+    """ComplEx: ``Re(<h, r, conj(t)>)``, embeddings stored as [real | imaginary]."""
+
+    default_loss = "logistic"
+
+    def __init__(self, num_entities: int, num_relations: int, embedding_dim: int,
+                 margin: float = 1.0, loss: Optional[str] = None):
+        if embedding_dim % 2:
+            raise ValueError("ComplEx needs an even embedding_dim")
+        super().__init__(num_entities, num_relations, embedding_dim, margin, loss)
+
+    def tail_query(self, h, r):
+        (hr, hi), (rr, ri) = _halves(h), _halves(r)
+        return torch.cat([hr * rr - hi * ri, hr * ri + hi * rr], dim=-1)
+
+    def head_query(self, r, t):
+        # Re(<e, r, conj(t)>) = Re(<e, conj(conj(r) * t)>)
+        (rr, ri), (tr, ti) = _halves(r), _halves(t)
+        return torch.cat([rr * tr + ri * ti, rr * ti - ri * tr], dim=-1)
+
+    def match(self, q, e):
+        return (q * e).sum(-1)
+
+    def pairwise(self, q, e):
+        return q @ e.T
+
+
+class RotatE(KGEModel):
+    """
+    RotatE: ``-sum |h * r - t|`` with ``r`` a unit-modulus rotation.
+
+    Entities are stored as [real | imaginary]; relations as phases, so
+    ``relation_embeddings.npy`` is half the entity width.
+    """
+
+    # entity x query pairs scored per block in ``pairwise`` (bounds the (B, C, d) temporary)
+    PAIRWISE_BLOCK = 1 << 22
+
+    def __init__(self, num_entities: int, num_relations: int, embedding_dim: int,
+                 margin: float = 1.0, loss: Optional[str] = None):
+        if embedding_dim % 2:
+            raise ValueError("RotatE needs an even embedding_dim")
+        super().__init__(num_entities, num_relations, embedding_dim, margin, loss)
+
+    def relation_dim(self, embedding_dim):
+        return embedding_dim // 2
+
+    def init_relations(self, weight):
+        nn.init.uniform_(weight, -np.pi, np.pi)
+
+    def tail_query(self, h, r):
+        (hr, hi), c, s = _halves(h), torch.cos(r), torch.sin(r)
+        return torch.cat([hr * c - hi * s, hr * s + hi * c], dim=-1)
+
+    def head_query(self, r, t):
+        # |e * r - t| = |e - t * conj(r)| for |r| = 1
+        (tr, ti), c, s = _halves(t), torch.cos(r), torch.sin(r)
+        return torch.cat([tr * c + ti * s, ti * c - tr * s], dim=-1)
+
+    def match(self, q, e):
+        dr, di = _halves(q - e)
+        return -torch.sqrt(dr * dr + di * di + 1e-12).sum(-1)
+
+    def pairwise(self, q, e):
+        step = max(1, self.PAIRWISE_BLOCK // max(1, len(q) * q.shape[1]))
+        pairwise = super(RotatE, self).pairwise
+        return torch.cat([pairwise(q, e[s:s + step]) for s in range(0, len(e), step)], dim=1)
+
+
+MODELS = {"transe": FastTransE, "distmult": DistMult, "complex": ComplEx, "rotate": RotatE}
+
+
+def make_model(name: str, num_entities: int, num_relations: int, embedding_dim: int,
+               margin: float = 1.0, loss: Optional[str] = None) -> KGEModel:
+    """Scoring model by name (one of ``MODELS``)."""
+    if name not in MODELS:
+        raise ValueError(f"Unknown KGE model '{name}' (expected one of {sorted(MODELS)})")
+    return MODELS[name](num_entities, num_relations, embedding_dim, margin, loss)
+
+
+def make_sparse_optimizer(model: nn.Module, name: str, lr: float) -> torch.optim.Optimizer:
+    """Optimiser that accepts sparse gradients ("sparse_adam" or "adagrad")."""
+    if name == "sparse_adam":
+        return torch.optim.SparseAdam(list(model.parameters()), lr=lr)
+    if name == "adagrad":
+        return torch.optim.Adagrad(model.parameters(), lr=lr)
+    raise ValueError(f"Unknown sparse optimiser '{name}'")
+
+
+def rowwise_adagrad(weight: nn.Parameter, state: torch.Tensor, lr: float,
+                    eps: float = 1e-10) -> None:
+    """Sparse row-wise Adagrad step (one accumulator per row) on ``weight.grad``."""
+    grad = weight.grad.coalesce()
+    idx, g = grad.indices()[0], grad.values()
+    state.index_add_(0, idx, g.pow(2).mean(1))
+    weight.data.index_add_(0, idx, -lr * g / (state[idx].sqrt() + eps)[:, None])
+    weight.grad = None
+
+
+def train_epoch(model: nn.Module, optimizer: torch.optim.Optimizer, triples: torch.Tensor,
+                batch_size: int, negatives: int, generator=None) -> float:
+    """One permutation-indexed pass; returns the mean batch loss."""
+    model.train()
+    num_entities = model.entity_embeddings.num_embeddings
+    perm = torch.randperm(len(triples), generator=generator)
+    total, n_batches = 0.0, 0
+    for s in range(0, len(perm), batch_size):
+        pos = triples[perm[s:s + batch_size]]
+        neg, corrupt_tail = corrupt(pos, negatives, num_entities, generator)
+        optimizer.zero_grad()
+        loss = model(pos, neg, corrupt_tail)
+        loss.backward()
+        optimizer.step()
+        total += loss.item()
+        n_batches += 1
+    return total / max(1, n_batches)
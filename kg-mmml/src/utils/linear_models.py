@@ -0,0 +1,263 @@
+# src/utils/linear_models.py
+"""
+Configurable multi-label linear trainer.
+
+``MultiLabelLinear`` is a one-vs-rest logistic classifier that fits one
+binary model per label with ``joblib`` (``n_jobs``), using one of:
+- ``liblinear``: the historical baseline (results identical to
+  ``OneVsRestClassifier(LogisticRegression(solver="liblinear"))``)
+- ``saga``: stochastic average gradient, scales to large sparse corpora
+- ``sgd``: logistic-loss SGD, full passes or shuffled minibatches
+  (``batch_size``) via ``partial_fit``
+
+``saga`` and ``sgd`` can warm-start from saved coefficients (a previous
+seed's or previous day's model); rows and columns are matched by label and
+feature name, so a grown vocabulary or label set is handled.
+"""
+import warnings
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+SOLVERS = ("liblinear", "saga", "sgd")
+
+
+def _sgd_passes(est: SGDClassifier, X, y, epochs: int, batch_size: int, seed,
+                start_epoch: int = 0) -> None:
+    """
+    Shuffled minibatch ``partial_fit`` passes (one batch = all rows if batch_size <= 0).
+
+    ``start_epoch`` skips that many shuffles, so passes split across calls
+    see the same row orders as one uninterrupted call.
+    """
+    rng = np.random.default_rng(seed)
+    batch_size = batch_size if batch_size > 0 else max(1, X.shape[0])
+    for _ in range(start_epoch):
+        rng.permutation(X.shape[0])
+    for _ in range(epochs):
+        order = rng.permutation(X.shape[0])
+        for s in range(0, len(order), batch_size):
+            rows = order[s:s + batch_size]
+            est.partial_fit(X[rows], y[rows], classes=np.array([0, 1]))
+
+
+def _update_label(est, fresh, X, y, epochs: int, batch_size: int, seed, start_epoch: int = 0):
+    """
+    Continue training one label on new rows.
+
+    A constant label that now varies restarts from ``fresh``.
+    """
+    if isinstance(est, tuple):
+        if (y == est[1]).all():
+            return est
+        fresh.coef_ = np.zeros((1, X.shape[1]))
+        fresh.intercept_ = np.array([8.0 if est[1] else -8.0])
+        est = fresh
+    _sgd_passes(est, X, y, epochs, batch_size, seed, start_epoch)
+    return est
+
+
+def _fit_label(est, X, y, init, batch_size: int, epochs: int, seed):
+    """Fit one binary model; constant labels become ``("const", value)``."""
+    classes = np.unique(y)
+    if len(classes) == 1:
+        return ("const", float(classes[0]))
+    if init is not None:
+        coef, intercept = init
+        if isinstance(est, LogisticRegression):
+            est.set_params(warm_start=True)
+        est.coef_ = coef[None, :].astype(np.float64)
+        est.intercept_ = np.array([intercept], dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        if isinstance(est, SGDClassifier) and batch_size > 0:
+            _sgd_passes(est, X, y, epochs, batch_size, seed)
+        elif isinstance(est, SGDClassifier) and init is not None:
+            est.fit(X, y, coef_init=est.coef_, intercept_init=est.intercept_)
+        else:
+            est.fit(X, y)
+    return est
+
+
+class MultiLabelLinear:
+    """
+    One-vs-rest logistic classifier with a selectable solver.
+
+    Args:
+        solver: "liblinear", "saga" or "sgd"
+        n_jobs: Labels fitted in parallel (joblib; -1 = all cores)
+        C: Inverse regularisation strength (liblinear/saga)
+        alpha: L2 penalty (sgd)
+        max_iter: Solver iterations / epochs
+        tol: Stopping tolerance
+        batch_size: sgd minibatch size (0 = full passes with ``fit``)
+        random_state: Seed for saga/sgd shuffling
+    """
+
+    def __init__(self, solver: str = "liblinear", n_jobs: Optional[int] = None, C: float = 1.0,
+                 alpha: float = 1e-4, max_iter: int = 200, tol: float = 1e-4,
+                 batch_size: int = 0, random_state: Optional[int] = None):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}' (expected one of {SOLVERS})")
+        self.solver = solver
+        self.n_jobs = n_jobs
+        self.C = C
+        self.alpha = alpha
+        self.max_iter = max_iter
+        self.tol = tol
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.estimators_: List = []
+
+    def _estimator(self):
+        if self.solver == "liblinear":
+            return LogisticRegression(max_iter=self.max_iter, n_jobs=None, solver="liblinear",
+                                      C=self.C, tol=self.tol)
+        if self.solver == "saga":
+            return LogisticRegression(max_iter=self.max_iter, solver="saga", C=self.C,
+                                      tol=self.tol, random_state=self.random_state)
+        return SGDClassifier(loss="log_loss", alpha=self.alpha, max_iter=self.max_iter,
+                             tol=self.tol, random_state=self.random_state)
+
+    def fit(self, X, Y, init: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> "MultiLabelLinear":
+        """
+        Fit one model per label column of ``Y``.
+
+        Args:
+            X: Feature matrix (dense or sparse)
+            Y: Multi-hot label array (n_samples, n_labels)
+            init: Optional (coef (n_labels, n_features), intercept (n_labels,))
+                warm start; requires solver "saga" or "sgd"
+        """
+        Y = np.asarray(Y)
+        if init is not None and self.solver == "liblinear":
+            raise ValueError("liblinear cannot warm-start; use solver 'saga' or 'sgd'")
+        base = self._estimator()
+        seed = self.random_state
+        self.estimators_ = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_label)(
+                clone(base), X, Y[:, j],
+                None if init is None else (init[0][j], init[1][j]),
+                self.batch_size, self.max_iter, None if seed is None else seed + j,
+            )
+            for j in range(Y.shape[1])
+        )
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def partial_fit(self, X, Y, epochs: int = 1, batch_size: int = 0,
+                    start_epoch: int = 0) -> "MultiLabelLinear":
+        """
+        Fine-tune a fitted ``sgd`` model on new rows only.
+
+        Args:
+            X: New feature rows (same columns as the original fit)
+            Y: Multi-hot labels for the new rows
+            epochs: Passes over the new rows
+            batch_size: Minibatch size (0 = ``self.batch_size`` or all rows)
+            start_epoch: Passes already made over these same rows; continues
+                their shuffle sequence, so fitting ``max_iter=k`` and then
+                ``partial_fit(epochs=m, start_epoch=k)`` matches fitting
+                ``max_iter=k+m`` with minibatches
+        """
+        if self.solver != "sgd":
+            raise ValueError("partial_fit requires solver 'sgd'")
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got {X.shape[1]}")
+        Y = np.asarray(Y)
+        seed = self.random_state
+        self.estimators_ = Parallel(n_jobs=self.n_jobs)(
+            delayed(_update_label)(
+                est, self._estimator(), X, Y[:, j], epochs, batch_size or self.batch_size,
+                None if seed is None else seed + j, start_epoch,
+            )
+            for j, est in enumerate(self.estimators_)
+        )
+        return self
+
+    def decision_function(self, X) -> np.ndarray:
+        out = np.empty((X.shape[0], len(self.estimators_)))
+        for j, est in enumerate(self.estimators_):
+            if isinstance(est, tuple):
+                out[:, j] = est[1]
+            else:
+                out[:, j] = est.decision_function(X)
+        return out
+
+    def predict_proba(self, X) -> np.ndarray:
+        out = np.empty((X.shape[0], len(self.estimators_)))
+        for j, est in enumerate(self.estimators_):
+            out[:, j] = est[1] if isinstance(est, tuple) else est.predict_proba(X)[:, 1]
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        return (self.decision_function(X) > 0).astype(int)
+
+    @property
+    def coef_(self) -> np.ndarray:
+        coef = np.zeros((len(self.estimators_), self.n_features_in_))
+        for j, est in enumerate(self.estimators_):
+            if not isinstance(est, tuple):
+                coef[j] = est.coef_.ravel()
+        return coef
+
+    @property
+    def intercept_(self) -> np.ndarray:
+        # constant labels: a large bias that reproduces the constant prediction
+        return np.array([
+            (8.0 if est[1] else -8.0) if isinstance(est, tuple) else float(est.intercept_[0])
+            for est in self.estimators_
+        ])
+
+    def save_coefficients(self, path: str, labels: Sequence[str],
+                          feature_names: Optional[Sequence[str]] = None) -> None:
+        """Save coef/intercept with label (and feature) names for warm starts."""
+        np.savez_compressed(
+            path, coef=self.coef_, intercept=self.intercept_,
+            labels=np.asarray(list(labels), dtype=str),
+            features=np.asarray(list(feature_names) if feature_names is not None else [],
+                                dtype=str),
+        )
+
+
+def load_coefficients(path: str, labels: Sequence[str],
+                      feature_names: Optional[Sequence[str]] = None,
+                      n_features: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Saved coefficients aligned to the current labels and features.
+
+    Labels/features missing from the saved model start at zero. Without
+    feature names on either side, the feature count must match.
+
+    Returns:
+        (coef (n_labels, n_features), intercept (n_labels,))
+    """
+    saved = np.load(path, allow_pickle=False)
+    coef, intercept = saved["coef"], saved["intercept"]
+    old_labels = {str(l): i for i, l in enumerate(saved["labels"])}
+    old_features = [str(f) for f in saved["features"]]
+
+    if feature_names is not None and old_features:
+        pos = {f: i for i, f in enumerate(old_features)}
+        src = np.array([pos.get(str(f), -1) for f in feature_names])
+    else:
+        n_features = n_features if n_features is not None else len(feature_names or [])
+        if n_features != coef.shape[1]:
+            raise ValueError(f"Saved model has {coef.shape[1]} features, "
+                             f"current data has {n_features}; "
+                             "save and pass feature names to align them")
+        src = np.arange(n_features)
+
+    new_coef = np.zeros((len(labels), len(src)))
+    new_intercept = np.zeros(len(labels))
+    hit = src >= 0
+    for j, label in enumerate(labels):
+        i = old_labels.get(str(label))
+        if i is not None:
+            new_coef[j, hit] = coef[i, src[hit]]
+            new_intercept[j] = intercept[i]
+    return new_coef, new_intercept
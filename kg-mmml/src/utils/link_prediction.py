@@ -0,0 +1,153 @@
+# src/utils/link_prediction.py
+"""
+Filtered link-prediction evaluation (MRR, Hits@k) for KG embeddings.
+
+Every test triple (h, r, t) is ranked against all entities as a tail
+(h, r, ?) and as a head (?, r, t). Scores are computed for a batch of
+queries against one chunk of entities at a time, so memory is
+``batch x chunk`` no matter how many entities the graph has.
+
+Filtered setting: other known answers (from any split) are removed before
+ranking. Known triples are grouped by their (h, r) and (r, t) int64 keys in
+sorted arrays; each batch gathers its known answers with ``searchsorted``
+and masks them chunk by chunk. Ties count half (rank = 1 + #better +
+#tied / 2), so a model that scores every entity equally gets no credit.
+
+Models expose higher-is-better scores through three methods:
+- ``score(h, r, t)`` -> (B,)
+- ``score_tails(h, r, start, stop)`` -> (B, stop - start) over entities
+- ``score_heads(r, t, start, stop)`` -> (B, stop - start)
+"""
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import torch
+
+HITS_AT = (1, 3, 10)
+
+
+class KnownTriples:
+    """
+    Known triples indexed by query key for filtered ranking.
+
+    Args:
+        triples: (n, 3) int (h, r, t) from all splits
+        num_entities, num_relations: Vocabulary sizes
+    """
+
+    def __init__(self, triples: np.ndarray, num_entities: int, num_relations: int):
+        triples = np.asarray(triples, dtype=np.int64)
+        h, r, t = triples[:, 0], triples[:, 1], triples[:, 2]
+        self.num_entities = num_entities
+        self.num_relations = num_relations
+        self._tails = self._group(h * num_relations + r, t)
+        self._heads = self._group(r * num_entities + t, h)
+
+    @staticmethod
+    def _group(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.lexsort((values, keys))
+        return keys[order], values[order]
+
+    def answers(self, side: str, a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Known answers for a batch of queries.
+
+        Args:
+            side: "tail" (queries are (h, r)) or "head" (queries are (r, t))
+            a, b: Query columns
+
+        Returns:
+            (query row, answer entity) pairs
+        """
+        if side == "tail":
+            keys, values = self._tails
+            q = a.astype(np.int64) * self.num_relations + b
+        else:
+            keys, values = self._heads
+            q = a.astype(np.int64) * self.num_entities + b
+        lo = np.searchsorted(keys, q, side="left")
+        hi = np.searchsorted(keys, q, side="right")
+        counts = hi - lo
+        rows = np.repeat(np.arange(len(q)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return rows, values[np.repeat(lo, counts) + offsets]
+
+
+@torch.no_grad()
+def rank_side(model, triples: np.ndarray, side: str, known: KnownTriples,
+              batch_size: int = 128, chunk_size: int = 32768) -> np.ndarray:
+    """
+    Filtered ranks of the true head or tail of each triple.
+
+    Args:
+        model: Scorer (see module docstring)
+        triples: (n, 3) test triples
+        side: "tail" or "head"
+        known: All known triples
+        batch_size: Queries scored together
+        chunk_size: Entities scored together
+
+    Returns:
+        (n,) float ranks (1 = best)
+    """
+    triples = np.asarray(triples, dtype=np.int64)
+    n_ent = known.num_entities
+    ranks = np.empty(len(triples))
+    for s in range(0, len(triples), batch_size):
+        batch = triples[s:s + batch_size]
+        h, r, t = (torch.from_numpy(batch[:, i]) for i in range(3))
+        true_ent = batch[:, 2] if side == "tail" else batch[:, 0]
+        true_score = model.score(h, r, t)
+        if side == "tail":
+            rows, ents = known.answers("tail", batch[:, 0], batch[:, 1])
+        else:
+            rows, ents = known.answers("head", batch[:, 1], batch[:, 2])
+        # the true entity is masked too, then compared through true_score
+        better = torch.zeros(len(batch), dtype=torch.float64)
+        tied = torch.zeros(len(batch), dtype=torch.float64)
+        for c in range(0, n_ent, chunk_size):
+            stop = min(c + chunk_size, n_ent)
+            if side == "tail":
+                scores = model.score_tails(h, r, c, stop)
+            else:
+                scores = model.score_heads(r, t, c, stop)
+            sel = (ents >= c) & (ents < stop)
+            scores[torch.from_numpy(rows[sel]), torch.from_numpy(ents[sel] - c)] = -torch.inf
+            here = (true_ent >= c) & (true_ent < stop)
+            idx = np.flatnonzero(here)
+            scores[torch.from_numpy(idx), torch.from_numpy(true_ent[here] - c)] = -torch.inf
+            better += (scores > true_score[:, None]).sum(1)
+            tied += (scores == true_score[:, None]).sum(1)
+        ranks[s:s + len(batch)] = (1.0 + better + tied / 2.0).numpy()
+    return ranks
+
+
+def summarise(ranks: np.ndarray, hits_at: Sequence[int] = HITS_AT) -> Dict[str, float]:
+    out = {"mrr": float(np.mean(1.0 / ranks)) if len(ranks) else 0.0,
+           "mean_rank": float(np.mean(ranks)) if len(ranks) else 0.0}
+    for k in hits_at:
+        out[f"hits@{k}"] = float(np.mean(ranks <= k)) if len(ranks) else 0.0
+    return out
+
+
+def evaluate_link_prediction(model, test: np.ndarray, known: KnownTriples, batch_size: int = 128,
+                             chunk_size: int = 32768, hits_at: Sequence[int] = HITS_AT) -> Dict:
+    """
+    Filtered MRR / mean rank / Hits@k over head and tail prediction.
+
+    Returns:
+        Dict with the combined metrics plus ``tail`` and ``head`` breakdowns
+        and ``n_test``
+    """
+    tail = rank_side(model, test, "tail", known, batch_size, chunk_size)
+    head = rank_side(model, test, "head", known, batch_size, chunk_size)
+    out = summarise(np.concatenate([tail, head]), hits_at)
+    out.update(tail=summarise(tail, hits_at), head=summarise(head, hits_at), n_test=int(len(test)))
+    return out
+
+
+def split_triples(n: int, test_size: float, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Random (train, test) row indices over ``n`` triples."""
+    perm = np.random.default_rng(seed).permutation(n)
+    n_test = int(round(n * test_size))
+    return np.sort(perm[n_test:]), np.sort(perm[:n_test])
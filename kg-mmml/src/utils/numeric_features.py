@@ -0,0 +1,202 @@
+# src/utils/numeric_features.py
+"""
+Numeric fact-value features per document.
+
+Facts are streamed once into compact typed arrays (doc, concept, value,
+period, fiscal year); everything after that is pandas/numpy group-by work:
+- ``log:<concept>``    signed log1p magnitude of the doc's latest-period value
+- ``ratio:<name>``     standard financial ratios (see ``RATIOS``)
+- ``growth:<concept>`` change vs the same CIK's previous fiscal-year filing
+
+Rows follow the sorted doc ids used by ``build_corpus_from_facts`` and the
+concept features, so the matrix can be joined with ``feature_join``.
+"""
+import json
+from array import array
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .data_utils import doc_id_from_fact, normalise_concept
+
+RATIOS: List[Tuple[str, str, str]] = [
+    ("current_ratio", "us-gaap:AssetsCurrent", "us-gaap:LiabilitiesCurrent"),
+    ("debt_to_equity", "us-gaap:Liabilities", "us-gaap:StockholdersEquity"),
+    ("equity_ratio", "us-gaap:StockholdersEquity", "us-gaap:Assets"),
+    ("net_margin", "us-gaap:NetIncomeLoss", "us-gaap:Revenues"),
+    ("operating_margin", "us-gaap:OperatingIncomeLoss", "us-gaap:Revenues"),
+    ("gross_margin", "us-gaap:GrossProfit", "us-gaap:Revenues"),
+    ("return_on_assets", "us-gaap:NetIncomeLoss", "us-gaap:Assets"),
+    ("cash_ratio", "us-gaap:CashAndCashEquivalentsAtCarryingValue", "us-gaap:LiabilitiesCurrent"),
+]
+RATIO_CLIP = 100.0
+GROWTH_CLIP = 10.0
+
+
+def signed_log(x: np.ndarray) -> np.ndarray:
+    return np.sign(x) * np.log1p(np.abs(x))
+
+
+def _period_int(s) -> int:
+    s = str(s or "").replace("-", "")
+    return int(s[:8]) if s[:8].isdigit() else 0
+
+
+def load_fact_values(facts_path: str) -> Tuple[List[str], List[str], pd.DataFrame]:
+    """
+    Stream numeric facts into a compact frame.
+
+    Returns:
+        (doc_ids sorted, concept ids, frame with int32 ``doc``/``concept``/``cik``,
+        int32 ``period`` (YYYYMMDD) / ``fy`` and float64 ``value`` columns)
+    """
+    doc_ids: Dict[str, int] = {}
+    concept_ids: Dict[str, int] = {}
+    cik_ids: Dict[str, int] = {}
+    d, c, k, per, fy = (array("i") for _ in range(5))
+    val = array("d")
+    with open(facts_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            v = rec.get("value")
+            if isinstance(v, bool) or not isinstance(v, (int, float)):
+                try:
+                    v = float(v)
+                except (TypeError, ValueError):
+                    continue
+            if not np.isfinite(v):
+                continue
+            did = doc_id_from_fact(rec)
+            cc = normalise_concept(rec.get("ns"), rec.get("concept"))
+            if not did or not cc:
+                continue
+            d.append(doc_ids.setdefault(did, len(doc_ids)))
+            c.append(concept_ids.setdefault(cc, len(concept_ids)))
+            k.append(cik_ids.setdefault((rec.get("cik") or "").strip(), len(cik_ids)))
+            per.append(_period_int(rec.get("period_end")))
+            try:
+                fy.append(int(rec.get("fy") or 0))
+            except (TypeError, ValueError):
+                fy.append(0)
+            val.append(float(v))
+
+    docs = sorted(doc_ids)
+    pos = {did: i for i, did in enumerate(docs)}
+    rank = np.fromiter((pos[did] for did in doc_ids), dtype=np.int32, count=len(docs))
+    frame = pd.DataFrame({
+        "doc": rank[np.frombuffer(d, dtype=np.int32)],
+        "concept": np.frombuffer(c, dtype=np.int32),
+        "cik": np.frombuffer(k, dtype=np.int32),
+        "period": np.frombuffer(per, dtype=np.int32),
+        "fy": np.frombuffer(fy, dtype=np.int32),
+        "value": np.frombuffer(val, dtype=np.float64),
+    })
+    return docs, list(concept_ids), frame
+
+
+def latest_values(frame: pd.DataFrame) -> pd.DataFrame:
+    """One value per (doc, concept): the latest period, last occurrence on ties."""
+    frame = frame.sort_values(["doc", "concept", "period"], kind="stable")
+    return frame.drop_duplicates(["doc", "concept"], keep="last").reset_index(drop=True)
+
+
+def numeric_feature_matrix(
+    docs: List[str],
+    concepts: List[str],
+    frame: pd.DataFrame,
+    vocab_size: int = 500,
+    ratios: bool = True,
+    growth: bool = True,
+) -> Tuple[sparse.csr_matrix, List[str]]:
+    """
+    Build the doc x numeric-feature matrix.
+
+    Args:
+        docs, concepts, frame: Output of ``load_fact_values``
+        vocab_size: Concepts (by number of docs reporting a value) that get
+            ``log:`` and ``growth:`` columns
+        ratios: Add ``ratio:`` columns
+        growth: Add ``growth:`` columns
+
+    Returns:
+        (CSR matrix float32, column names)
+    """
+    n_docs = len(docs)
+    last = latest_values(frame)
+    doc = last["doc"].to_numpy()
+    con = last["concept"].to_numpy()
+    value = last["value"].to_numpy()
+
+    # vocabulary: most widely reported concepts (ties in first-seen order)
+    df = np.bincount(con, minlength=len(concepts))
+    vocab = np.argsort(-df, kind="stable")[:vocab_size]
+    vocab = vocab[df[vocab] > 0]
+    col_of = np.full(len(concepts), -1, dtype=np.int64)
+    col_of[vocab] = np.arange(len(vocab))
+    names = [f"log:{concepts[j]}" for j in vocab]
+
+    rows, cols, data = [], [], []
+    in_vocab = col_of[con] >= 0
+    rows.append(doc[in_vocab])
+    cols.append(col_of[con[in_vocab]])
+    data.append(signed_log(value[in_vocab]))
+    offset = len(vocab)
+
+    if ratios:
+        cid = {c: j for j, c in enumerate(concepts)}
+        needed = sorted({c for _, a, b in RATIOS for c in (a, b) if c in cid})
+        V = np.full((n_docs, len(needed)), np.nan)
+        slot = np.full(len(concepts), -1, dtype=np.int64)
+        slot[[cid[c] for c in needed]] = np.arange(len(needed))
+        hit = slot[con] >= 0
+        V[doc[hit], slot[con[hit]]] = value[hit]
+        at = {c: i for i, c in enumerate(needed)}
+        for name, num, den in RATIOS:
+            names.append(f"ratio:{name}")
+            if num in at and den in at:
+                a, b = V[:, at[num]], V[:, at[den]]
+                ok = np.isfinite(a) & np.isfinite(b) & (b != 0)
+                r = np.clip(a[ok] / b[ok], -RATIO_CLIP, RATIO_CLIP)
+                idx = np.flatnonzero(ok)
+                rows.append(idx)
+                cols.append(np.full(len(idx), offset))
+                data.append(r)
+            offset += 1
+
+    if growth:
+        g = last[in_vocab].copy()
+        doc_fy = np.zeros(n_docs, dtype=np.int64)
+        np.maximum.at(doc_fy, frame["doc"].to_numpy(), frame["fy"].to_numpy())
+        g["doc_fy"] = doc_fy[g["doc"].to_numpy()]
+        g = g.sort_values(["cik", "concept", "doc_fy", "period"], kind="stable")
+        grp = g.groupby(["cik", "concept"], sort=False)
+        prev = grp["value"].shift().to_numpy()
+        prev_fy = grp["doc_fy"].shift().to_numpy()
+        cur = g["value"].to_numpy()
+        ok = np.isfinite(prev) & (prev != 0) & (prev_fy < g["doc_fy"].to_numpy())
+        rate = np.clip((cur[ok] - prev[ok]) / np.abs(prev[ok]), -GROWTH_CLIP, GROWTH_CLIP)
+        rows.append(g["doc"].to_numpy()[ok])
+        cols.append(offset + col_of[g["concept"].to_numpy()[ok]])
+        data.append(rate)
+        names.extend(f"growth:{concepts[j]}" for j in vocab)
+        offset += len(vocab)
+
+    X = sparse.csr_matrix(
+        (np.concatenate(data).astype(np.float32), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_docs, offset),
+    )
+    X.eliminate_zeros()
+    X.sort_indices()
+    return X, names
+
+
+def build_numeric_features(facts_path: str, vocab_size: int = 500, ratios: bool = True,
+                           growth: bool = True) -> Tuple[sparse.csr_matrix, List[str], List[str]]:
+    """Stream facts and build numeric features; returns (X, doc_ids, column names)."""
+    docs, concepts, frame = load_fact_values(facts_path)
+    X, names = numeric_feature_matrix(docs, concepts, frame, vocab_size, ratios, growth)
+    return X, docs, names
@@ -0,0 +1,180 @@
+# src/utils/online.py
+"""
+Online (incremental) updates for the TF-IDF + linear baseline.
+
+``OnlineClassifier`` bundles everything a refresh needs so new filings can
+be folded in without refitting on the whole corpus:
+- the fitted ``ShardedTfidf`` vocabulary and IDF, frozen at the initial fit,
+  plus ``overflow`` hash buckets that absorb terms outside that vocabulary
+  (pruned at fit time or first seen later), so the feature space never
+  changes shape
+- the label set (the binariser); labels first seen in new filings are
+  reported as drift and need a full retrain to be learned
+- an ``sgd`` ``MultiLabelLinear`` fine-tuned with ``partial_fit`` on the new
+  documents only
+
+Each ``update`` first scores the new documents with the current model
+(prequential F1) and compares them with the reference corpus, so the drift
+report says how far the data has moved before the model adapts to it.
+"""
+import pathlib
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import joblib
+import numpy as np
+from scipy.spatial.distance import jensenshannon
+from sklearn.metrics import f1_score
+
+from .linear_models import MultiLabelLinear
+from .serving import save_artifact
+from .text_features import ShardedTfidf
+
+MODEL_FILE = "online_model.joblib"
+
+
+def _distance(p: np.ndarray, q: np.ndarray) -> float:
+    """Jensen-Shannon distance (base 2, in [0, 1]) between two count vectors."""
+    if p.sum() == 0 or q.sum() == 0:
+        return 0.0 if p.sum() == q.sum() else 1.0
+    return float(jensenshannon(p, q, base=2))
+
+
+class OnlineClassifier:
+    """
+    Frozen-vocabulary TF-IDF + SGD logistic model updated in place.
+
+    Args:
+        labels: Label names (one classifier column each)
+        overflow: Hash buckets for out-of-vocabulary terms
+        min_df, max_features: ``ShardedTfidf`` options for the initial fit
+        n_jobs: TF-IDF worker processes
+        clf_jobs: Labels fitted in parallel
+        clf_params: ``MultiLabelLinear`` options (solver is always "sgd")
+    """
+
+    def __init__(self, labels: Sequence[str], overflow: int = 1024, min_df=2,
+                 max_features: Optional[int] = 20000, n_jobs: int = -1,
+                 clf_jobs: Optional[int] = None, **clf_params):
+        self.labels = [str(l) for l in labels]
+        self.overflow = overflow
+        self.vectoriser = ShardedTfidf(min_df=min_df, max_features=max_features, n_jobs=n_jobs)
+        clf_params["solver"] = "sgd"
+        self.clf = MultiLabelLinear(n_jobs=clf_jobs, **clf_params)
+        self.seen_docs: set = set()
+        self.label_counts = np.zeros(len(self.labels))
+        self.n_updates = 0
+
+    def binarise(self, label_sets: Iterable[Iterable[str]]) -> np.ndarray:
+        """Multi-hot rows over the known labels; unknown labels are dropped."""
+        pos = {l: j for j, l in enumerate(self.labels)}
+        rows = [list(ls) for ls in label_sets]
+        Y = np.zeros((len(rows), len(self.labels)), dtype=int)
+        for i, ls in enumerate(rows):
+            for l in ls:
+                if l in pos:
+                    Y[i, pos[l]] = 1
+        return Y
+
+    def featurise(self, texts: Sequence[str]):
+        return self.vectoriser.transform(texts, overflow=self.overflow)
+
+    def fit(self, docs: Sequence[str], texts: Sequence[str],
+            label_sets: Sequence[Iterable[str]]) -> "OnlineClassifier":
+        """Initial full fit; sets the reference vocabulary and label distribution."""
+        self.vectoriser.fit(texts)
+        Y = self.binarise(label_sets)
+        self.clf.fit(self.featurise(texts), Y)
+        self.seen_docs = set(docs)
+        self.label_counts = Y.sum(0).astype(float)
+        return self
+
+    def predict(self, texts: Sequence[str]) -> np.ndarray:
+        return self.clf.predict(self.featurise(texts))
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        return self.clf.predict_proba(self.featurise(texts))
+
+    def drift(self, X, Y, label_sets: Sequence[Iterable[str]]) -> Dict:
+        """
+        Drift of new documents against the reference corpus.
+
+        Returns:
+            Dict with overflow_share (fraction of TF-IDF mass in overflow
+            buckets), term_shift / label_shift (Jensen-Shannon distance of
+            document and label frequencies), unseen_labels, mean_confidence
+            and the current model's micro/macro F1 on the new documents
+        """
+        n_vocab = len(self.vectoriser.vocabulary_)
+        sq = X.multiply(X)
+        total = float(sq.sum())
+        new_df = np.asarray((X[:, :n_vocab] > 0).sum(0)).ravel()
+        known = set(self.labels)
+        unseen = sorted({str(l) for ls in label_sets for l in ls} - known)
+        proba = self.clf.predict_proba(X)
+        Yhat = (self.clf.decision_function(X) > 0).astype(int)
+        return {
+            "n_docs": int(X.shape[0]),
+            "overflow_share": float(sq[:, n_vocab:].sum()) / total if total else 0.0,
+            "term_shift": _distance(self.vectoriser.df_.astype(float), new_df.astype(float)),
+            "label_shift": _distance(self.label_counts, Y.sum(0).astype(float)),
+            "unseen_labels": unseen,
+            "mean_confidence": float(np.abs(proba - 0.5).mean() * 2) if proba.size else 0.0,
+            "pre_update_micro_f1": float(f1_score(Y, Yhat, average="micro", zero_division=0)),
+            "pre_update_macro_f1": float(f1_score(Y, Yhat, average="macro", zero_division=0)),
+        }
+
+    def update(self, docs: Sequence[str], texts: Sequence[str], label_sets: Sequence[Iterable[str]],
+               epochs: int = 1, batch_size: int = 0) -> Dict:
+        """
+        Fine-tune on documents not seen before and report drift.
+
+        Args:
+            docs, texts, label_sets: Candidate documents (already-seen doc ids are skipped)
+            epochs: ``partial_fit`` passes over the new documents
+            batch_size: SGD minibatch size (0 = the classifier's setting)
+
+        Returns:
+            Drift report (see ``drift``) plus ``n_skipped`` and ``update``
+        """
+        new = [i for i, d in enumerate(docs) if d not in self.seen_docs]
+        report: Dict = {"update": self.n_updates + 1, "n_skipped": len(docs) - len(new)}
+        if not new:
+            report["n_docs"] = 0
+            return report
+        texts = [texts[i] for i in new]
+        label_sets = [list(label_sets[i]) for i in new]
+        X = self.featurise(texts)
+        Y = self.binarise(label_sets)
+        report.update(self.drift(X, Y, label_sets))
+
+        self.clf.partial_fit(X, Y, epochs=epochs, batch_size=batch_size)
+        self.seen_docs.update(docs[i] for i in new)
+        self.n_updates += 1
+        return report
+
+    def export(self, path: str) -> None:
+        """Write the current model as a servable artifact (see ``serving``)."""
+        vec = self.vectoriser
+        save_artifact(path, vec.get_feature_names_out(), vec.idf_, self.clf.coef_,
+                      self.clf.intercept_, self.labels, overflow=self.overflow,
+                      overflow_idf=vec.overflow_idf,
+                      meta={"source": "online", "update": self.n_updates})
+
+    def save(self, outdir: str) -> pathlib.Path:
+        out = pathlib.Path(outdir)
+        out.mkdir(parents=True, exist_ok=True)
+        path = out / MODEL_FILE
+        tmp = path.with_suffix(".tmp")
+        joblib.dump(self, tmp)
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, outdir: str) -> "OnlineClassifier":
+        return joblib.load(pathlib.Path(outdir) / MODEL_FILE)
+
+
+def labelled_docs(docs: List[str], texts: List[str], label_sets: List[Iterable[str]]):
+    """Keep documents with at least one label (as the batch baseline does)."""
+    keep = [i for i, l in enumerate(label_sets) if len(l) > 0]
+    return [docs[i] for i in keep], [texts[i] for i in keep], [list(label_sets[i]) for i in keep]
@@ -0,0 +1,241 @@
+# src/utils/partitioned_kge.py
+"""
+Partitioned (out-of-core) KGE training over edge buckets.
+
+Entities are split into P partitions by a seeded permutation; partition
+``p`` holds its entity embeddings and row-wise Adagrad state as
+``entities_{p}.npy`` / ``adagrad_{p}.npy`` on disk. Triples are bucketed
+by (head partition, tail partition) into ``bucket_{i}_{j}.npy`` with
+partition-local entity ids. Training visits the buckets one at a time with
+only the (at most two) partitions of the current bucket in memory, and
+orders them so consecutive buckets swap one partition; negatives are drawn
+from the partition of the corrupted side. Relation embeddings are small
+and stay resident.
+
+Peak memory is about two partitions of embeddings plus one bucket of
+triples, so P trades memory for disk traffic. ``PartitionStore.export``
+assembles the usual ``entity_embeddings.npy`` through a memory map.
+"""
+import json
+import pathlib
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+from numpy.lib.format import open_memmap
+
+from .kge import KGEModel, rowwise_adagrad
+
+ORDER_FILE = "entity_order.npy"
+META_FILE = "partitions.json"
+
+
+def _entity_file(root: pathlib.Path, p: int) -> pathlib.Path:
+    return root / f"entities_{p}.npy"
+
+
+def _state_file(root: pathlib.Path, p: int) -> pathlib.Path:
+    return root / f"adagrad_{p}.npy"
+
+
+def _bucket_file(root: pathlib.Path, i: int, j: int) -> pathlib.Path:
+    return root / f"bucket_{i}_{j}.npy"
+
+
+class PartitionStore:
+    """
+    Partitioned entity embeddings, optimiser state and triple buckets on disk.
+
+    Args:
+        root: Partition directory (see ``create``)
+    """
+
+    def __init__(self, root: str):
+        self.root = pathlib.Path(root)
+        meta = json.loads((self.root / META_FILE).read_text(encoding="utf-8"))
+        self.num_partitions = meta["num_partitions"]
+        self.num_entities = meta["num_entities"]
+        self.embedding_dim = meta["embedding_dim"]
+        self.bucket_sizes = np.array(meta["bucket_sizes"], dtype=np.int64)
+
+    @classmethod
+    def create(cls, root: str, triples: np.ndarray, num_entities: int, num_partitions: int,
+               embedding_dim: int, seed: int = 42, chunk_size: int = 1 << 22) -> "PartitionStore":
+        """
+        Partition entities, initialise their embeddings and bucket ``triples``.
+
+        Args:
+            root: Output directory
+            triples: (n, 3) int triples (may be a memory map; read in chunks)
+            num_entities: Entity vocabulary size
+            num_partitions: P
+            embedding_dim: Entity embedding width
+            seed: Partition assignment and initialisation seed
+            chunk_size: Triples read per pass step
+        """
+        root = pathlib.Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        P = num_partitions
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(num_entities)
+        part = np.empty(num_entities, dtype=np.int32)
+        local = np.empty(num_entities, dtype=np.int64)
+        part[order] = np.arange(num_entities) % P
+        local[order] = np.arange(num_entities) // P
+        np.save(root / ORDER_FILE, order)
+
+        # xavier_uniform bound of the full (num_entities, dim) table
+        bound = float(np.sqrt(6.0 / (num_entities + embedding_dim)))
+        for p in range(P):
+            n_p = len(range(p, num_entities, P))
+            np.save(_entity_file(root, p),
+                    rng.uniform(-bound, bound, (n_p, embedding_dim)).astype(np.float32))
+            np.save(_state_file(root, p), np.zeros(n_p, dtype=np.float32))
+
+        # two passes: count per bucket, then fill exact-size memory maps
+        def chunks():
+            for s in range(0, len(triples), chunk_size):
+                c = np.asarray(triples[s:s + chunk_size], dtype=np.int64)
+                yield c, part[c[:, 0]] * P + part[c[:, 2]]
+
+        sizes = np.zeros(P * P, dtype=np.int64)
+        for _, b in chunks():
+            sizes += np.bincount(b, minlength=P * P)
+        outs = {b: open_memmap(_bucket_file(root, b // P, b % P), mode="w+", dtype=np.int32,
+                               shape=(int(sizes[b]), 3)) for b in range(P * P)}
+        filled = np.zeros(P * P, dtype=np.int64)
+        for c, b in chunks():
+            idx = np.argsort(b, kind="stable")
+            c, b = c[idx], b[idx]
+            starts = np.searchsorted(b, np.arange(P * P))
+            stops = np.searchsorted(b, np.arange(P * P), side="right")
+            for bucket in np.flatnonzero(stops > starts):
+                rows = c[starts[bucket]:stops[bucket]]
+                out = outs[bucket][filled[bucket]:filled[bucket] + len(rows)]
+                out[:, 0], out[:, 1], out[:, 2] = local[rows[:, 0]], rows[:, 1], local[rows[:, 2]]
+                filled[bucket] += len(rows)
+        for out in outs.values():
+            out.flush()
+        del outs
+
+        meta = {"num_partitions": P, "num_entities": int(num_entities),
+                "embedding_dim": int(embedding_dim), "seed": seed,
+                "bucket_sizes": sizes.reshape(P, P).tolist()}
+        (root / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+        return cls(root)
+
+    def load(self, p: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(embeddings, Adagrad state) of partition ``p``, copied into memory."""
+        return np.load(_entity_file(self.root, p)), np.load(_state_file(self.root, p))
+
+    def save(self, p: int, embeddings: np.ndarray, state: np.ndarray) -> None:
+        for path, arr in ((_entity_file(self.root, p), embeddings),
+                          (_state_file(self.root, p), state)):
+            out = np.load(path, mmap_mode="r+")
+            out[:] = arr
+            out.flush()
+
+    def bucket(self, i: int, j: int) -> np.ndarray:
+        return np.load(_bucket_file(self.root, i, j))
+
+    def export(self, path: str) -> None:
+        """Write all entity embeddings in vocabulary order, one partition at a time."""
+        order = np.load(self.root / ORDER_FILE, mmap_mode="r")
+        out = open_memmap(path, mode="w+", dtype=np.float32,
+                          shape=(self.num_entities, self.embedding_dim))
+        P = self.num_partitions
+        for p in range(P):
+            out[np.asarray(order[p::P])] = np.load(_entity_file(self.root, p), mmap_mode="r")
+        out.flush()
+
+
+def bucket_order(num_partitions: int, rng: np.random.Generator) -> List[Tuple[int, int]]:
+    """
+    All (head, tail) partition pairs, each consecutive pair sharing a partition.
+
+    Partition labels are shuffled per call. Row ``a`` runs (a, a), then
+    (a, b) for b = a+2 .. P-1 and ends with (a, a+1), which leads into
+    (a+1, a+1); (i, j) is followed by (j, i).
+    """
+    labels = rng.permutation(num_partitions)
+    order = []
+    for a in range(num_partitions):
+        row = [a] + list(range(a + 2, num_partitions)) + ([a + 1] if a + 1 < num_partitions else [])
+        for b in row:
+            i, j = int(labels[a]), int(labels[b])
+            order.append((i, j))
+            if i != j:
+                order.append((j, i))
+    return order
+
+
+def _batches(n: int, batch_size: int, generator) -> Iterator[torch.Tensor]:
+    perm = torch.randperm(n, generator=generator)
+    for s in range(0, n, batch_size):
+        yield perm[s:s + batch_size]
+
+
+def train_partitioned_epoch(model: KGEModel, relation_state: torch.Tensor, store: PartitionStore,
+                            lr: float, batch_size: int, negatives: int, rng: np.random.Generator,
+                            generator=None) -> float:
+    """
+    One pass over all buckets, holding at most two partitions in memory.
+
+    Args:
+        model: Scoring model; its entity table is swapped per partition pair
+        relation_state: Row-wise Adagrad state of the relation table
+        store: Partitions and buckets
+        lr: Adagrad learning rate
+        batch_size, negatives: As in ``kge.train_epoch``
+        rng: Bucket-order generator
+        generator: Torch generator for batches and negatives
+
+    Returns:
+        Mean batch loss
+    """
+    model.train()
+    resident: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    loaded, offsets, table, state = (), {}, None, None
+    total, n_batches = 0.0, 0
+    for i, j in bucket_order(store.num_partitions, rng):
+        if not store.bucket_sizes[i, j]:
+            continue
+        need = tuple(sorted({i, j}))
+        if need != loaded:
+            for p in [p for p in resident if p not in need]:
+                store.save(p, *resident.pop(p))
+            for p in need:
+                if p not in resident:
+                    resident[p] = store.load(p)
+            table = torch.from_numpy(np.concatenate([resident[p][0] for p in need]))
+            state = torch.from_numpy(np.concatenate([resident[p][1] for p in need]))
+            offsets, start = {}, 0
+            for p in need:
+                n_p = len(resident[p][1])
+                offsets[p] = (start, n_p)
+                resident[p] = (table.numpy()[start:start + n_p], state.numpy()[start:start + n_p])
+                start += n_p
+            model.entity_embeddings = nn.Embedding.from_pretrained(table, freeze=False, sparse=True)
+            loaded = need
+
+        triples = torch.from_numpy(store.bucket(i, j).astype(np.int64))
+        (h_off, h_n), (t_off, t_n) = offsets[i], offsets[j]
+        triples[:, 0] += h_off
+        triples[:, 2] += t_off
+        for idx in _batches(len(triples), batch_size, generator):
+            pos = triples[idx]
+            corrupt_tail = torch.rand(len(pos), generator=generator) < 0.5
+            shape = (len(pos), negatives)
+            neg = torch.where(corrupt_tail[:, None],
+                              torch.randint(t_off, t_off + t_n, shape, generator=generator),
+                              torch.randint(h_off, h_off + h_n, shape, generator=generator))
+            loss = model(pos, neg, corrupt_tail)
+            loss.backward()
+            rowwise_adagrad(model.entity_embeddings.weight, state, lr)
+            rowwise_adagrad(model.relation_embeddings.weight, relation_state, lr)
+            total += loss.item()
+            n_batches += 1
+    for p, (emb, st) in resident.items():
+        store.save(p, emb, st)
+    return total / max(1, n_batches)
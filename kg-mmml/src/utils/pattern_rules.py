@@ -0,0 +1,150 @@
+# src/utils/pattern_rules.py
+"""
+Compiled matcher for taxonomy pattern rules (pattern_rules.yaml).
+
+All rules are indexed once in literal-prefix tries. For each concept, a trie
+walk yields the few rules whose leading literal occurs in the name, and only
+those are confirmed with their real regex. Rules with no usable literal
+(e.g. ``^.*$``) are always confirmed. Rule order is preserved, so first-hit
+semantics match a sequential loop over the YAML.
+"""
+import re
+from typing import Iterable, List, Optional, Tuple
+
+_META = set(".^$*+?{}[]()|\\")
+_QUANT = set("*?{")
+_RULES = "\0rules"
+
+
+def load_pattern_rules(yaml_path: str) -> List[Tuple[str, str]]:
+    """
+    Read pattern_rules.yaml into an ordered list of (parent, pattern) pairs.
+
+    Args:
+        yaml_path: Path to YAML with a top-level ``parents`` mapping
+
+    Returns:
+        Rules in file order (parents in mapping order, patterns in list order)
+    """
+    import yaml
+
+    with open(yaml_path, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f) or {}
+    parents = cfg.get("parents", {}) or {}
+    return [(parent, str(pat)) for parent, pats in parents.items() for pat in (pats or [])]
+
+
+def literal_prefix(pattern: str, anchored: bool) -> Tuple[str, bool]:
+    """
+    Leading literal every match of ``pattern`` must start with.
+
+    Returns (literal, anchored) where ``anchored`` says the literal must sit at
+    position 0. An empty literal means the rule cannot be pre-filtered.
+    """
+    if "|" in pattern or pattern.startswith("(?"):
+        return "", anchored
+    s = pattern
+    if s.startswith("^"):
+        s, anchored = s[1:], True
+    if s[:2] in (".*", ".+"):
+        s, anchored = s[2:], False
+
+    out = []
+    i = 0
+    while i < len(s):
+        ch = s[i]
+        if ch == "\\":
+            if i + 1 < len(s) and not s[i + 1].isalnum():
+                ch, step = s[i + 1], 2
+            else:
+                break
+        elif ch in _META:
+            break
+        else:
+            step = 1
+        if i + step < len(s) and s[i + step] in _QUANT:
+            break
+        out.append(ch)
+        i += step
+    return "".join(out), anchored
+
+
+class PatternMatcher:
+    """
+    Match concept names against an ordered rule list in one pass.
+
+    Args:
+        rules: Ordered (parent, pattern) pairs
+        flags: ``re`` flags applied to every pattern (e.g. ``re.IGNORECASE``)
+        anchored: True for ``re.match`` semantics, False for ``re.search``
+    """
+
+    def __init__(self, rules: Iterable[Tuple[str, str]], flags: int = 0, anchored: bool = False):
+        self.rules = list(rules)
+        self.anchored = anchored
+        self.fold = bool(flags & re.IGNORECASE)
+        self.compiled = [re.compile(p, flags) for _, p in self.rules]
+        self._test = [rx.match if anchored else rx.search for rx in self.compiled]
+        self._head, self._any = {}, {}
+        self._always: List[int] = []
+
+        for k, (_, pat) in enumerate(self.rules):
+            lit, at_start = literal_prefix(pat, anchored)
+            if at_start and not anchored and flags & re.MULTILINE:
+                at_start = False
+            if not lit or not lit.isascii():
+                self._always.append(k)
+                continue
+            node = self._head if at_start else self._any
+            for ch in (lit.lower() if self.fold else lit):
+                node = node.setdefault(ch, {})
+            node.setdefault(_RULES, []).append(k)
+
+    @classmethod
+    def from_yaml(cls, yaml_path: str, flags: int = 0, anchored: bool = False) -> "PatternMatcher":
+        return cls(load_pattern_rules(yaml_path), flags=flags, anchored=anchored)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def candidates(self, text: str) -> List[int]:
+        """Sorted rule ids whose literal pre-filter passes for ``text``."""
+        if not text.isascii():
+            return list(range(len(self.rules)))
+        s = text.lower() if self.fold else text
+        hits = set(self._always)
+        self._walk(self._head, s, 0, hits)
+        if self._any:
+            for i in range(len(s)):
+                self._walk(self._any, s, i, hits)
+        return sorted(hits)
+
+    @staticmethod
+    def _walk(node, s, i, hits):
+        n = len(s)
+        while True:
+            ids = node.get(_RULES)
+            if ids:
+                hits.update(ids)
+            if i >= n:
+                return
+            node = node.get(s[i])
+            if node is None:
+                return
+            i += 1
+
+    def first(self, text: str) -> Optional[str]:
+        """Parent of the first rule (in YAML order) that matches ``text``."""
+        for k in self.candidates(text):
+            if self._test[k](text):
+                return self.rules[k][0]
+        return None
+
+    def matches(self, text: str) -> List[str]:
+        """Parents of every matching rule, deduplicated, in YAML order."""
+        out = []
+        for k in self.candidates(text):
+            parent = self.rules[k][0]
+            if parent not in out and self._test[k](text):
+                out.append(parent)
+        return out
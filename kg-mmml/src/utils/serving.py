@@ -0,0 +1,274 @@
+# src/utils/serving.py
+"""
+Compact model artifacts and low-latency batched scoring.
+
+A trained text classifier (``baseline_tfidf``, ``train_joint`` or the online
+model) is saved as one ``.npz`` (no pickles): the TF-IDF vocabulary and IDF,
+optional overflow buckets, float32 weights stored features x labels, the
+intercepts and the parent label names. ``ModelArtifact`` loads it once and
+scores a batch with one sparse x dense product, so per-document cost is a
+tokenisation plus a few row reads.
+
+``MicroBatcher`` queues single requests from many threads and scores them
+together: a batch is sent when ``max_batch`` requests are waiting or the
+oldest has waited ``max_wait_ms``. An optional per-request ``prepare`` step
+runs first, so a malformed request fails alone instead of failing its
+batch. It keeps a rolling window of request
+latencies for p50/p95/p99 reporting.
+
+Filings can be given as concept lists, ``{"concepts": [...]}``, fact
+records (``{"facts": [...]}`` or a list of records) or ``{"text": ...}``;
+concepts become tokens exactly as in ``build_corpus_from_facts``.
+"""
+import json
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from .data_utils import concept_token, normalise_concept
+from .text_features import TOKEN_PATTERN, overflow_bucket
+
+_STOP = object()
+
+
+def save_artifact(path: str, terms: Sequence[str], idf: np.ndarray, coef: np.ndarray,
+                  intercept: np.ndarray, labels: Sequence[str], overflow: int = 0,
+                  overflow_idf: float = 0.0, meta: Optional[dict] = None) -> None:
+    """
+    Write a servable model.
+
+    Args:
+        path: Output ``.npz``
+        terms, idf: Fitted TF-IDF vocabulary (column order) and IDF
+        coef: (n_labels, n_features) weights; features are the terms followed
+            by ``overflow`` hash buckets
+        intercept: (n_labels,) biases
+        labels: Parent label per output
+        overflow, overflow_idf: Hash buckets for unknown terms and their IDF
+        meta: Free-form provenance (source CLI, metrics, ...)
+    """
+    coef = np.asarray(coef)
+    if coef.shape[1] != len(terms) + overflow:
+        raise ValueError(f"coef has {coef.shape[1]} features, expected {len(terms) + overflow} "
+                         "(text features only; concept columns cannot be rebuilt at serving time)")
+    np.savez_compressed(
+        path,
+        terms=np.asarray(list(terms), dtype=str),
+        idf=np.asarray(idf, dtype=np.float32),
+        weight=np.ascontiguousarray(coef.T, dtype=np.float32),
+        intercept=np.asarray(intercept, dtype=np.float32),
+        labels=np.asarray(list(labels), dtype=str),
+        overflow=np.array([overflow, overflow_idf]),
+        meta=np.array(json.dumps(meta or {})),
+    )
+
+
+def filing_text(filing) -> str:
+    """Space-joined concept tokens for one filing in any accepted input form."""
+    if isinstance(filing, str):
+        return filing
+    if isinstance(filing, dict):
+        if "text" in filing:
+            return str(filing["text"])
+        if "concepts" in filing:
+            filing = filing["concepts"]
+        elif "facts" in filing:
+            filing = filing["facts"]
+        else:
+            filing = [filing]
+    elif not isinstance(filing, (list, tuple)):
+        raise ValueError("unsupported filing: expected concepts, facts or text, "
+                         f"got {filing!r:.80}")
+    tokens = []
+    for item in filing:
+        if isinstance(item, dict):
+            c = normalise_concept(item.get("ns"), item.get("concept"))
+        else:
+            c = normalise_concept(None, str(item))
+        if c:
+            tokens.append(concept_token(c))
+    return " ".join(tokens)
+
+
+class ModelArtifact:
+    """
+    Loaded artifact; ``score`` maps texts to label probabilities.
+
+    Args:
+        path: ``.npz`` written by ``save_artifact``
+    """
+
+    def __init__(self, path: str):
+        z = np.load(path, allow_pickle=False)
+        self.terms = [str(t) for t in z["terms"]]
+        self.vocab = {t: j for j, t in enumerate(self.terms)}
+        self.overflow = int(z["overflow"][0])
+        self.idf = z["idf"]
+        if self.overflow:
+            extra = np.full(self.overflow, z["overflow"][1], dtype=np.float32)
+            self.idf = np.concatenate([self.idf, extra])
+        self.weight = z["weight"]
+        self.intercept = z["intercept"]
+        self.labels = [str(l) for l in z["labels"]]
+        self.meta = json.loads(str(z["meta"]))
+
+    def featurise(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """TF-IDF rows (l2-normalised, float32) against the frozen vocabulary."""
+        vocab, n_vocab, overflow = self.vocab, len(self.terms), self.overflow
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        indices: List[int] = []
+        counts: List[int] = []
+        for i, text in enumerate(texts):
+            row = Counter()
+            for t in TOKEN_PATTERN.findall(text.lower()):
+                j = vocab.get(t)
+                if j is not None:
+                    row[j] += 1
+                elif overflow:
+                    row[n_vocab + overflow_bucket(t, overflow)] += 1
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr[i + 1] = len(indices)
+        indices = np.asarray(indices, dtype=np.int64)
+        data = np.asarray(counts, dtype=np.float32) * self.idf[indices]
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(texts)))
+        norms[norms == 0] = 1.0
+        data /= norms[rows].astype(np.float32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(texts), self.weight.shape[0]))
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """(n_texts, n_labels) probabilities."""
+        logits = self.featurise(texts) @ self.weight + self.intercept
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def predict(self, filings: Sequence, threshold: float = 0.5, top_k: int = 5) -> List[dict]:
+        """
+        Parent labels and scores per filing.
+
+        Returns:
+            One dict per filing: ``labels`` (score >= threshold, best first)
+            and ``scores`` (top_k label -> score)
+        """
+        return self.predict_texts([filing_text(f) for f in filings], threshold, top_k)
+
+    def predict_texts(self, texts: Sequence[str], threshold: float = 0.5,
+                      top_k: int = 5) -> List[dict]:
+        """``predict`` for filings already converted with ``filing_text``."""
+        probs = self.score(texts)
+        out = []
+        for p in probs:
+            order = np.argsort(-p, kind="stable")
+            out.append({
+                "labels": [self.labels[j] for j in order if p[j] >= threshold],
+                "scores": {self.labels[j]: round(float(p[j]), 6) for j in order[:top_k]},
+            })
+        return out
+
+
+def latency_summary(ms: Sequence[float]) -> Dict[str, Optional[float]]:
+    if not len(ms):
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a batch function.
+
+    Args:
+        fn: Maps a list of requests to a list of results (same order)
+        prepare: Applied to each request before batching; a request whose
+            ``prepare`` raises gets that exception and is left out of the batch
+        max_batch: Largest batch handed to ``fn``
+        max_wait_ms: Longest a request waits for others to join its batch
+        window: Request latencies kept for ``stats``
+    """
+
+    def __init__(self, fn: Callable[[list], list], max_batch: int = 64,
+                 max_wait_ms: float = 1.0, window: int = 10000,
+                 prepare: Optional[Callable] = None):
+        self.fn = fn
+        self.prepare = prepare
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._q: queue.Queue = queue.Queue()
+        self._latency: deque = deque(maxlen=window)
+        self._sizes: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._loop, daemon=True)
+        self._worker.start()
+
+    def submit(self, request) -> Future:
+        fut: Future = Future()
+        self._q.put((request, fut, time.perf_counter()))
+        return fut
+
+    def __call__(self, requests: Sequence) -> list:
+        """Submit a batch of requests and wait for all results."""
+        return [f.result() for f in [self.submit(r) for r in requests]]
+
+    def _loop(self) -> None:
+        while True:
+            first = self._q.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = first[2] + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._q.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch) -> None:
+        if self.prepare is not None:
+            ready = []
+            for r, fut, t0 in batch:
+                try:
+                    ready.append((self.prepare(r), fut, t0))
+                except Exception as e:  # only this caller sees it
+                    fut.set_exception(e)
+            batch = ready
+            if not batch:
+                return
+        try:
+            results = self.fn([r for r, _, _ in batch])
+        except Exception as e:  # surfaced to every caller in the batch
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            return
+        done = time.perf_counter()
+        with self._lock:
+            self._sizes.append(len(batch))
+            for (_, fut, t0), res in zip(batch, results):
+                self._latency.append((done - t0) * 1000.0)
+                fut.set_result(res)
+
+    def stats(self) -> dict:
+        with self._lock:
+            ms, sizes = list(self._latency), list(self._sizes)
+        return {"requests": len(ms), "batches": len(sizes),
+                "mean_batch": float(np.mean(sizes)) if sizes else 0.0, **latency_summary(ms)}
+
+    def close(self) -> None:
+        self._q.put(_STOP)
+        self._worker.join()
@@ -0,0 +1,120 @@
+# src/utils/sweep.py
+"""
+Budgeted hyperparameter search by successive halving.
+
+Every configuration starts at ``min_budget`` (e.g. epochs); after each rung
+only the best ``1/eta`` move on, with the budget multiplied by ``eta`` up to
+``max_budget``. Trials resume from their own state between rungs, so a
+configuration that reaches budget B has cost B, and most configurations are
+stopped after the first rung. Once a single configuration survives, it
+skips the remaining intermediate rungs and trains straight to
+``max_budget``. Rungs are synchronous: all survivors of a
+rung are evaluated (in parallel) before the next cut, which keeps the
+result independent of worker timing.
+"""
+import itertools
+import json
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def expand_space(space: Dict[str, Sequence], n_trials: int = 0, seed: int = 0) -> List[dict]:
+    """
+    Configurations from a grid of candidate values.
+
+    Args:
+        space: Parameter -> candidate values (a scalar is a fixed value)
+        n_trials: Random sample of this many grid points (0 = full grid)
+        seed: Sampling seed
+
+    Returns:
+        List of parameter dicts
+    """
+    keys = list(space)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in space.values()]
+    grid = [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+    if 0 < n_trials < len(grid):
+        pick = np.random.default_rng(seed).choice(len(grid), size=n_trials, replace=False)
+        grid = [grid[i] for i in sorted(pick)]
+    return grid
+
+
+def rung_budgets(min_budget: int, max_budget: int, eta: int = 3) -> List[int]:
+    """Geometric budgets min_budget * eta**k, capped (and ending) at max_budget."""
+    if min_budget < 1 or max_budget < min_budget or eta < 2:
+        raise ValueError("need 1 <= min_budget <= max_budget and eta >= 2")
+    budgets, b = [], min_budget
+    while b < max_budget:
+        budgets.append(b)
+        b *= eta
+    return budgets + [max_budget]
+
+
+def successive_halving(
+    configs: Sequence[dict],
+    evaluate: Callable[[List[dict]], List[dict]],
+    budgets: Sequence[int],
+    eta: int = 3,
+    metric: str = "score",
+    on_rung: Optional[Callable[[int, List[dict]], None]] = None,
+) -> List[dict]:
+    """
+    Run successive halving over ``configs``.
+
+    Args:
+        configs: Parameter dicts
+        evaluate: Maps rung jobs ``{"trial", "config", "budget", "prev_budget",
+            "final"}`` to result dicts (same order) that contain ``metric``
+        budgets: Budget per rung (see ``rung_budgets``)
+        eta: Keep the top ``1/eta`` (at least one) after each rung
+        metric: Result key to maximise
+        on_rung: Called as ``on_rung(rung, results)`` after each rung
+
+    Returns:
+        One record per trial: trial, config, rung/budget reached, score there
+        and the per-rung ``history``
+    """
+    trials = [{"trial": i, "config": dict(c), "rung": -1, "budget": 0, "score": None, "history": []}
+              for i, c in enumerate(configs)]
+    alive = list(trials)
+    rung = 0
+    while True:
+        budget = budgets[rung]
+        final = rung == len(budgets) - 1
+        jobs = [{"trial": t["trial"], "config": t["config"], "budget": budget,
+                 "prev_budget": t["budget"], "final": final} for t in alive]
+        results = evaluate(jobs)
+        for t, res in zip(alive, results):
+            t.update(rung=rung, budget=budget, score=float(res[metric]))
+            t["history"].append(dict(res, rung=rung, budget=budget))
+        if on_rung is not None:
+            on_rung(rung, results)
+        if final:
+            break
+        keep = max(1, len(alive) // eta)
+        alive = sorted(alive, key=lambda t: -t["score"])[:keep]
+        # nothing left to compare: train the winner straight to max_budget
+        rung = len(budgets) - 1 if len(alive) == 1 else rung + 1
+    return trials
+
+
+def leaderboard(trials: Sequence[dict]) -> List[dict]:
+    """Trials ranked by rung reached, then score (flat rows for CSV)."""
+    ranked = sorted(trials, key=lambda t: (-t["rung"],
+                                           -(t["score"] if t["score"] is not None else -np.inf)))
+    rows = []
+    for rank, t in enumerate(ranked, 1):
+        last = t["history"][-1] if t["history"] else {}
+        row = {"rank": rank, "trial": t["trial"], "rung": t["rung"], "budget": t["budget"],
+               "score": t["score"]}
+        row.update({f"test_{k}": v for k, v in last.get("test", {}).items()})
+        row.update(t["config"])
+        row["config"] = json.dumps(t["config"], sort_keys=True)
+        rows.append(row)
+    return rows
+
+
+def budget_spent(trials: Sequence[dict]) -> int:
+    """Total budget used (trials resume, so each costs the budget it reached)."""
+    return int(sum(t["budget"] for t in trials))
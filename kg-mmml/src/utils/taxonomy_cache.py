@@ -0,0 +1,79 @@
+# src/utils/taxonomy_cache.py
+"""
+Persistent rule-decision cache for incremental taxonomy rebuilds.
+
+Holds the pattern-rule and frequency-family decision for every short concept
+name seen so far. Decisions are pure functions of the name and the rule set,
+so they stay valid until the rules change; they are keyed by a hash of
+pattern_rules.yaml plus the frequency-rule set, and a different hash drops
+them so every concept is re-evaluated. CIK support lives in the concept
+statistics store (see concept_stats.py), which is updated from the facts delta.
+"""
+import hashlib
+import json
+import os
+import pathlib
+from typing import Dict, Iterable, List
+
+
+def rules_key(*parts) -> str:
+    """
+    Stable hash over rule inputs.
+
+    Args:
+        parts: File paths (hashed by content) or JSON-serialisable values
+
+    Returns:
+        Hex sha256 digest
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (str, pathlib.Path)) and os.path.isfile(part):
+            h.update(pathlib.Path(part).read_bytes())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class RuleDecisionCache:
+    """
+    Per-concept rule decisions keyed by the rule-set hash.
+
+    Args:
+        path: JSON cache location
+        key: Hash of the rule set the decisions were computed under
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: str, key: str):
+        self.path = pathlib.Path(path)
+        self.key = key
+        self.decisions: Dict[str, dict] = {}
+        self.rules_changed = False
+
+    @classmethod
+    def load(cls, path: str, key: str) -> "RuleDecisionCache":
+        """Load the cache; decisions are discarded if ``key`` no longer matches."""
+        cache = cls(path, key)
+        p = pathlib.Path(path)
+        if not p.exists():
+            return cache
+        state = json.loads(p.read_text(encoding="utf-8"))
+        if state.get("version") == cls.VERSION and state.get("key") == key:
+            cache.decisions = state.get("decisions", {})
+        else:
+            cache.rules_changed = True
+        return cache
+
+    def save(self):
+        state = {"version": self.VERSION, "key": self.key, "decisions": self.decisions}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def pending(self, shorts: Iterable[str]) -> List[str]:
+        """Short names with no cached decision yet."""
+        return sorted(s for s in shorts if s not in self.decisions)
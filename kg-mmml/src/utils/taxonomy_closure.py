@@ -0,0 +1,229 @@
+# src/utils/taxonomy_closure.py
+"""
+Transitive closure engine for concept taxonomies.
+
+Concepts are integer-encoded and each one keeps its ancestor set as a packed
+bit-array row (8 concepts per byte). The closure is built in topological order
+(parents before children) without recursion, so hierarchy depth is unbounded.
+Edges that would close a cycle are rejected and reported instead of looping.
+New edges can be added incrementally without rebuilding the closure.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class TaxonomyCycleError(ValueError):
+    """Raised in strict mode when the taxonomy contains a cycle."""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("taxonomy cycle: " + " -> ".join(cycle))
+
+
+class TaxonomyClosure:
+    """
+    Packed-bitset ancestor closure over a child -> parent hierarchy.
+
+    Row ``i`` of ``bits`` holds the ancestors of concept ``i``; bit ``j`` is set
+    when concept ``j`` is a (direct or transitive) parent of concept ``i``.
+    """
+
+    def __init__(self, concepts: Iterable[str] = (), strict: bool = False):
+        self.concepts: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.strict = strict
+        self.cycles: List[List[str]] = []
+        self.rejected: List[Tuple[str, str]] = []
+        self._parents: List[List[int]] = []
+        self.bits = np.zeros((0, 0), dtype=np.uint8)
+        for c in concepts:
+            self._encode(c)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_edges(
+        cls,
+        edges: Iterable[Tuple[str, str]],
+        strict: bool = False,
+        concepts: Optional[Iterable[str]] = None,
+    ) -> "TaxonomyClosure":
+        """
+        Build the closure from (child, parent) pairs.
+
+        ``concepts`` optionally fixes the integer encoding order (any names it
+        misses are appended in edge order).
+
+        Nodes are processed with Kahn's algorithm; whatever is left over sits
+        on or below a cycle and is resolved edge by edge via ``add_edge``, which
+        rejects (and records) only the edges that actually close a cycle.
+        """
+        edges = [(str(c), str(p)) for c, p in edges]
+        names = dict.fromkeys(concepts or ())
+        names.update(dict.fromkeys(x for e in edges for x in e))
+        self = cls(strict=strict)
+        self._reserve(len(names))
+        for name in names:
+            self._encode(name)
+        n = len(self.concepts)
+        if not edges:
+            return self
+
+        ch = np.fromiter((self.index[c] for c, _ in edges), dtype=np.int64, count=len(edges))
+        pa = np.fromiter((self.index[p] for _, p in edges), dtype=np.int64, count=len(edges))
+        keep = ch != pa
+        pairs = np.unique(np.stack([ch[keep], pa[keep]], axis=1), axis=0)
+        ch, pa = pairs[:, 0], pairs[:, 1]
+
+        # CSR adjacency parent -> children
+        order = np.argsort(pa, kind="stable")
+        children = ch[order]
+        child_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(child_ptr, pa + 1, 1)
+        child_ptr = np.cumsum(child_ptr)
+        pending = np.bincount(ch, minlength=n)
+
+        bits = self.bits
+        queue = deque(np.flatnonzero(pending == 0).tolist())
+        while queue:
+            u = queue.popleft()
+            row = bits[u]
+            byte, mask = u >> 3, np.uint8(1 << (u & 7))
+            for c in children[child_ptr[u]:child_ptr[u + 1]].tolist():
+                np.bitwise_or(bits[c], row, out=bits[c])
+                bits[c, byte] |= mask
+                self._parents[c].append(u)
+                pending[c] -= 1
+                if pending[c] == 0:
+                    queue.append(c)
+
+        leftover = pending > 0
+        if leftover.any():
+            for c, p in zip(ch[leftover[ch]].tolist(), pa[leftover[ch]].tolist()):
+                if p not in self._parents[c]:
+                    self._add(c, p)
+        return self
+
+    def add_edge(self, child: str, parent: str) -> bool:
+        """
+        Add one child -> parent edge and update the closure in place.
+
+        Returns False (and records the cycle) if the edge would create one.
+        """
+        c, p = self._encode(str(child)), self._encode(str(parent))
+        if c == p or p in self._parents[c]:
+            return c != p
+        return self._add(c, p)
+
+    def _add(self, c: int, p: int) -> bool:
+        if self._has_bit(p, c):
+            cycle = self._path_up(p, c)
+            self.cycles.append([self.concepts[i] for i in [c] + cycle])
+            self.rejected.append((self.concepts[c], self.concepts[p]))
+            if self.strict:
+                raise TaxonomyCycleError(self.cycles[-1])
+            return False
+
+        self._parents[c].append(p)
+        new = self.bits[p].copy()
+        new[p >> 3] |= np.uint8(1 << (p & 7))
+        n = len(self.concepts)
+        col = self.bits[:n, c >> 3] & np.uint8(1 << (c & 7))
+        rows = np.append(np.flatnonzero(col), c)
+        self.bits[rows] |= new
+        return True
+
+    def _encode(self, concept: str) -> int:
+        i = self.index.get(concept)
+        if i is not None:
+            return i
+        i = len(self.concepts)
+        self.concepts.append(concept)
+        self.index[concept] = i
+        self._parents.append([])
+        if i >= self.bits.shape[0]:
+            self._reserve(max(64, 2 * self.bits.shape[0]))
+        return i
+
+    def _reserve(self, capacity: int):
+        """Grow the bit matrix to hold at least ``capacity`` concepts."""
+        cap = -(-capacity // 8) * 8
+        if cap <= self.bits.shape[0]:
+            return
+        grown = np.zeros((cap, cap // 8), dtype=np.uint8)
+        grown[: self.bits.shape[0], : self.bits.shape[1]] = self.bits
+        self.bits = grown
+
+    def _has_bit(self, i: int, j: int) -> bool:
+        return bool(self.bits[i, j >> 3] & np.uint8(1 << (j & 7)))
+
+    def _path_up(self, start: int, target: int) -> List[int]:
+        """Shortest parent path from ``start`` up to ``target`` (both included)."""
+        prev = {start: None}
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            if u == target:
+                break
+            for p in self._parents[u]:
+                if p not in prev:
+                    prev[p] = u
+                    queue.append(p)
+        path, u = [], target
+        while u is not None:
+            path.append(u)
+            u = prev[u]
+        return path[::-1]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.concepts)
+
+    def ancestors(self, concept: str) -> List[str]:
+        """All transitive parents of ``concept`` (empty if unknown)."""
+        i = self.index.get(concept)
+        if i is None:
+            return []
+        n = len(self.concepts)
+        row = np.unpackbits(self.bits[i], bitorder="little")[:n]
+        return [self.concepts[j] for j in np.flatnonzero(row)]
+
+    def is_ancestor(self, ancestor: str, concept: str) -> bool:
+        i, j = self.index.get(concept), self.index.get(ancestor)
+        if i is None or j is None:
+            return False
+        return self._has_bit(i, j)
+
+    def pairs(self, block: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        """All (child_idx, ancestor_idx) pairs, unpacked ``block`` rows at a time."""
+        n = len(self.concepts)
+        rows, cols = [], []
+        for s in range(0, n, block):
+            dense = np.unpackbits(self.bits[s:min(s + block, n)], axis=1, bitorder="little")[:, :n]
+            r, c = np.nonzero(dense)
+            rows.append(r + s)
+            cols.append(c)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(rows).astype(np.int64), np.concatenate(cols).astype(np.int64)
+
+    def to_frame(self):
+        """Closure as a sorted DataFrame with ``child`` and ``parent`` columns."""
+        import pandas as pd
+
+        r, c = self.pairs()
+        names = np.asarray(self.concepts, dtype=object)
+        df = pd.DataFrame({"child": names[r], "parent": names[c]})
+        return df.sort_values(["child", "parent"], ignore_index=True)
+
+    def report(self, limit: Optional[int] = 10) -> str:
+        """Human-readable summary of rejected cycle edges."""
+        lines = [f"{len(self.cycles)} cycle edge(s) rejected"]
+        for cyc in self.cycles[:limit]:
+            lines.append("  " + " -> ".join(cyc))
+        return "\n".join(lines)
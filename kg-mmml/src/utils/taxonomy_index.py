@@ -0,0 +1,222 @@
+# src/utils/taxonomy_index.py
+"""
+Taxonomy reasoning index: hierarchy queries and corpus label expansion.
+
+Built once per taxonomy CSV. Concepts get sorted integer ids, ancestor sets
+come from the packed-bitset closure (O(1) is-ancestor tests), and direct-parent
+and closure relations are exposed as sparse matrices. Label expansion for a
+whole corpus is then a single doc x concept @ concept x parent product instead
+of a per-doc walk over child_to_parents dicts.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .taxonomy_closure import TaxonomyClosure
+
+_INDEX_CACHE: Dict[Tuple[str, float, int], "TaxonomyIndex"] = {}
+
+
+class TaxonomyIndex:
+    """
+    Precomputed ancestor/descendant structure over (child, parent) edges.
+
+    Args:
+        edges: Iterable of (child, parent) concept pairs
+    """
+
+    def __init__(self, edges: Iterable[Tuple[str, str]]):
+        edges = sorted({(c, p) for c, p in edges if c and p and c != p})
+        self.concepts: List[str] = sorted({x for e in edges for x in e})
+        self.closure = TaxonomyClosure.from_edges(edges, concepts=self.concepts)
+        self.index: Dict[str, int] = self.closure.index
+        n = len(self.concepts)
+
+        ch = np.fromiter((self.index[c] for c, _ in edges), dtype=np.int64, count=len(edges))
+        pa = np.fromiter((self.index[p] for _, p in edges), dtype=np.int64, count=len(edges))
+        self._parents = sparse.csr_matrix(
+            (np.ones(len(edges), dtype=np.float32), (ch, pa)), shape=(n, n)
+        )
+        r, c = self.closure.pairs()
+        self._ancestors = sparse.csr_matrix(
+            (np.ones(len(r), dtype=np.float32), (r, c)), shape=(n, n)
+        )
+        self._descendants = self._ancestors.T.tocsr()
+        self._names = np.asarray(self.concepts, dtype=object)
+
+    @classmethod
+    def from_csv(cls, tax_path: str) -> "TaxonomyIndex":
+        """Load a child,parent CSV; reuses the index while the file is unchanged."""
+        import pandas as pd
+
+        st = os.stat(tax_path)
+        key = (os.path.abspath(tax_path), st.st_mtime, st.st_size)
+        if key not in _INDEX_CACHE:
+            tax = pd.read_csv(tax_path)
+            child = tax["child"].astype(str).str.strip()
+            parent = tax["parent"].astype(str).str.strip()
+            _INDEX_CACHE[key] = cls(zip(child, parent))
+        return _INDEX_CACHE[key]
+
+    @classmethod
+    def from_parents(cls, child_to_parents: Dict[str, Set[str]]) -> "TaxonomyIndex":
+        """Build from a ``load_taxonomy_parents`` style mapping."""
+        return cls((c, p) for c, ps in child_to_parents.items() for p in ps)
+
+    def __len__(self) -> int:
+        return len(self.concepts)
+
+    def __contains__(self, concept: str) -> bool:
+        return concept in self.index
+
+    # ------------------------------------------------------------------
+    # Point queries
+    # ------------------------------------------------------------------
+    def _row(self, m: sparse.csr_matrix, concept: str) -> List[str]:
+        i = self.index.get(concept)
+        if i is None:
+            return []
+        return self._names[m.indices[m.indptr[i]:m.indptr[i + 1]]].tolist()
+
+    def parents(self, concept: str) -> List[str]:
+        return self._row(self._parents, concept)
+
+    def ancestors(self, concept: str) -> List[str]:
+        return self._row(self._ancestors, concept)
+
+    def descendants(self, concept: str) -> List[str]:
+        return self._row(self._descendants, concept)
+
+    def is_ancestor(self, ancestor: str, concept: str) -> bool:
+        return self.closure.is_ancestor(ancestor, concept)
+
+    def lca(self, a: str, b: str) -> List[str]:
+        """
+        Lowest common ancestors of ``a`` and ``b`` (each node counts as its own
+        ancestor). A DAG can have several; they are returned sorted.
+        """
+        i, j = self.index.get(a), self.index.get(b)
+        if i is None or j is None:
+            return []
+        bits = self.closure.bits
+        ra, rb = bits[i].copy(), bits[j].copy()
+        ra[i >> 3] |= np.uint8(1 << (i & 7))
+        rb[j >> 3] |= np.uint8(1 << (j & 7))
+        common = ra & rb
+        n = len(self.concepts)
+        members = np.flatnonzero(np.unpackbits(common, bitorder="little")[:n])
+        if len(members) == 0:
+            return []
+        covered = np.bitwise_or.reduce(bits[members], axis=0)
+        lowest = common & ~covered
+        return self._names[np.flatnonzero(np.unpackbits(lowest, bitorder="little")[:n])].tolist()
+
+    # ------------------------------------------------------------------
+    # Matrix views
+    # ------------------------------------------------------------------
+    def parent_matrix(self) -> sparse.csr_matrix:
+        """Direct child -> parent adjacency (n x n)."""
+        return self._parents
+
+    def closure_matrix(self, reflexive: bool = False) -> sparse.csr_matrix:
+        """Child -> ancestor closure (n x n), optionally with the diagonal."""
+        if reflexive:
+            eye = sparse.identity(len(self), dtype=np.float32, format="csr")
+            return (self._ancestors + eye).tocsr()
+        return self._ancestors
+
+    def descendant_matrix(self) -> sparse.csr_matrix:
+        """Ancestor -> descendant closure (transpose of ``closure_matrix``)."""
+        return self._descendants
+
+    def propagation_matrix(self, up_decay: float = 0.5, down_decay: float = 0.0,
+                           max_depth: int = 0) -> sparse.csr_matrix:
+        """
+        Depth-decayed hierarchy spreading (n x n, no diagonal).
+
+        Entry (i, j) is ``up_decay ** d`` when j is an ancestor of i at shortest
+        distance d, plus ``down_decay ** d`` when j is a descendant at distance d.
+
+        Args:
+            up_decay: Weight per step towards ancestors (0 disables)
+            down_decay: Weight per step towards descendants (0 disables)
+            max_depth: Max hops in either direction (0 = unbounded)
+        """
+        n = len(self)
+        P = sparse.csr_matrix((n, n), dtype=np.float32)
+        for decay, A in ((up_decay, self._parents), (down_decay, self._parents.T.tocsr())):
+            if decay <= 0:
+                continue
+            A = A.astype(bool).astype(np.float32)
+            seen = sparse.identity(n, dtype=np.float32, format="csr")
+            frontier = A.copy()
+            depth = 1
+            while frontier.nnz and (max_depth <= 0 or depth <= max_depth):
+                P = P + np.float32(decay ** depth) * frontier
+                seen = seen + frontier
+                # next hop, keeping only first (shortest-distance) visits
+                nxt = (frontier @ A).astype(bool).astype(np.float32)
+                frontier = (nxt - nxt.multiply(seen.astype(bool))).tocsr()
+                frontier.eliminate_zeros()
+                depth += 1
+        P = P.tocsr()
+        P.sort_indices()
+        return P
+
+    def concept_matrix(self, concept_lists: Sequence[Sequence[str]],
+                       binary: bool = False) -> sparse.csr_matrix:
+        """
+        Docs x taxonomy-concepts count matrix; concepts outside the taxonomy are dropped.
+        """
+        lens = np.fromiter((len(cl) for cl in concept_lists), dtype=np.int64,
+                           count=len(concept_lists))
+        rows = np.repeat(np.arange(len(concept_lists)), lens)
+        get = self.index.get
+        cols = np.fromiter((get(c, -1) for cl in concept_lists for c in cl), dtype=np.int64,
+                           count=int(lens.sum()))
+        keep = cols >= 0
+        D = sparse.csr_matrix(
+            (np.ones(int(keep.sum()), dtype=np.float32), (rows[keep], cols[keep])),
+            shape=(len(concept_lists), len(self)),
+        )
+        if binary:
+            D.data[:] = 1.0
+        return D
+
+    def expand(self, D: sparse.spmatrix, closure: bool = False) -> sparse.csr_matrix:
+        """Propagate doc-concept activations to parents (or all ancestors)."""
+        M = self._ancestors if closure else self._parents
+        out = sparse.csr_matrix(D) @ M
+        out.sort_indices()
+        return out
+
+    def labels(self, concept_lists: Sequence[Sequence[str]],
+               closure: bool = False) -> List[List[str]]:
+        """Sorted parent labels per doc, via one sparse product for the whole corpus."""
+        L = self.expand(self.concept_matrix(concept_lists, binary=True), closure=closure)
+        names = self._names
+        return [names[L.indices[L.indptr[i]:L.indptr[i + 1]]].tolist() for i in range(L.shape[0])]
+
+    def support(self, concept_lists: Sequence[Sequence[str]],
+                parents_vocab: Sequence[str]) -> np.ndarray:
+        """
+        Dense docs x parents_vocab counts of observed children (with repeats)
+        mapping to each parent.
+        """
+        L = self.expand(self.concept_matrix(concept_lists))
+        cols = np.fromiter((self.index.get(p, -1) for p in parents_vocab), dtype=np.int64,
+                           count=len(parents_vocab))
+        S = np.zeros((L.shape[0], len(parents_vocab)), dtype=np.float32)
+        known = cols >= 0
+        if known.any():
+            S[:, known] = L[:, cols[known]].toarray()
+        return S
+
+
+def as_taxonomy_index(taxonomy) -> Optional[TaxonomyIndex]:
+    """Accept a TaxonomyIndex, a child -> parents dict, or None."""
+    if taxonomy is None or isinstance(taxonomy, TaxonomyIndex):
+        return taxonomy
+    return TaxonomyIndex.from_parents(taxonomy)
@@ -0,0 +1,260 @@
+# src/utils/taxonomy_validate.py
+"""
+Structural validation for child -> parent taxonomies.
+
+Edges are integer-encoded once; everything else works on flat index arrays:
+- cycles: iterative Tarjan SCC over a CSR adjacency (O(V + E), no recursion)
+- transitive reduction: an edge (c, p) is redundant when p is already an
+  ancestor of another parent of c; one packed-bitset closure lookup per
+  sibling-parent pair
+- multi-parent conflicts: children that keep several parents after reduction,
+  flagged when those parents share no top-level root
+- orphan parents: roots (never a child) outside an expected set of anchors
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .taxonomy_closure import TaxonomyClosure
+
+
+def strongly_connected_components(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Tarjan's SCC algorithm, iterative, over edges ``src[k] -> dst[k]``.
+
+    Args:
+        n: Number of nodes (ids 0..n-1)
+        src: Edge source ids
+        dst: Edge target ids
+
+    Returns:
+        Component label per node (labels are in reverse topological order)
+    """
+    order = np.argsort(src, kind="stable")
+    adj = np.asarray(dst, dtype=np.int64)[order]
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(ptr, np.asarray(src, dtype=np.int64) + 1, 1)
+    ptr = np.cumsum(ptr).tolist()
+    adj = adj.tolist()
+
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    comp = [-1] * n
+    stack: List[int] = []
+    counter = 0
+    n_comp = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        work = [(root, ptr[root])]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            v, k = work[-1]
+            if k < ptr[v + 1]:
+                work[-1] = (v, k + 1)
+                w = adj[k]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, ptr[w]))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp[w] = n_comp
+                    if w == v:
+                        break
+                n_comp += 1
+    return np.asarray(comp, dtype=np.int64)
+
+
+def _sibling_pairs(group: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (k, j), k != j, over runs of equal values in sorted ``group``."""
+    if len(group) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    sizes = np.diff(np.r_[starts, len(group)])
+    sizes_per = np.repeat(sizes, sizes)
+    start_per = np.repeat(starts, sizes)
+    k = np.repeat(np.arange(len(group)), sizes_per)
+    offs = np.arange(len(k)) - np.repeat(np.cumsum(sizes_per) - sizes_per, sizes_per)
+    j = np.repeat(start_per, sizes_per) + offs
+    keep = k != j
+    return k[keep], j[keep]
+
+
+class TaxonomyReport:
+    """
+    Validation result for one taxonomy.
+
+    Args:
+        edges: Iterable of (child, parent) concept pairs
+        expected_roots: Concepts allowed to be top-level parents; when None,
+            no orphan check is made
+    """
+
+    def __init__(self, edges: Iterable[Tuple[str, str]],
+                 expected_roots: Optional[Iterable[str]] = None):
+        raw = [(str(c), str(p)) for c, p in edges]
+        self.n_input = len(raw)
+        self.self_loops = sum(1 for c, p in raw if c == p)
+        pairs = sorted({(c, p) for c, p in raw if c != p})
+        self.n_duplicates = self.n_input - self.self_loops - len(pairs)
+        self.concepts: List[str] = sorted({x for e in pairs for x in e})
+        self.index: Dict[str, int] = {c: i for i, c in enumerate(self.concepts)}
+        n = len(self.concepts)
+        names = np.asarray(self.concepts, dtype=object)
+
+        ch = np.fromiter((self.index[c] for c, _ in pairs), dtype=np.int64, count=len(pairs))
+        pa = np.fromiter((self.index[p] for _, p in pairs), dtype=np.int64, count=len(pairs))
+
+        # Cycles: every SCC with more than one node
+        comp = strongly_connected_components(n, ch, pa)
+        sizes = np.bincount(comp, minlength=int(comp.max()) + 1 if n else 0)
+        cyclic = sizes[comp] > 1 if n else np.zeros(0, dtype=bool)
+        self.cycles: List[List[str]] = []
+        for label in np.flatnonzero(sizes > 1):
+            self.cycles.append(sorted(names[comp == label].tolist()))
+        intra = cyclic[ch] & (comp[ch] == comp[pa]) if len(ch) else np.zeros(0, dtype=bool)
+        self.cycle_edges: List[Tuple[str, str]] = list(
+            zip(names[ch[intra]].tolist(), names[pa[intra]].tolist()))
+
+        # Transitive reduction over the acyclic remainder
+        ch, pa = ch[~intra], pa[~intra]
+        closure = TaxonomyClosure.from_edges(
+            zip(names[ch].tolist(), names[pa].tolist()), concepts=self.concepts
+        )
+        bits = closure.bits[:n]
+        redundant = np.zeros(len(ch), dtype=bool)
+        # all ordered (edge k, sibling edge j) pairs under the same child, j != k;
+        # edges are sorted by (child, parent), so each child's parents are contiguous
+        k, j = _sibling_pairs(ch)
+        if len(k):
+            p, q = pa[k], pa[j]
+            hit = bits[q, p >> 3] & (1 << (p & 7)).astype(np.uint8)
+            redundant[np.unique(k[hit != 0])] = True
+        self.redundant_edges: List[Tuple[str, str]] = list(
+            zip(names[ch[redundant]].tolist(), names[pa[redundant]].tolist())
+        )
+        keep = ~redundant
+        self._reduced = (ch[keep], pa[keep])
+        self._names = names
+
+        # Roots, orphan parents and multi-parent conflicts (on the reduced graph)
+        rch, rpa = self._reduced
+        is_child = np.zeros(n, dtype=bool)
+        is_child[rch] = True
+        is_parent = np.zeros(n, dtype=bool)
+        is_parent[rpa] = True
+        roots = np.flatnonzero(is_parent & ~is_child & ~cyclic)
+        self.roots: List[str] = names[roots].tolist()
+        if expected_roots is None:
+            self.orphan_parents: List[str] = []
+        else:
+            expected = set(expected_roots)
+            self.orphan_parents = [r for r in self.roots if r not in expected]
+
+        r_par = np.bincount(rch, minlength=n)
+        self.multi_parent: Dict[str, List[str]] = {}
+        self.conflicts: Dict[str, List[str]] = {}
+        m_idx = np.flatnonzero(r_par[rch] > 1)
+        if len(m_idx):
+            starts = np.flatnonzero(np.r_[True, rch[m_idx][1:] != rch[m_idx][:-1]])
+            ends = np.r_[starts[1:], len(m_idx)]
+            p = rpa[m_idx]
+            # root membership per parent (a root counts as its own root)
+            masks = (1 << (roots & 7)).astype(np.uint8)
+            under = (bits[p[:, None], roots[None, :] >> 3] & masks) != 0
+            under |= p[:, None] == roots[None, :]
+            counts = np.add.reduceat(under.astype(np.int32), starts, axis=0)
+            shared = (counts == (ends - starts)[:, None]).any(axis=1)
+            for g, (s, e) in enumerate(zip(starts.tolist(), ends.tolist())):
+                child = names[rch[m_idx[s]]]
+                parents = names[p[s:e]].tolist()
+                self.multi_parent[child] = parents
+                if not shared[g]:
+                    self.conflicts[child] = parents
+
+    # ------------------------------------------------------------------
+    # Outputs
+    # ------------------------------------------------------------------
+    def reduced_frame(self):
+        """Acyclic, transitively reduced edges as a child/parent DataFrame."""
+        import pandas as pd
+
+        rch, rpa = self._reduced
+        return pd.DataFrame({"child": self._names[rch], "parent": self._names[rpa]})
+
+    @property
+    def ok(self) -> bool:
+        return not self.cycles and not self.conflicts and not self.orphan_parents
+
+    def summary(self) -> dict:
+        return {
+            "concepts": len(self.concepts),
+            "input_edges": self.n_input,
+            "self_loops": self.self_loops,
+            "duplicate_edges": self.n_duplicates,
+            "cycles": len(self.cycles),
+            "cycle_edges": len(self.cycle_edges),
+            "redundant_edges": len(self.redundant_edges),
+            "reduced_edges": int(len(self._reduced[0])),
+            "roots": len(self.roots),
+            "orphan_parents": len(self.orphan_parents),
+            "multi_parent_children": len(self.multi_parent),
+            "cross_root_conflicts": len(self.conflicts),
+        }
+
+    def to_dict(self, limit: Optional[int] = 50) -> dict:
+        """Summary plus (truncated) detail lists, ready for ``json.dumps``."""
+        def head(items):
+            return list(items)[:limit] if limit is not None else list(items)
+
+        return {
+            "summary": self.summary(),
+            "cycles": head(self.cycles),
+            "redundant_edges": head(self.redundant_edges),
+            "orphan_parents": head(self.orphan_parents),
+            "cross_root_conflicts": dict(head(sorted(self.conflicts.items()))),
+            "roots": self.roots,
+        }
+
+    def to_text(self, limit: int = 10) -> str:
+        """Short human-readable report."""
+        s = self.summary()
+        lines = [
+            f"concepts={s['concepts']} edges={s['input_edges']} -> reduced={s['reduced_edges']} "
+            f"(redundant={s['redundant_edges']} duplicates={s['duplicate_edges']} "
+            f"self_loops={s['self_loops']})",
+            f"cycles={s['cycles']} roots={s['roots']} orphan_parents={s['orphan_parents']} "
+            f"multi_parent={s['multi_parent_children']} "
+            f"cross_root_conflicts={s['cross_root_conflicts']}",
+        ]
+        for cyc in self.cycles[:limit]:
+            lines.append("  cycle: " + " <-> ".join(cyc))
+        for o in self.orphan_parents[:limit]:
+            lines.append(f"  orphan parent: {o}")
+        for child, parents in sorted(self.conflicts.items())[:limit]:
+            lines.append(f"  conflict: {child} -> {', '.join(parents)}")
+        return "\n".join(lines)
+
+
+def validate_taxonomy(edges: Iterable[Tuple[str, str]],
+                      expected_roots: Optional[Iterable[str]] = None) -> TaxonomyReport:
+    """Run all structural checks over (child, parent) edges."""
+    return TaxonomyReport(edges, expected_roots)
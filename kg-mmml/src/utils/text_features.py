@@ -0,0 +1,301 @@
+# src/utils/text_features.py
+"""
+Sharded TF-IDF featuriser.
+
+Drop-in for ``TfidfVectorizer(min_df=..., max_features=...)`` with the
+default tokenisation, smooth IDF and l2 norm, split so that both passes run
+over document shards in worker processes:
+- fit: each shard counts term and document frequencies; the counters are
+  merged and the vocabulary is selected exactly as sklearn does (``min_df``
+  filter, then top ``max_features`` by total term count with sklearn's
+  tie-breaking over alphabetically sorted terms)
+- transform: each shard emits CSR count arrays that are stacked, IDF-scaled
+  and normalised in one vectorised step
+
+The fitted vocabulary and IDF persist as a CSV (``load``/``save``), and
+``tfidf_features`` keeps the transformed matrix in the feature store keyed
+by corpus hash and parameters, so a corpus version is featurised once.
+"""
+import hashlib
+import json
+import os
+import pathlib
+import re
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from .feature_store import VOCAB_FILE, FeatureStore, entry_key
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+MIN_SHARD = 1000  # docs per worker below which the pool overhead dominates
+VOCAB_CSV = "tfidf_vocab.csv"
+META_JSON = "tfidf_meta.json"
+
+_VOCAB: Dict[str, int] = {}
+_OVERFLOW = 0
+
+
+def _tokens(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _count_shard(texts: Sequence[str]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Tokenise one shard once: (shard terms, CSR indptr, term codes, counts)."""
+    vocab: Dict[str, int] = {}
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    indices, counts = [], []
+    for i, text in enumerate(texts):
+        row = Counter(_tokens(text))
+        indices.extend(vocab.setdefault(t, len(vocab)) for t in row)
+        counts.extend(row.values())
+        indptr[i + 1] = len(indices)
+    indices, counts = np.asarray(indices, dtype=np.int64), np.asarray(counts, dtype=np.int64)
+    return list(vocab), indptr, indices, counts
+
+
+def _init_vocab(vocab: Dict[str, int], overflow: int = 0) -> None:
+    global _VOCAB, _OVERFLOW
+    _VOCAB = vocab
+    _OVERFLOW = overflow
+
+
+def overflow_bucket(token: str, n_buckets: int) -> int:
+    """Stable (process-independent) hash bucket for an out-of-vocabulary token."""
+    return zlib.crc32(token.encode("utf-8")) % n_buckets
+
+
+def _transform_shard(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    CSR (indptr, indices, counts) for one shard against the worker vocabulary;
+    with overflow buckets, unknown tokens are hashed into columns after it.
+    """
+    vocab, n_vocab, overflow = _VOCAB, len(_VOCAB), _OVERFLOW
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    indices, counts = [], []
+    for i, text in enumerate(texts):
+        if overflow:
+            row = Counter(
+                vocab[t] if t in vocab else n_vocab + overflow_bucket(t, overflow)
+                for t in _tokens(text)
+            )
+        else:
+            row = Counter(j for j in map(vocab.get, _tokens(text)) if j is not None)
+        indices.extend(row.keys())
+        counts.extend(row.values())
+        indptr[i + 1] = len(indices)
+    return indptr, np.asarray(indices, dtype=np.int64), np.asarray(counts, dtype=np.int64)
+
+
+def _shards(texts: Sequence[str], n_jobs: int) -> List[Sequence[str]]:
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    n = max(1, min(n_jobs, len(texts) // MIN_SHARD))
+    bounds = np.linspace(0, len(texts), n + 1).astype(int)
+    return [texts[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def _map(fn, shards, initializer=None, initargs=()):
+    if len(shards) == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [fn(shards[0])]
+    with ProcessPoolExecutor(len(shards), initializer=initializer, initargs=initargs) as pool:
+        return list(pool.map(fn, shards))
+
+
+def _stack(parts, remaps=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenate shard CSR arrays, optionally mapping shard term codes to global ones."""
+    offsets = np.cumsum([0] + [p[-3][-1] for p in parts])
+    indptr = np.concatenate([[0]] + [p[-3][1:] + off for p, off in zip(parts, offsets)])
+    if remaps is None:
+        indices = np.concatenate([p[-2] for p in parts])
+    else:
+        indices = np.concatenate([r[p[-2]] for p, r in zip(parts, remaps)])
+    return indptr, indices, np.concatenate([p[-1] for p in parts])
+
+
+class ShardedTfidf:
+    """
+    TF-IDF vectoriser fitted and applied over parallel document shards.
+
+    Args:
+        min_df: Minimum document frequency (int count or float proportion)
+        max_features: Keep the top-N terms by total count (None = all)
+        n_jobs: Worker processes (-1 = all cores)
+    """
+
+    def __init__(self, min_df=1, max_features: Optional[int] = None, n_jobs: int = -1):
+        self.min_df = min_df
+        self.max_features = max_features
+        self.n_jobs = n_jobs
+        self.vocabulary_: Dict[str, int] = {}
+        self.df_: Optional[np.ndarray] = None
+        self.idf_: Optional[np.ndarray] = None
+        self.n_docs_ = 0
+
+    def fit(self, texts: Sequence[str]) -> "ShardedTfidf":
+        self.fit_transform(texts)
+        return self
+
+    def fit_transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        texts = list(texts)
+        parts = _map(_count_shard, _shards(texts, self.n_jobs))
+        terms = sorted(set().union(*(p[0] for p in parts)))
+        if not terms:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+        pos = {t: j for j, t in enumerate(terms)}
+        remaps = [np.fromiter((pos[t] for t in p[0]), dtype=np.int64, count=len(p[0]))
+                  for p in parts]
+        indptr, indices, counts = _stack(parts, remaps)
+
+        dfs = np.bincount(indices, minlength=len(terms))
+        low = self.min_df if isinstance(self.min_df, int) else self.min_df * len(texts)
+        mask = dfs >= low
+        if self.max_features is not None and mask.sum() > self.max_features:
+            tfs = np.bincount(indices, weights=counts, minlength=len(terms)).astype(np.int64)
+            # same argsort call as CountVectorizer._limit_features, so ties break identically
+            keep = (-tfs[mask]).argsort()[:self.max_features]
+            new_mask = np.zeros(len(terms), dtype=bool)
+            new_mask[np.flatnonzero(mask)[keep]] = True
+            mask = new_mask
+        kept = np.flatnonzero(mask)
+        if len(kept) == 0:
+            raise ValueError("After pruning, no terms remain. "
+                             "Try a lower min_df or a higher max_df.")
+
+        self.vocabulary_ = {terms[j]: i for i, j in enumerate(kept)}
+        self.df_ = dfs[kept]
+        self.n_docs_ = len(texts)
+        self.idf_ = np.log((1 + self.n_docs_) / (1 + self.df_)) + 1.0
+
+        # drop pruned columns from the counts already built instead of re-tokenising
+        col = np.cumsum(mask) - 1
+        hit = mask[indices]
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows[hit], minlength=len(texts)))])
+        return self._weight(indptr, col[indices[hit]], counts[hit], len(texts))
+
+    def transform(self, texts: Sequence[str], overflow: int = 0) -> sparse.csr_matrix:
+        """
+        TF-IDF rows for ``texts``.
+
+        Args:
+            texts: Documents
+            overflow: Hash buckets appended after the vocabulary for unknown
+                tokens (weighted with the IDF of a term seen in one doc);
+                0 drops unknown tokens like ``TfidfVectorizer``
+        """
+        if self.idf_ is None:
+            raise ValueError("ShardedTfidf is not fitted")
+        texts = list(texts)
+        parts = _map(_transform_shard, _shards(texts, self.n_jobs),
+                     initializer=_init_vocab, initargs=(self.vocabulary_, overflow))
+        idf = self.idf_
+        if overflow:
+            idf = np.concatenate([idf, np.full(overflow, self.overflow_idf)])
+        return self._weight(*_stack(parts), len(texts), idf)
+
+    @property
+    def overflow_idf(self) -> float:
+        """IDF given to overflow buckets: that of a term seen in a single document."""
+        return float(np.log((1 + self.n_docs_) / 2) + 1.0)
+
+    def _weight(self, indptr, indices, counts, n_rows, idf=None) -> sparse.csr_matrix:
+        idf = self.idf_ if idf is None else idf
+        data = counts.astype(np.float64)
+        data *= idf[indices]
+        X = sparse.csr_matrix((data, indices, indptr), shape=(n_rows, len(idf)))
+        X.sort_indices()
+        return normalize(X, copy=False)
+
+    def get_feature_names_out(self) -> np.ndarray:
+        names = np.empty(len(self.vocabulary_), dtype=object)
+        for term, j in self.vocabulary_.items():
+            names[j] = term
+        return names
+
+    def vocab_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"term": self.get_feature_names_out(), "df": self.df_,
+                             "idf": self.idf_})
+
+    def params(self) -> dict:
+        return {"kind": "tfidf", "min_df": self.min_df, "max_features": self.max_features}
+
+    def save(self, outdir: str) -> None:
+        """Persist the fitted vocabulary and IDF."""
+        out = pathlib.Path(outdir)
+        out.mkdir(parents=True, exist_ok=True)
+        self.vocab_frame().to_csv(out / VOCAB_CSV, index=False)
+        (out / META_JSON).write_text(json.dumps(dict(self.params(), n_docs=self.n_docs_), indent=2),
+                                     encoding="utf-8")
+
+    @classmethod
+    def from_frame(cls, vocab: pd.DataFrame, n_docs: int = 0, **params) -> "ShardedTfidf":
+        vec = cls(**params)
+        vec.vocabulary_ = {str(t): i for i, t in enumerate(vocab["term"])}
+        vec.df_ = vocab["df"].to_numpy(dtype=np.int64)
+        vec.idf_ = vocab["idf"].to_numpy(dtype=np.float64)
+        vec.n_docs_ = n_docs
+        return vec
+
+    @classmethod
+    def load(cls, outdir: str, n_jobs: int = -1) -> "ShardedTfidf":
+        out = pathlib.Path(outdir)
+        meta = json.loads((out / META_JSON).read_text(encoding="utf-8"))
+        vocab = pd.read_csv(out / VOCAB_CSV, keep_default_na=False, float_precision="round_trip")
+        return cls.from_frame(vocab, meta.get("n_docs", 0), min_df=meta["min_df"],
+                              max_features=meta["max_features"], n_jobs=n_jobs)
+
+
+def corpus_hash(texts: Sequence[str]) -> str:
+    h = hashlib.sha256()
+    for text in texts:
+        h.update(text.encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+
+def tfidf_features(
+    texts: Sequence[str],
+    docs: Optional[Sequence[str]] = None,
+    min_df=2,
+    max_features: Optional[int] = None,
+    n_jobs: int = -1,
+    store: Optional[str] = None,
+) -> Tuple[sparse.csr_matrix, ShardedTfidf]:
+    """
+    Fit and transform ``texts``, reusing a stored result for the same corpus.
+
+    Args:
+        texts: Documents
+        docs: Doc ids stored with the matrix (default: row numbers)
+        min_df, max_features, n_jobs: See ``ShardedTfidf``
+        store: Optional feature-store directory
+
+    Returns:
+        (CSR TF-IDF matrix, fitted vectoriser)
+    """
+    texts = list(texts)
+    vec = ShardedTfidf(min_df=min_df, max_features=max_features, n_jobs=n_jobs)
+    if not store:
+        return vec.fit_transform(texts), vec
+
+    fs, key = FeatureStore(store), entry_key(corpus_hash(texts), vec.params())
+    if key in fs:
+        entry = fs.get(key)
+        vocab = pd.read_csv(entry.path / VOCAB_FILE, keep_default_na=False,
+                            float_precision="round_trip")
+        fitted = ShardedTfidf.from_frame(vocab, entry.meta.get("n_docs", 0), min_df=min_df,
+                                         max_features=max_features, n_jobs=n_jobs)
+        return sparse.csr_matrix(entry.matrix), fitted
+
+    X = vec.fit_transform(texts)
+    doc_ids = list(docs) if docs is not None else [str(i) for i in range(len(texts))]
+    fs.put(key, X, doc_ids, vec.vocab_frame(), meta=dict(vec.params(), n_docs=vec.n_docs_))
+    return X, vec
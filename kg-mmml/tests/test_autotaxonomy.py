@@ -9,6 +9,8 @@ import yaml
 from pathlib import Path
 from typing import List, Tuple
 
+from src.utils.pattern_rules import PatternMatcher, literal_prefix
+
 
 # Mock pattern matching functions
 def compile_patterns(yaml_content: dict) -> List[Tuple[str, re.Pattern]]:
@@ -422,5 +424,48 @@ class TestWithFixtures:
         assert "us-gaap:Expenses" not in matches
 
 
+class TestCompiledMatcher:
+    """Test the compiled multi-pattern matcher against the sequential loop"""
+    
+    def test_first_hit_matches_sequential(self, sample_pattern_yaml, sample_concepts):
+        """Compiled first-hit must agree with the sequential rule loop"""
+        rules = yaml.safe_load(sample_pattern_yaml)
+        patterns = compile_patterns(rules)
+        pairs = [(parent, p.pattern) for parent, p in patterns]
+        matcher = PatternMatcher(pairs, anchored=True)
+        
+        for concept in sample_concepts + ["us-gaap:OtherAsset", "ifrs:CashOnHand"]:
+            assert matcher.first(concept) == match_concept_to_parent(concept, patterns)
+    
+    def test_rule_order_preserved(self):
+        """Earlier rules win even when a later rule has a longer literal"""
+        matcher = PatternMatcher([
+            ("us-gaap:Assets", ".*Asset.*"),
+            ("us-gaap:CurrentAssets", "us-gaap:AssetsCurrent"),
+        ], anchored=True)
+        assert matcher.first("us-gaap:AssetsCurrent") == "us-gaap:Assets"
+    
+    def test_search_all_parents_ignorecase(self):
+        """Search mode returns every matching parent, case-insensitively"""
+        matcher = PatternMatcher([
+            ("us-gaap:CashAndCashEquivalents", "Cash.*"),
+            ("us-gaap:NoncurrentAssets", ".*Asset(?!s$).*"),
+            ("us-gaap:Liabilities", "^Liabilit"),
+        ], flags=re.IGNORECASE)
+        assert matcher.matches("RestrictedCASHAndAssetHeld") == [
+            "us-gaap:CashAndCashEquivalents", "us-gaap:NoncurrentAssets"
+        ]
+        assert matcher.matches("liabilitiesCurrent") == ["us-gaap:Liabilities"]
+        assert matcher.matches("OtherLiabilities") == []
+    
+    def test_literal_prefix_extraction(self):
+        """Test the literal pre-filter derived from each pattern"""
+        assert literal_prefix("^us-gaap:Cash.*", False) == ("us-gaap:Cash", True)
+        assert literal_prefix(".*Assets$", True) == ("Assets", False)
+        assert literal_prefix("Assets?Net", False) == ("Asset", False)
+        assert literal_prefix("us\\-gaap\\:X", True) == ("us-gaap:X", True)
+        assert literal_prefix("Cash|Bank", False)[0] == ""
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,84 @@
+"""
+Tests for background batch production.
+"""
+import threading
+
+import numpy as np
+import pytest
+import torch
+
+from src.utils.batching import Prefetcher, index_batches, set_threads, triple_batches
+
+
+class TestPrefetcher:
+    """Test ordering, error propagation and shutdown"""
+
+    @pytest.mark.parametrize("depth", [0, 1, 4])
+    def test_preserves_order(self, depth):
+        assert list(Prefetcher(iter(range(50)), depth=depth)) == list(range(50))
+
+    def test_producer_runs_in_background(self):
+        seen = []
+
+        def gen():
+            for i in range(3):
+                seen.append(threading.current_thread() is threading.main_thread())
+                yield i
+
+        assert list(Prefetcher(gen(), depth=2)) == [0, 1, 2]
+        assert not any(seen)
+
+    def test_reraises_producer_error(self):
+        def gen():
+            yield 1
+            raise RuntimeError("bad batch")
+
+        with pytest.raises(RuntimeError, match="bad batch"):
+            list(Prefetcher(gen(), depth=2))
+
+    def test_early_exit_stops_producer(self):
+        before = threading.active_count()
+        for i in Prefetcher(iter(range(10_000)), depth=2):
+            if i == 3:
+                break
+        assert threading.active_count() == before
+
+    def test_length(self):
+        assert len(Prefetcher(iter([]), length=7)) == 7
+
+
+class TestBatchProducers:
+    """Test index and negative-sampling producers"""
+
+    def test_index_batches_cover_rows(self):
+        rng = np.random.default_rng(0)
+        parts = list(index_batches(10, 4, rng=rng))
+        assert [len(p) for p in parts] == [4, 4, 2]
+        assert sorted(np.concatenate(parts)) == list(range(10))
+
+    def test_triple_batches(self):
+        triples = torch.arange(300).reshape(100, 3) % 50
+        g = torch.Generator().manual_seed(0)
+        batches = list(triple_batches(triples, 32, num_entities=50, generator=g))
+        pos = torch.cat([p for p, _ in batches])
+        neg = torch.cat([n for _, n in batches])
+        assert sorted(map(tuple, pos.tolist())) == sorted(map(tuple, triples.tolist()))
+        # relation kept, and only one of head/tail may change
+        assert torch.equal(neg[:, 1], pos[:, 1])
+        assert ((neg[:, 0] == pos[:, 0]) | (neg[:, 2] == pos[:, 2])).all()
+
+        g2 = torch.Generator().manual_seed(0)
+        again = list(triple_batches(triples, 32, num_entities=50, generator=g2))
+        assert all(torch.equal(a[1], b[1]) for a, b in zip(batches, again))
+
+    def test_set_threads(self):
+        prev = torch.get_num_threads()
+        try:
+            assert set_threads(1) == 1
+            assert set_threads(-1) >= 1
+        finally:
+            torch.set_num_threads(prev)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
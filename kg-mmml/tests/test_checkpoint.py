@@ -0,0 +1,77 @@
+"""
+Tests for early stopping and training checkpoints.
+"""
+import numpy as np
+import pytest
+import torch
+
+from src.utils.checkpoint import EarlyStopping, load_checkpoint, save_checkpoint
+
+
+class TestEarlyStopping:
+    """Test patience, best-state tracking and persistence"""
+
+    def test_patience(self):
+        stop = EarlyStopping(patience=2)
+        scores = [0.5, 0.6, 0.6, 0.55, 0.7]
+        seen = []
+        for ep, s in enumerate(scores, 1):
+            stop.step(s, ep)
+            seen.append(stop.should_stop)
+        assert seen == [False, False, False, True, False]
+        assert stop.best == 0.7 and stop.best_epoch == 5
+
+    def test_min_mode_and_delta(self):
+        stop = EarlyStopping(patience=1, min_delta=0.1, mode="min")
+        assert stop.step(1.0, 1)
+        assert not stop.step(0.95, 2) and stop.should_stop
+
+    def test_zero_patience_never_stops(self):
+        stop = EarlyStopping(patience=0)
+        for ep in range(10):
+            stop.step(0.0, ep)
+        assert not stop.should_stop
+
+    def test_keeps_best_weights(self):
+        model = torch.nn.Linear(2, 1)
+        stop = EarlyStopping(patience=3)
+        stop.step(0.9, 1, model)
+        best = model.weight.detach().clone()
+        with torch.no_grad():
+            model.weight.add_(1.0)
+        stop.step(0.1, 2, model)
+        assert torch.equal(stop.best_state["weight"], best)
+
+        other = EarlyStopping()
+        other.load_state_dict(stop.state_dict())
+        assert other.best_epoch == 1 and other.bad_epochs == 1
+
+
+class TestCheckpointIO:
+    """Test atomic save and round-trip"""
+
+    def test_round_trip(self, tmp_path):
+        model = torch.nn.Linear(3, 2)
+        opt = torch.optim.Adam(model.parameters())
+        np.random.seed(7)
+        state = {"model": model.state_dict(), "optimizer": opt.state_dict(),
+                 "numpy_rng": np.random.get_state(), "epoch": 4}
+        path = tmp_path / "ck" / "last.pt"
+        save_checkpoint(path, state)
+        save_checkpoint(path, state)
+        assert [p.name for p in path.parent.iterdir()] == ["last.pt"]
+
+        loaded = load_checkpoint(path)
+        assert loaded["epoch"] == 4
+        np.random.set_state(loaded["numpy_rng"])
+        a = np.random.rand()
+        np.random.seed(7)
+        assert a == np.random.rand()
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            EarlyStopping(mode="median")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
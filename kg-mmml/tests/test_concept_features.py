@@ -0,0 +1,134 @@
+"""
+Tests for the vectorised concept feature builder.
+"""
+import json
+from collections import Counter
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.utils.concept_features import (
+    apply_weighting, count_matrix, encode_facts, hierarchy_propagation, propagate, top_vocab
+)
+from src.utils.data_utils import build_corpus_from_facts
+
+
+@pytest.fixture
+def facts(tmp_path):
+    recs = [
+        ("2", "A1", "Revenues"), ("2", "A1", "Revenues"), ("2", "A1", "Assets"),
+        ("1", "B1", "Liabilities"), ("1", "B1", "Assets"),
+        ("3", "C1", "Goodwill"), ("3", "C1", "Assets"), ("3", "C1", "Revenues"),
+    ]
+    path = tmp_path / "facts.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for cik, accn, c in recs:
+            f.write(json.dumps({"cik": cik, "accn": accn, "ns": "us-gaap", "concept": c}) + "\n")
+    return path
+
+
+class TestCountMatrix:
+    """Test integer-coded matrix construction"""
+
+    def test_matches_counter_loop(self, facts):
+        docs, concepts, d, c = encode_facts(facts)
+        X = count_matrix(d, c, len(docs), len(concepts))
+
+        ref_docs, _, _, concept_lists = build_corpus_from_facts(str(facts))
+        assert docs == ref_docs
+        for i, cl in enumerate(concept_lists):
+            row = {concepts[j]: v for j, v in zip(X[i].indices, X[i].data)}
+            assert row == Counter(cl)
+
+    def test_vocab_order_matches_most_common(self, facts):
+        docs, concepts, d, c = encode_facts(facts)
+        X = count_matrix(d, c, len(docs), len(concepts))
+        _, _, _, concept_lists = build_corpus_from_facts(str(facts))
+        df = Counter()
+        for cl in concept_lists:
+            df.update(Counter(cl).keys())
+        expected = [k for k, _ in df.most_common(3)]
+        assert [concepts[j] for j in top_vocab(X, 3)] == expected
+
+
+class TestWeighting:
+    """Test weighting schemes on the CSR data array"""
+
+    def test_schemes(self, facts):
+        docs, concepts, d, c = encode_facts(facts)
+        X = count_matrix(d, c, len(docs), len(concepts))
+        assert set(apply_weighting(X, "binary").data) == {1.0}
+        assert apply_weighting(X, "log").max() == pytest.approx(1 + np.log(2))
+
+        T = apply_weighting(X, "tfidf").toarray()
+        assert np.allclose(np.linalg.norm(T, axis=1), 1.0)
+
+        B = apply_weighting(X, "bm25")
+        assert B.shape == X.shape and (B.data > 0).all()
+
+    def test_tfidf_matches_sklearn(self, facts):
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        docs, concepts, d, c = encode_facts(facts)
+        X = count_matrix(d, c, len(docs), len(concepts))
+        ref = TfidfTransformer().fit_transform(X).toarray()
+        assert np.allclose(apply_weighting(X, "tfidf").toarray(), ref, atol=1e-6)
+
+    def test_unknown_scheme(self, facts):
+        docs, concepts, d, c = encode_facts(facts)
+        with pytest.raises(ValueError):
+            apply_weighting(count_matrix(d, c, len(docs), len(concepts)), "sqrt")
+
+
+class TestHierarchyPropagation:
+    """Test decayed ancestor/descendant spreading"""
+
+    @pytest.fixture
+    def taxonomy(self, tmp_path):
+        path = tmp_path / "tax.csv"
+        path.write_text(
+            "child,parent\n"
+            "us-gaap:Revenues,us-gaap:IncomeStatement\n"
+            "us-gaap:IncomeStatement,us-gaap:Root\n"
+            "us-gaap:Goodwill,us-gaap:Assets\n",
+            encoding="utf-8",
+        )
+        return path
+
+    def test_decayed_ancestors_and_new_columns(self, facts, taxonomy):
+        docs, concepts, d, c = encode_facts(facts)
+        X = count_matrix(d, c, len(docs), len(concepts))
+        tax_concepts, P = hierarchy_propagation(str(taxonomy), up_decay=0.5)
+        Xp, all_concepts = propagate(X, concepts, tax_concepts, P)
+
+        col = {name: j for j, name in enumerate(all_concepts)}
+        assert "us-gaap:Root" in col and "us-gaap:Assets" in col
+        row = docs.index("filing_2_A1")  # Revenues x2, Assets
+        assert Xp[row, col["us-gaap:Revenues"]] == 2
+        assert Xp[row, col["us-gaap:IncomeStatement"]] == pytest.approx(1.0)
+        assert Xp[row, col["us-gaap:Root"]] == pytest.approx(0.5)
+
+    def test_log_weighting_on_propagated_activations(self):
+        X = sparse.csr_matrix(np.array([[1.0, 0.5, 0.25], [3.0, 0.0, 1.5]]))
+        W = apply_weighting(X, "log").toarray()
+        assert (W[X.toarray() > 0] > 0).all()
+        np.testing.assert_allclose(W[0], [1.0, 0.5, 0.25])
+        np.testing.assert_allclose(W[1], [1 + np.log(3), 0.0, 1 + np.log(1.5)], rtol=1e-6)
+
+    def test_descendants_and_cache(self, tmp_path, taxonomy):
+        names, P = hierarchy_propagation(str(taxonomy), 0.5, 0.25, cache_dir=str(tmp_path))
+        assert len(list(tmp_path.glob("propagation_*.npz"))) == 1
+        names2, P2 = hierarchy_propagation(str(taxonomy), 0.5, 0.25, cache_dir=str(tmp_path))
+        assert names2 == names and (P != P2).nnz == 0
+
+        i, j = names.index("us-gaap:Root"), names.index("us-gaap:Revenues")
+        assert P[i, j] == pytest.approx(0.0625) and P[j, i] == pytest.approx(0.25)
+
+    def test_max_depth(self, taxonomy):
+        names, P = hierarchy_propagation(str(taxonomy), 0.5, max_depth=1)
+        assert P[names.index("us-gaap:Revenues"), names.index("us-gaap:Root")] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+Tests for the per-concept statistics store.
+"""
+import json
+import pytest
+
+from src.utils.concept_stats import EXACT_LIMIT, ConceptStatsStore, DistinctCounter, fact_keys
+
+
+def write_facts(path, records, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+
+
+@pytest.fixture
+def facts(tmp_path):
+    path = tmp_path / "facts.jsonl"
+    write_facts(path, [
+        {"cik": "1", "ns": "us-gaap", "concept": "Cash", "unit": "USD", "period_end": "2022-12-31"},
+        {"cik": "2", "ns": "us-gaap", "concept": "Cash", "unit": "USD", "period_end": "2023-12-31"},
+        {"cik": "1", "ns": "us-gaap", "concept": "InventoryNet", "unit": "USD"},
+    ])
+    return path
+
+
+class TestIncrementalScan:
+    """Test statistics maintained from the facts delta"""
+
+    def test_append_only_reads_delta(self, tmp_path, facts):
+        store = ConceptStatsStore(tmp_path / "stats.json")
+        assert store.scan_facts(facts) == 3
+        store.save()
+
+        write_facts(facts, [{"cik": "3", "ns": "us-gaap", "concept": "Cash"}], mode="a")
+        store = ConceptStatsStore.load(tmp_path / "stats.json")
+        assert store.scan_facts(facts) == 1
+        assert store.support(min_cik_support=2) == {"Cash": 3}
+
+    def test_partial_last_line_deferred_unless_included(self, tmp_path, facts):
+        with open(facts, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"cik": "3", "ns": "us-gaap", "concept": "Goodwill"}))
+        deferred = ConceptStatsStore()
+        assert deferred.scan_facts(facts) == 3
+        assert "us-gaap:Goodwill" not in deferred.full_set()
+        store = ConceptStatsStore()
+        assert store.scan_facts(facts, include_partial=True) == 4
+        assert "us-gaap:Goodwill" in store.full_set()
+
+    def test_rewritten_file_rescans(self, tmp_path, facts):
+        store = ConceptStatsStore()
+        store.scan_facts(facts)
+        write_facts(facts, [{"cik": "9", "ns": "us-gaap", "concept": "Goodwill"}])
+        assert store.scan_facts(facts) == 1
+        assert store.support() == {"Goodwill": 1}
+
+    def test_frame_columns(self, facts):
+        store = ConceptStatsStore()
+        store.scan_facts(facts)
+        row = store.to_frame().set_index("concept").loc["us-gaap:Cash"]
+        assert row["cik_support"] == 2 and row["n_facts"] == 2
+        assert row["top_unit"] == "USD"
+        assert (row["first_period"], row["last_period"]) == ("2022-12-31", "2023-12-31")
+
+    def test_fact_keys_defaults_namespace(self):
+        assert fact_keys({"cik": 5, "concept": "Revenues"}) == ("us-gaap:Revenues", "Revenues", "5")
+        assert fact_keys({"concept": ""}) is None
+
+
+class TestDistinctCounter:
+    """Test the exact -> HyperLogLog distinct counter"""
+
+    def test_upgrades_past_limit(self):
+        dc = DistinctCounter()
+        for i in range(EXACT_LIMIT):
+            dc.add(str(i))
+        assert dc.exact and dc.count() == EXACT_LIMIT
+        for i in range(EXACT_LIMIT, 5000):
+            dc.add(str(i))
+        assert not dc.exact
+        assert abs(dc.count() - 5000) / 5000 < 0.05
+
+    def test_merge_shards_matches_union(self):
+        a, b = DistinctCounter(), DistinctCounter()
+        for i in range(3000):
+            a.add(str(i))
+        for i in range(2000, 6000):
+            b.add(str(i))
+        a.merge(b)
+        assert abs(a.count() - 6000) / 6000 < 0.05
+
+    def test_roundtrip(self):
+        dc = DistinctCounter()
+        for i in range(1000):
+            dc.add(str(i))
+        back = DistinctCounter.from_dict(json.loads(json.dumps(dc.to_dict())))
+        assert back.count() == dc.count()
+
+    def test_store_merge(self, tmp_path, facts):
+        a, b = ConceptStatsStore(), ConceptStatsStore()
+        a.scan_facts(facts)
+        other = tmp_path / "other.jsonl"
+        write_facts(other, [{"cik": "7", "ns": "us-gaap", "concept": "Cash"}])
+        b.scan_facts(other)
+        a.merge(b)
+        assert a.support() == {"Cash": 3, "InventoryNet": 1}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,73 @@
+"""
+Tests for the shared-memory experiment scheduler.
+"""
+import os
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.utils.experiments import SharedArrays, attach, run_jobs
+
+
+def row_sum_job(arrays, row, scale=1.0):
+    return {"pid": os.getpid(), "value": float(arrays["X"][row].sum() * scale + arrays["y"][row])}
+
+
+def failing_job(arrays, row):
+    raise ValueError(f"bad row {row}")
+
+
+@pytest.fixture
+def shared():
+    X = sparse.random(20, 8, density=0.3, format="csr", random_state=0)
+    y = np.arange(20, dtype=np.float64)
+    with SharedArrays() as sh:
+        sh.publish("X", X)
+        sh.publish("y", y)
+        yield sh, X, y
+
+
+class TestSharedArrays:
+    """Test publish/attach round-trips"""
+
+    def test_attach_views(self, shared):
+        sh, X, y = shared
+        arrays = attach(sh.spec)
+        assert sparse.issparse(arrays["X"]) and (arrays["X"] != X).nnz == 0
+        assert np.array_equal(arrays["y"], y)
+
+    def test_close_unlinks(self):
+        sh = SharedArrays()
+        sh.publish("a", np.ones(4))
+        spec = sh.spec
+        sh.close()
+        with pytest.raises(FileNotFoundError):
+            attach(spec)
+
+
+class TestRunJobs:
+    """Test pooled execution and streaming"""
+
+    def test_results_in_submission_order(self, shared):
+        sh, X, y = shared
+        streamed = []
+        jobs = [{"row": r, "scale": 2.0} for r in range(10)]
+        runs = run_jobs(row_sum_job, jobs, sh, max_workers=2,
+                        on_result=lambda job, res: streamed.append(job["row"]))
+        assert [job for job, _ in runs] == jobs
+        for job, res in runs:
+            assert res["value"] == pytest.approx(X[job["row"]].sum() * 2 + y[job["row"]])
+            assert res["pid"] != os.getpid()
+        assert sorted(streamed) == list(range(10))
+
+    def test_job_error_propagates(self, shared):
+        with pytest.raises(ValueError, match="bad row"):
+            run_jobs(failing_job, [{"row": 1}], shared[0], max_workers=1)
+
+    def test_no_jobs(self, shared):
+        assert run_jobs(row_sum_job, [], shared[0]) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
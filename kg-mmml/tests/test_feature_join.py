@@ -0,0 +1,70 @@
+"""
+Tests for aligned concept-feature joins.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from src.utils.feature_join import aligned_concept_features, align_rows, gather_rows, join_features
+
+
+@pytest.fixture
+def features(tmp_path):
+    Xc = sparse.csr_matrix(np.array([[1, 0, 2], [0, 3, 0], [4, 0, 0]], dtype=np.float32))
+    npz = tmp_path / "concept_features_filing.npz"
+    idx = tmp_path / "concept_features_index.csv"
+    sparse.save_npz(npz, Xc)
+    pd.DataFrame({"doc_id": ["d0", "d1", "d2"]}).to_csv(idx, index=False)
+    return Xc, str(npz), str(idx)
+
+
+def rowwise_reference(Xc, feature_docs, docs):
+    row_of = {d: i for i, d in enumerate(feature_docs)}
+    return sparse.vstack([
+        Xc[row_of[d]] if d in row_of else sparse.csr_matrix((1, Xc.shape[1]), dtype=Xc.dtype)
+        for d in docs
+    ]).tocsr()
+
+
+class TestAlignment:
+    """Test single-gather alignment against the per-row vstack"""
+
+    def test_matches_rowwise_vstack(self, features):
+        Xc, _, _ = features
+        docs = ["d2", "missing", "d0", "d2", "d1"]
+        got = align_rows(Xc, ["d0", "d1", "d2"], docs)
+        assert got.shape == (5, 3)
+        expected = rowwise_reference(Xc, ["d0", "d1", "d2"], docs)
+        assert np.array_equal(got.toarray(), expected.toarray())
+
+    def test_missing_rows_are_zero(self, features):
+        Xc, _, _ = features
+        got = gather_rows(Xc, np.array([-1, -1]))
+        assert got.nnz == 0 and got.shape == (2, 3)
+
+    def test_duplicate_index_last_wins(self, features):
+        Xc, _, _ = features
+        got = align_rows(Xc, ["a", "b", "a"], ["a"])
+        assert np.array_equal(got.toarray(), Xc[2].toarray())
+
+
+class TestJoin:
+    """Test the file-backed join and its on-disk cache"""
+
+    def test_join_and_cache(self, tmp_path, features):
+        Xc, npz, idx = features
+        docs = ["d1", "x", "d0"]
+        X_text = sparse.identity(3, format="csr", dtype=np.float32)
+        X = join_features(X_text, docs, npz, idx, cache_dir=str(tmp_path / "cache"))
+        assert X.shape == (3, 6)
+        expected = rowwise_reference(Xc, ["d0", "d1", "d2"], docs)
+        assert np.array_equal(X[:, 3:].toarray(), expected.toarray())
+
+        assert len(list((tmp_path / "cache").glob("*.npz"))) == 1
+        again = aligned_concept_features(npz, idx, docs, cache_dir=str(tmp_path / "cache"))
+        assert np.array_equal(again.toarray(), X[:, 3:].toarray())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,87 @@
+"""
+Tests for the memory-mapped feature store.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from src.cli import make_concept_features
+from src.utils.feature_join import aligned_concept_features
+from src.utils.feature_store import FeatureStore, entry_key, file_hash
+
+
+@pytest.fixture
+def matrix():
+    return sparse.csr_matrix(np.array([[1, 0, 2], [0, 3, 0], [0, 0, 0], [4, 0, 5]],
+                                      dtype=np.float32))
+
+
+class TestFeatureStore:
+    """Test entry round-trips, keys and memory mapping"""
+
+    def test_put_get_roundtrip_is_mmapped(self, tmp_path, matrix):
+        store = FeatureStore(tmp_path / "store")
+        key = entry_key("facts-hash", {"weighting": "count"})
+        store.put(key, matrix, ["a", "b", "c", "d"])
+        assert key in store
+
+        entry = store.get(key)
+        X = entry.matrix
+        assert np.array_equal(X.toarray(), matrix.toarray())
+        assert not X.data.flags.writeable, "arrays should be read-only memory maps"
+        assert np.array_equal(entry.rows(["d", "zz", "a"]).toarray(), matrix[[3, 2, 0]].toarray())
+        assert entry.rows(["zz"]).nnz == 0
+
+    def test_keys_depend_on_source_and_params(self):
+        assert entry_key("h1", {"a": 1}) != entry_key("h2", {"a": 1})
+        assert entry_key("h1", {"a": 1}) != entry_key("h1", {"a": 2})
+        assert entry_key("h1", {"a": 1, "b": 2}) == entry_key("h1", {"b": 2, "a": 1})
+
+    def test_import_npz_and_join(self, tmp_path, matrix):
+        npz, idx = tmp_path / "f.npz", tmp_path / "f.csv"
+        sparse.save_npz(npz, matrix)
+        pd.DataFrame({"doc_id": ["a", "b", "c", "d"]}).to_csv(idx, index=False)
+
+        store = FeatureStore(tmp_path / "store")
+        entry = store.import_npz(str(npz), str(idx))
+        again = store.import_npz(str(npz), str(idx))
+        assert entry.path == again.path
+        assert len([p for p in (tmp_path / "store").iterdir() if not p.name.startswith(".")]) == 1
+
+        docs = ["c", "a", "missing"]
+        from_store = aligned_concept_features(str(entry.path), "", docs)
+        from_npz = aligned_concept_features(str(npz), str(idx), docs)
+        assert np.array_equal(from_store.toarray(), from_npz.toarray())
+
+    def test_store_hit_still_writes_outdir(self, tmp_path, monkeypatch):
+        facts = tmp_path / "facts.jsonl"
+        rows = [("A", "Assets"), ("A", "Cash"), ("B", "Assets")]
+        facts.write_text("".join(
+            json.dumps({"cik": "1", "accn": a, "ns": "us-gaap", "concept": c}) + "\n"
+            for a, c in rows
+        ))
+        for out in ("first", "second"):
+            monkeypatch.setattr("sys.argv", ["x", "--facts", str(facts),
+                                             "--outdir", str(tmp_path / out),
+                                             "--store", str(tmp_path / "store")])
+            make_concept_features.main()
+        for name in ("concept_features_index.csv", "concept_features_vocab.csv"):
+            first, second = tmp_path / "first" / name, tmp_path / "second" / name
+            assert first.read_text() == second.read_text()
+        a = sparse.load_npz(tmp_path / "first" / "concept_features_filing.npz")
+        b = sparse.load_npz(tmp_path / "second" / "concept_features_filing.npz")
+        assert np.array_equal(a.toarray(), b.toarray())
+
+    def test_file_hash_tracks_content(self, tmp_path):
+        p = tmp_path / "facts.jsonl"
+        p.write_text("a\n", encoding="utf-8")
+        h1 = file_hash(str(p))
+        p.write_text("ab\n", encoding="utf-8")
+        assert file_hash(str(p)) != h1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,73 @@
+"""
+Tests for lock-free multi-process (Hogwild) KGE training.
+"""
+import numpy as np
+import pytest
+import torch
+
+from src.utils.hogwild_kge import shard_indices, train_hogwild, train_shard, worker_generator
+from src.utils.kge import make_model
+
+N_ENT, N_REL = 40, 3
+
+
+@pytest.fixture
+def triples():
+    rng = np.random.default_rng(0)
+    return torch.from_numpy(np.stack([rng.integers(0, N_ENT, 600), rng.integers(0, N_REL, 600),
+                                      rng.integers(0, N_ENT, 600)], axis=1))
+
+
+class TestSharding:
+    """Test seeded shard assignment and worker sampling"""
+
+    def test_shards_partition_triples_reproducibly(self):
+        shards = [shard_indices(101, 4, rank, seed=7, epoch=3) for rank in range(4)]
+        assert sorted(torch.cat(shards).tolist()) == list(range(101))
+        assert torch.equal(shards[2], shard_indices(101, 4, 2, seed=7, epoch=3))
+        assert not torch.equal(shards[0], shard_indices(101, 4, 0, seed=7, epoch=4))
+
+    def test_worker_generators_are_seeded_per_rank(self):
+        a = torch.rand(3, generator=worker_generator(1, 0, 0))
+        assert torch.equal(a, torch.rand(3, generator=worker_generator(1, 0, 0)))
+        assert not torch.equal(a, torch.rand(3, generator=worker_generator(1, 0, 1)))
+
+
+class TestHogwildTraining:
+    """Test shard passes and the multi-process trainer"""
+
+    def test_train_shard_reduces_loss(self, triples):
+        torch.manual_seed(0)
+        model = make_model("transe", N_ENT, N_REL, 8)
+        ent, rel = torch.zeros(N_ENT), torch.zeros(N_REL)
+        shard = shard_indices(len(triples), 1, 0, 0, 0)
+        first = train_shard(model, ent, rel, triples, shard, 0.1, 64, 4, worker_generator(0, 0, 0))
+        for epoch in range(1, 8):
+            last = train_shard(model, ent, rel, triples, shard, 0.1, 64, 4,
+                               worker_generator(0, epoch, 0))
+        assert last < first and (ent > 0).any() and (rel > 0).any()
+
+    def test_workers_update_shared_tables(self, triples):
+        torch.manual_seed(0)
+        model = make_model("distmult", N_ENT, N_REL, 8)
+        before = model.entity_embeddings.weight.data.clone()
+        seen = []
+
+        def on_epoch(epoch, loss, seconds, states):
+            seen.append((epoch, float(states["entity_state"].sum())))
+
+        losses = train_hogwild(model, triples, epochs=4, num_workers=2, lr=0.1, batch_size=64,
+                               negatives=4, seed=0, start_epoch=1, on_epoch=on_epoch)
+        assert len(losses) == 3 and losses[-1] < losses[0]
+        assert [e for e, _ in seen] == [1, 2, 3] and seen[0][1] > 0
+        assert not torch.equal(model.entity_embeddings.weight.data, before)
+
+    def test_worker_errors_reach_the_parent(self, triples):
+        model = make_model("transe", N_ENT - 10, N_REL, 8)  # entity ids out of range
+        with pytest.raises(RuntimeError, match="failed"):
+            train_hogwild(model, triples, epochs=1, num_workers=1, lr=0.1, batch_size=64,
+                          negatives=2)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
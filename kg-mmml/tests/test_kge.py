@@ -0,0 +1,187 @@
+"""
+Tests for compiled KG triples and the fast TransE trainer.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from src.cli.compute_rtf import probe_scores
+from src.utils.kge import (
+    MODELS, FastTransE, corrupt, load_triples, make_model, make_sparse_optimizer, read_edges,
+    train_epoch
+)
+
+EDGES = [("c:Assets", "is-a", "c:Root"), ("c:Cash", "is-a", "c:Assets"),
+         ("f:1", "has-unit", "u:USD"), ("c:Cash", "is-a", "c:Root")]
+
+
+@pytest.fixture
+def edge_files(tmp_path):
+    csv = tmp_path / "kg_edges.csv"
+    pd.DataFrame(EDGES, columns=["src_id", "edge_type", "dst_id"]).to_csv(csv, index=False)
+    jsonl = tmp_path / "facts.jsonl"
+    jsonl.write_text("".join(json.dumps({"head_id": h, "relation": r, "tail_id": t}) + "\n"
+                             for h, r, t in EDGES))
+    return csv, jsonl
+
+
+class TestTriples:
+    """Test edge compilation and caching"""
+
+    def test_formats_agree_with_sorted_vocab(self, edge_files):
+        csv, jsonl = edge_files
+        t1, e1, r1 = read_edges(csv)
+        t2, e2, r2 = read_edges(jsonl)
+        assert e1 == e2 == sorted({x for h, _, t in EDGES for x in (h, t)})
+        assert r1 == r2 == ["has-unit", "is-a"]
+        assert t1.dtype == np.int32 and np.array_equal(t1, t2)
+        assert [(e1[h], r1[r], e1[t]) for h, r, t in t1] == EDGES
+
+    def test_cache_reused_and_invalidated(self, edge_files, tmp_path):
+        csv, _ = edge_files
+        cache = tmp_path / "cache"
+        t1, _, _ = load_triples(csv, cache)
+        t2, _, _ = load_triples(csv, cache)
+        assert isinstance(t2, np.memmap) and np.array_equal(t1, t2)
+        assert np.array_equal(load_triples(cache)[0], t1)
+
+        with open(csv, "a") as f:
+            f.write("c:New,is-a,c:Root\n")
+        os.utime(csv, ns=(0, os.stat(csv).st_mtime_ns + 10**9))
+        t3, ents, _ = load_triples(csv, cache)
+        assert len(t3) == 5 and "c:New" in ents
+
+
+class TestFastTransE:
+    """Test fused scoring and sparse training"""
+
+    def test_corrupt_shapes(self):
+        pos = torch.zeros((6, 3), dtype=torch.int32)
+        neg, tail = corrupt(pos, 4, 10, torch.Generator().manual_seed(0))
+        assert neg.shape == (6, 4) and tail.shape == (6,) and int(neg.max()) < 10
+
+    def test_loss_matches_explicit_negatives(self):
+        torch.manual_seed(0)
+        model = FastTransE(10, 2, 8, margin=1.0)
+        pos = torch.tensor([[0, 0, 1], [2, 1, 3], [4, 0, 5]])
+        neg = torch.tensor([[6, 7], [8, 9], [1, 2]])
+        tail = torch.tensor([True, False, True])
+        E, R = model.entity_embeddings.weight, model.relation_embeddings.weight
+        expected = []
+        for i, (h, r, t) in enumerate(pos.tolist()):
+            p = torch.norm(E[h] + R[r] - E[t])
+            for e in neg[i].tolist():
+                n = torch.norm(E[h] + R[r] - E[e]) if tail[i] else torch.norm(E[e] + R[r] - E[t])
+                expected.append(torch.relu(1.0 + p - n))
+        expected = torch.stack(expected).mean().item()
+        assert model(pos, neg, tail).item() == pytest.approx(expected, rel=1e-5)
+
+    @pytest.mark.parametrize("optimizer", ["sparse_adam", "adagrad"])
+    def test_sparse_training_reduces_loss(self, optimizer):
+        torch.manual_seed(0)
+        rng = np.random.default_rng(0)
+        triples = torch.from_numpy(np.stack([rng.integers(0, 50, 400), rng.integers(0, 3, 400),
+                                             rng.integers(0, 50, 400)], axis=1).astype(np.int32))
+        model = FastTransE(50, 3, 16)
+        opt = make_sparse_optimizer(model, optimizer, 0.05)
+        gen = torch.Generator().manual_seed(0)
+        first = train_epoch(model, opt, triples, 64, 4, gen)
+        model(triples[:8], *corrupt(triples[:8], 2, 50, gen)).backward()
+        assert model.entity_embeddings.weight.grad.is_sparse
+        for _ in range(10):
+            last = train_epoch(model, opt, triples, 64, 4, gen)
+        assert last < first
+
+
+class TestScoringModels:
+    """Test the shared query/match interface of every scoring model"""
+
+    @pytest.fixture(params=sorted(MODELS))
+    def model(self, request):
+        torch.manual_seed(0)
+        return make_model(request.param, 12, 3, 8)
+
+    def test_head_and_tail_queries_agree(self, model):
+        E, R = model.entity_embeddings.weight, model.relation_embeddings.weight
+        h, r, t = torch.tensor([0, 5, 7]), torch.tensor([0, 1, 2]), torch.tensor([3, 3, 11])
+        with torch.no_grad():
+            via_tail = model.match(model.tail_query(E[h], R[r]), E[t])
+            via_head = model.match(model.head_query(R[r], E[t]), E[h])
+        torch.testing.assert_close(via_tail, via_head, rtol=1e-5, atol=1e-5)
+
+    def test_fused_negatives_match_explicit_scores(self, model):
+        pos = torch.tensor([[0, 0, 1], [2, 1, 3], [4, 2, 5]])
+        neg = torch.tensor([[6, 7], [8, 9], [10, 11]])
+        tail = torch.tensor([True, False, True])
+        with torch.no_grad():
+            loss = model(pos, neg, tail)
+            p = model.score(pos[:, 0], pos[:, 1], pos[:, 2])
+            n = torch.stack([model.score(pos[:, 0], pos[:, 1], neg[:, j]).where(
+                tail, model.score(neg[:, j], pos[:, 1], pos[:, 2])) for j in range(2)], dim=1)
+        if model.loss == "margin":
+            expected = torch.relu(model.margin - p[:, None] + n).mean()
+        else:
+            softplus = torch.nn.functional.softplus
+            expected = (softplus(-p) + softplus(n).mean(1)).mean()
+        assert loss.item() == pytest.approx(expected.item(), rel=1e-5)
+
+    def test_chunk_scores_match_single_scores(self, model):
+        h, r = torch.tensor([1, 2]), torch.tensor([0, 2])
+        with torch.no_grad():
+            tails = model.score_tails(h, r, 4, 9)
+            heads = model.score_heads(r, h, 4, 9)
+            for j, e in enumerate(range(4, 9)):
+                ent = torch.full((2,), e)
+                close = dict(rtol=1e-5, atol=1e-5)
+                torch.testing.assert_close(tails[:, j], model.score(h, r, ent), **close)
+                torch.testing.assert_close(heads[:, j], model.score(ent, r, h), **close)
+
+    def test_from_embeddings_round_trip(self, model):
+        E = model.entity_embeddings.weight.data.numpy()
+        R = model.relation_embeddings.weight.data.numpy()
+        restored = type(model).from_embeddings(E, R)
+        h, r, t = torch.arange(3), torch.arange(3), torch.arange(3, 6)
+        with torch.no_grad():
+            torch.testing.assert_close(restored.score(h, r, t), model.score(h, r, t))
+
+    def test_training_reduces_loss(self, model):
+        rng = np.random.default_rng(0)
+        triples = torch.from_numpy(np.stack([rng.integers(0, 12, 200), rng.integers(0, 3, 200),
+                                             rng.integers(0, 12, 200)], axis=1).astype(np.int32))
+        opt = make_sparse_optimizer(model, "sparse_adam", 0.05)
+        gen = torch.Generator().manual_seed(0)
+        first = train_epoch(model, opt, triples, 32, 4, gen)
+        for _ in range(10):
+            last = train_epoch(model, opt, triples, 32, 4, gen)
+        assert last < first
+
+    def test_invalid_configurations(self):
+        with pytest.raises(ValueError):
+            make_model("holE", 5, 2, 8)
+        with pytest.raises(ValueError):
+            make_model("complex", 5, 2, 7)
+        with pytest.raises(ValueError):
+            make_model("transe", 5, 2, 8, loss="hinge")
+
+
+class TestRtfProbe:
+    """Test the relation probe used by --target_rtf"""
+
+    def test_singleton_relation_is_dropped(self):
+        rng = np.random.default_rng(0)
+        y = np.array([0] * 60 + [1] * 60 + [2])
+        X = rng.normal(size=(len(y), 4)) + y[:, None]
+        scores = probe_scores(X, y, seed=0)
+        assert 0.0 <= scores["rtf_accuracy"] <= 1.0
+
+    def test_needs_two_relations(self):
+        with pytest.raises(ValueError, match="two relation types"):
+            probe_scores(np.zeros((5, 2)), np.array([0, 0, 0, 0, 1]))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
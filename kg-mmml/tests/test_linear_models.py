@@ -0,0 +1,85 @@
+"""
+Tests for the configurable multi-label linear trainer.
+"""
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression
+from sklearn.multiclass import OneVsRestClassifier
+
+from src.utils.linear_models import MultiLabelLinear, load_coefficients
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = sparse.random(120, 30, density=0.2, format="csr", random_state=rng)
+    W = rng.normal(size=(30, 3))
+    Y = (X @ W > 0.05).astype(int)
+    Y[:, 2] = 1  # label present everywhere -> constant predictor
+    return X, Y
+
+
+class TestMultiLabelLinear:
+    """Test solver backends"""
+
+    def test_liblinear_matches_one_vs_rest(self, data):
+        X, Y = data
+        ref = OneVsRestClassifier(LogisticRegression(max_iter=200, solver="liblinear")).fit(X, Y)
+        clf = MultiLabelLinear(n_jobs=2).fit(X, Y)
+        assert np.array_equal(clf.predict(X), ref.predict(X))
+        assert np.allclose(clf.predict_proba(X), ref.predict_proba(X))
+
+    @pytest.mark.parametrize("params", [{"solver": "saga"}, {"solver": "sgd"},
+                                        {"solver": "sgd", "batch_size": 16, "max_iter": 5}])
+    def test_large_scale_solvers(self, data, params):
+        X, Y = data
+        clf = MultiLabelLinear(random_state=0, **params).fit(X, Y)
+        pred = clf.predict(X)
+        assert pred.shape == Y.shape and (pred[:, 2] == 1).all()
+        assert (pred == Y).mean() > 0.7
+
+    def test_invalid(self, data):
+        X, Y = data
+        with pytest.raises(ValueError):
+            MultiLabelLinear("newton")
+        with pytest.raises(ValueError):
+            MultiLabelLinear().fit(X, Y, init=(np.zeros((3, 30)), np.zeros(3)))
+
+
+class TestWarmStart:
+    """Test saving and aligning coefficients"""
+
+    def test_aligns_by_name(self, data, tmp_path):
+        X, Y = data
+        clf = MultiLabelLinear("saga", random_state=0).fit(X, Y)
+        features = [f"f{i}" for i in range(30)]
+        path = tmp_path / "coef.npz"
+        clf.save_coefficients(str(path), ["a", "b", "c"], features)
+
+        new_features = features[::-1] + ["new"]
+        coef, intercept = load_coefficients(str(path), ["b", "z"], new_features)
+        assert coef.shape == (2, 31)
+        assert np.allclose(coef[0, :30], clf.coef_[1][::-1]) and coef[0, 30] == 0
+        assert intercept[0] == pytest.approx(clf.intercept_[1])
+        assert not coef[1].any() and intercept[1] == 0
+
+    def test_warm_start_continues(self, data, tmp_path):
+        X, Y = data
+        first = MultiLabelLinear("sgd", random_state=0).fit(X, Y)
+        init = (first.coef_, first.intercept_)
+        params = dict(random_state=1, batch_size=32, max_iter=1)
+        warm = MultiLabelLinear("sgd", **params).fit(X, Y, init=init)
+        cold = MultiLabelLinear("sgd", **params).fit(X, Y)
+        assert (warm.predict(X) == Y).mean() >= (cold.predict(X) == Y).mean()
+
+    def test_shape_mismatch_without_names(self, data, tmp_path):
+        X, Y = data
+        path = tmp_path / "coef.npz"
+        MultiLabelLinear().fit(X, Y).save_coefficients(str(path), ["a", "b", "c"])
+        with pytest.raises(ValueError):
+            load_coefficients(str(path), ["a"], n_features=10)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,112 @@
+"""
+Tests for chunked filtered link-prediction evaluation.
+"""
+import numpy as np
+import pytest
+import torch
+
+from src.utils.kge import FastTransE
+from src.utils.link_prediction import (
+    KnownTriples, evaluate_link_prediction, rank_side, split_triples, summarise
+)
+
+N_ENT, N_REL = 40, 3
+
+
+@pytest.fixture
+def graph():
+    rng = np.random.default_rng(0)
+    triples = np.unique(np.stack([rng.integers(0, N_ENT, 300), rng.integers(0, N_REL, 300),
+                                  rng.integers(0, N_ENT, 300)], axis=1), axis=0)
+    torch.manual_seed(0)
+    return triples, FastTransE(N_ENT, N_REL, 8)
+
+
+def brute_force_ranks(model, triples, known, side):
+    """Reference: full score vectors, filtered with a Python set."""
+    known = {tuple(x) for x in known.tolist()}
+    ranks = []
+    with torch.no_grad():
+        for h, r, t in triples.tolist():
+            cand = torch.arange(N_ENT)
+            if side == "tail":
+                scores = model.score(torch.full((N_ENT,), h), torch.full((N_ENT,), r), cand)
+                keep = [e for e in range(N_ENT) if e != t and (h, r, e) not in known]
+                true = scores[t]
+            else:
+                scores = model.score(cand, torch.full((N_ENT,), r), torch.full((N_ENT,), t))
+                keep = [e for e in range(N_ENT) if e != h and (e, r, t) not in known]
+                true = scores[h]
+            other = scores[keep]
+            ranks.append(1 + (other > true).sum().item() + (other == true).sum().item() / 2)
+    return np.array(ranks)
+
+
+class TestKnownTriples:
+    """Test grouped lookup of known answers"""
+
+    def test_answers_match_set_lookup(self, graph):
+        triples, _ = graph
+        known = KnownTriples(triples, N_ENT, N_REL)
+        q = triples[:25]
+        rows, ents = known.answers("tail", q[:, 0], q[:, 1])
+        for i, (h, r, _) in enumerate(q.tolist()):
+            expect = sorted(t for hh, rr, t in triples.tolist() if (hh, rr) == (h, r))
+            assert sorted(ents[rows == i].tolist()) == expect
+        rows, ents = known.answers("head", q[:, 1], q[:, 2])
+        for i, (_, r, t) in enumerate(q.tolist()):
+            expect = sorted(h for h, rr, tt in triples.tolist() if (rr, tt) == (r, t))
+            assert sorted(ents[rows == i].tolist()) == expect
+
+
+class TestRanking:
+    """Test filtered ranks against a brute-force reference"""
+
+    @pytest.mark.parametrize("side", ["tail", "head"])
+    def test_matches_brute_force(self, graph, side):
+        triples, model = graph
+        known = KnownTriples(triples, N_ENT, N_REL)
+        test = triples[::7]
+        ranks = rank_side(model, test, side, known, batch_size=5, chunk_size=9)
+        np.testing.assert_allclose(ranks, brute_force_ranks(model, test, triples, side))
+
+    def test_chunk_and_batch_size_invariant(self, graph):
+        triples, model = graph
+        known = KnownTriples(triples, N_ENT, N_REL)
+        a = evaluate_link_prediction(model, triples[:50], known, batch_size=3, chunk_size=7)
+        b = evaluate_link_prediction(model, triples[:50], known, batch_size=64, chunk_size=N_ENT)
+        assert a == b and a["n_test"] == 50
+        assert {"mrr", "mean_rank", "hits@1", "hits@3", "hits@10", "tail", "head"} <= set(a)
+
+    def test_ties_count_half(self, graph):
+        triples, _ = graph
+        flat = FastTransE.from_embeddings(np.zeros((N_ENT, 4)), np.zeros((N_REL, 4)))
+        known = KnownTriples(triples[:1], N_ENT, N_REL)
+        ranks = rank_side(flat, triples[:1], "tail", known)
+        assert ranks[0] == 1 + (N_ENT - 1) / 2
+
+    def test_perfect_model_scores_one(self):
+        ent = np.eye(4, dtype=np.float32) * 10
+        rel = np.zeros((1, 4), dtype=np.float32)
+        test = np.array([[i, 0, i] for i in range(4)])
+        model = FastTransE.from_embeddings(ent, rel)
+        metrics = evaluate_link_prediction(model, test, KnownTriples(test, 4, 1))
+        assert metrics["mrr"] == 1.0 and metrics["hits@1"] == 1.0
+
+
+class TestHelpers:
+    """Test metric summary and triple split"""
+
+    def test_summarise(self):
+        out = summarise(np.array([1.0, 2.0, 4.0, 20.0]))
+        assert out["mrr"] == pytest.approx((1 + 0.5 + 0.25 + 0.05) / 4)
+        assert (out["hits@1"], out["hits@3"], out["hits@10"]) == (0.25, 0.5, 0.75)
+
+    def test_split_is_disjoint_and_seeded(self):
+        tr, te = split_triples(100, 0.2, seed=1)
+        assert len(te) == 20 and len(np.intersect1d(tr, te)) == 0 and len(tr) + len(te) == 100
+        assert np.array_equal(te, split_triples(100, 0.2, seed=1)[1])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
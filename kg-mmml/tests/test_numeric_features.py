@@ -0,0 +1,85 @@
+"""
+Tests for numeric fact-value features.
+"""
+import json
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.cli import make_numeric_features
+from src.utils.numeric_features import build_numeric_features, signed_log
+
+
+def fact(cik, fy, concept, value, period=None):
+    return {
+        "cik": cik, "accn": f"{cik}-{fy}", "ns": "us-gaap", "concept": concept,
+        "value": value, "unit": "USD", "period_end": period or f"{fy}-12-31", "fy": fy,
+    }
+
+
+@pytest.fixture
+def facts(tmp_path):
+    recs = [
+        fact("1", 2022, "Revenues", 100.0),
+        fact("1", 2022, "NetIncomeLoss", 10.0),
+        fact("1", 2022, "AssetsCurrent", 50.0),
+        fact("1", 2022, "LiabilitiesCurrent", 25.0),
+        fact("1", 2023, "Revenues", 80.0, "2022-12-31"),   # prior-year comparative
+        fact("1", 2023, "Revenues", 150.0),
+        fact("1", 2023, "NetIncomeLoss", -15.0),
+        fact("2", 2023, "Revenues", 40.0),
+        fact("2", 2023, "Goodwill", "n/a"),                # non-numeric: skipped
+    ]
+    path = tmp_path / "facts.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for r in recs:
+            f.write(json.dumps(r) + "\n")
+    return path
+
+
+class TestNumericFeatures:
+    """Test log magnitudes, ratios and growth"""
+
+    def test_log_uses_latest_period(self, facts):
+        X, docs, names = build_numeric_features(str(facts))
+        col, row = names.index("log:us-gaap:Revenues"), docs.index("filing_1_12023")
+        assert X[row, col] == pytest.approx(np.log1p(150.0), rel=1e-6)
+        col = names.index("log:us-gaap:NetIncomeLoss")
+        assert X[row, col] == pytest.approx(signed_log(np.array([-15.0]))[0], rel=1e-6)
+        assert not any("Goodwill" in n for n in names)
+
+    def test_ratios(self, facts):
+        X, docs, names = build_numeric_features(str(facts))
+        row = docs.index("filing_1_12022")
+        assert X[row, names.index("ratio:current_ratio")] == pytest.approx(2.0)
+        assert X[row, names.index("ratio:net_margin")] == pytest.approx(0.1)
+        assert X[docs.index("filing_2_22023"), names.index("ratio:net_margin")] == 0
+
+    def test_growth_per_cik(self, facts):
+        X, docs, names = build_numeric_features(str(facts))
+        col = names.index("growth:us-gaap:Revenues")
+        assert X[docs.index("filing_1_12023"), col] == pytest.approx(0.5)
+        assert X[docs.index("filing_1_12022"), col] == 0, "first year has no prior"
+        assert X[docs.index("filing_2_22023"), col] == 0, "other CIKs are not compared"
+
+    def test_disable_blocks(self, facts):
+        _, _, names = build_numeric_features(str(facts), ratios=False, growth=False)
+        assert all(n.startswith("log:") for n in names)
+
+    def test_store_hit_still_writes_outdir(self, facts, tmp_path, monkeypatch):
+        for out in ("first", "second"):
+            monkeypatch.setattr("sys.argv", ["x", "--facts", str(facts),
+                                             "--store", str(tmp_path / "store"),
+                                             "--outdir", str(tmp_path / out)])
+            make_numeric_features.main()
+        for name in ("numeric_features_index.csv", "numeric_features_vocab.csv"):
+            first = (tmp_path / "first" / name).read_text()
+            assert (tmp_path / "second" / name).read_text() == first
+        a = sparse.load_npz(tmp_path / "first" / "numeric_features_filing.npz")
+        b = sparse.load_npz(tmp_path / "second" / "numeric_features_filing.npz")
+        assert np.array_equal(a.toarray(), b.toarray())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+"""
+Tests for online model updates.
+"""
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.utils.linear_models import MultiLabelLinear
+from src.utils.online import OnlineClassifier
+from src.utils.text_features import ShardedTfidf, overflow_bucket
+
+WORDS = ["revenue", "cash", "debt", "equity", "lease", "goodwill", "tax", "interest"]
+
+
+def make_docs(n, offset=0, seed=0):
+    rng = np.random.default_rng(seed)
+    docs, texts, labels = [], [], []
+    for i in range(n):
+        words = list(rng.choice(WORDS, size=5))
+        docs.append(f"d{offset + i}")
+        texts.append(" ".join(words))
+        labels.append([w.title() for w in sorted(set(words))
+                       if w in ("revenue", "debt", "tax")] or ["Other"])
+    return docs, texts, labels
+
+
+class TestOverflowBuckets:
+    """Test hashed columns for unknown terms"""
+
+    def test_overflow_columns(self):
+        vec = ShardedTfidf(n_jobs=1).fit(["revenue cash", "cash debt"])
+        X0 = vec.transform(["revenue brandnew"])
+        X = vec.transform(["revenue brandnew"], overflow=8)
+        assert X0.shape == (1, 3) and X.shape == (1, 11)
+        assert X[0, 3 + overflow_bucket("brandnew", 8)] > 0
+        assert np.isclose(np.linalg.norm(X.toarray()), 1.0)
+
+    def test_bucket_is_stable(self):
+        assert overflow_bucket("goodwill", 1024) == overflow_bucket("goodwill", 1024)
+
+
+class TestPartialFit:
+    """Test incremental SGD updates"""
+
+    def test_requires_sgd(self):
+        X = sparse.random(20, 5, density=0.5, format="csr", random_state=0)
+        Y = np.array([[0], [1]] * 10)
+        clf = MultiLabelLinear().fit(X, Y)
+        with pytest.raises(ValueError, match="sgd"):
+            clf.partial_fit(X, Y)
+
+    def test_constant_label_becomes_trainable(self):
+        rng = np.random.default_rng(0)
+        X = sparse.csr_matrix(rng.normal(size=(40, 4)))
+        Y = np.zeros((40, 2), dtype=int)
+        Y[:, 0] = (X.toarray()[:, 0] > 0)
+        clf = MultiLabelLinear(solver="sgd", random_state=0).fit(X, Y)
+        assert isinstance(clf.estimators_[1], tuple)
+        Y[:, 1] = (X.toarray()[:, 1] > 0)
+        clf.partial_fit(X, Y, epochs=20, batch_size=8)
+        assert not isinstance(clf.estimators_[1], tuple)
+        assert (clf.predict(X)[:, 1] == Y[:, 1]).mean() > 0.8
+
+
+class TestOnlineClassifier:
+    """Test fit, update and persistence"""
+
+    @pytest.fixture
+    def model(self):
+        docs, texts, labels = make_docs(80)
+        names = sorted({l for ls in labels for l in ls})
+        clf = OnlineClassifier(names, overflow=16, min_df=1, n_jobs=1, random_state=0)
+        return clf.fit(docs, texts, labels)
+
+    def test_update_only_new_docs(self, model):
+        docs, texts, labels = make_docs(30, offset=70, seed=1)
+        report = model.update(docs, texts, labels)
+        assert report["n_skipped"] == 10 and report["n_docs"] == 20
+        assert 0.0 <= report["term_shift"] <= 1.0 and 0.0 <= report["label_shift"] <= 1.0
+        assert "d99" in model.seen_docs
+        assert model.update(docs, texts, labels)["n_docs"] == 0
+
+    def test_drift_reports_new_terms_and_labels(self, model):
+        report = model.update(["n1", "n2"], ["crypto token", "crypto revenue"],
+                              [["Crypto"], ["Revenue"]])
+        assert report["overflow_share"] > 0.3
+        assert report["unseen_labels"] == ["Crypto"]
+
+    def test_feature_width_is_fixed(self, model):
+        width = model.featurise(["revenue"]).shape[1]
+        model.update(["n1"], ["entirely novel vocabulary"], [["Other"]])
+        assert model.featurise(["revenue"]).shape[1] == width
+
+    def test_save_load(self, model, tmp_path):
+        texts = ["revenue tax", "cash lease"]
+        model.save(tmp_path)
+        loaded = OnlineClassifier.load(tmp_path)
+        assert np.allclose(loaded.predict_proba(texts), model.predict_proba(texts))
+        assert loaded.seen_docs == model.seen_docs
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+"""
+Tests for partitioned (out-of-core) KGE training.
+"""
+import numpy as np
+import pytest
+import torch
+
+from src.utils.kge import make_model, rowwise_adagrad
+from src.utils.partitioned_kge import (
+    ORDER_FILE, PartitionStore, bucket_order, train_partitioned_epoch
+)
+
+N_ENT, N_REL = 30, 2
+
+
+@pytest.fixture
+def triples():
+    rng = np.random.default_rng(0)
+    return np.stack([rng.integers(0, N_ENT, 500), rng.integers(0, N_REL, 500),
+                     rng.integers(0, N_ENT, 500)], axis=1).astype(np.int32)
+
+
+class TestPartitionStore:
+    """Test partition layout, bucketing and export"""
+
+    def test_buckets_hold_every_triple_once(self, triples, tmp_path):
+        store = PartitionStore.create(tmp_path, triples, N_ENT, 3, 4, seed=0, chunk_size=64)
+        order = np.load(tmp_path / ORDER_FILE)
+        members = [order[p::3] for p in range(3)]
+        rebuilt = []
+        for i in range(3):
+            for j in range(3):
+                b = store.bucket(i, j)
+                assert len(b) == store.bucket_sizes[i, j]
+                rebuilt.extend(zip(members[i][b[:, 0]], b[:, 1], members[j][b[:, 2]]))
+        assert sorted(rebuilt) == sorted(map(tuple, triples.tolist()))
+
+    def test_export_restores_vocabulary_order(self, triples, tmp_path):
+        store = PartitionStore.create(tmp_path / "parts", triples, N_ENT, 4, 2, seed=1)
+        order = np.load(tmp_path / "parts" / ORDER_FILE)
+        for p in range(4):
+            ids = order[p::4].astype(np.float32)
+            store.save(p, np.stack([ids, -ids], axis=1), np.zeros(len(ids), dtype=np.float32))
+        store.export(tmp_path / "entity_embeddings.npy")
+        out = np.load(tmp_path / "entity_embeddings.npy")
+        assert out.shape == (N_ENT, 2)
+        np.testing.assert_array_equal(out[:, 0], np.arange(N_ENT))
+
+
+class TestPartitionedTraining:
+    """Test bucket scheduling and the training pass"""
+
+    @pytest.mark.parametrize("P", [1, 2, 5])
+    def test_bucket_order_covers_pairs_and_swaps_one_partition(self, P):
+        order = bucket_order(P, np.random.default_rng(0))
+        assert sorted(order) == [(i, j) for i in range(P) for j in range(P)]
+        for (a, b), (c, d) in zip(order, order[1:]):
+            assert {a, b} & {c, d}
+
+    def test_rowwise_adagrad_touches_only_batch_rows(self):
+        emb = torch.nn.Embedding(6, 3, sparse=True)
+        before = emb.weight.data.clone()
+        state = torch.zeros(6)
+        emb(torch.tensor([1, 4, 1])).sum().backward()
+        rowwise_adagrad(emb.weight, state, lr=0.1)
+        changed = (emb.weight.data != before).any(1)
+        assert changed.tolist() == [False, True, False, False, True, False]
+        assert state[1] > 0 and state[0] == 0 and emb.weight.grad is None
+
+    def test_training_reduces_loss_and_updates_all_partitions(self, triples, tmp_path):
+        store = PartitionStore.create(tmp_path, triples, N_ENT, 3, 8, seed=0)
+        before = [store.load(p)[0].copy() for p in range(3)]
+        model = make_model("transe", 1, N_REL, 8)
+        rel_state = torch.zeros(N_REL)
+        rng, gen = np.random.default_rng(0), torch.Generator().manual_seed(0)
+        first = train_partitioned_epoch(model, rel_state, store, 0.1, 64, 4, rng, gen)
+        for _ in range(5):
+            last = train_partitioned_epoch(model, rel_state, store, 0.1, 64, 4, rng, gen)
+        assert last < first
+        for p in range(3):
+            emb, state = store.load(p)
+            assert not np.allclose(emb, before[p]) and (state > 0).any()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,196 @@
+"""
+Tests for model artifacts and micro-batched serving.
+"""
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from src.cli.serve_model import make_handler
+from src.utils.linear_models import MultiLabelLinear
+from src.utils.serving import MicroBatcher, ModelArtifact, filing_text, save_artifact
+from src.utils.text_features import ShardedTfidf
+
+TEXTS = [
+    "assets cash revenue", "liabilities debt", "revenue costofrevenue grossprofit",
+    "assets liabilities equity", "cash revenue", "debt interestexpense",
+] * 5
+
+
+@pytest.fixture
+def fitted():
+    vec = ShardedTfidf(n_jobs=1)
+    X = vec.fit_transform(TEXTS)
+    Y = np.array([[("revenue" in t), ("debt" in t or "liabilities" in t)] for t in TEXTS],
+                 dtype=int)
+    return vec, X, MultiLabelLinear().fit(X, Y)
+
+
+class TestArtifact:
+    """Test save/load round trip against the in-memory model"""
+
+    def test_scores_match_classifier(self, fitted, tmp_path):
+        vec, X, clf = fitted
+        path = tmp_path / "model.npz"
+        save_artifact(path, vec.get_feature_names_out(), vec.idf_, clf.coef_, clf.intercept_,
+                      ["Revenue", "Debt"], meta={"source": "test"})
+        model = ModelArtifact(path)
+        assert np.allclose(model.score(TEXTS), clf.predict_proba(X), atol=1e-5)
+        assert model.meta == {"source": "test"}
+
+    def test_overflow_matches_vectoriser(self, fitted, tmp_path):
+        vec, _, _ = fitted
+        coef = np.random.default_rng(0).normal(size=(2, len(vec.idf_) + 4))
+        save_artifact(tmp_path / "m.npz", vec.get_feature_names_out(), vec.idf_, coef, np.zeros(2),
+                      ["A", "B"], overflow=4, overflow_idf=vec.overflow_idf)
+        model = ModelArtifact(tmp_path / "m.npz")
+        texts = ["cash newterm another", "unknown"]
+        assert np.allclose(model.featurise(texts).toarray(),
+                           vec.transform(texts, overflow=4).toarray(), atol=1e-6)
+
+    def test_rejects_extra_columns(self, fitted, tmp_path):
+        vec, _, _ = fitted
+        with pytest.raises(ValueError, match="text features only"):
+            save_artifact(tmp_path / "m.npz", vec.get_feature_names_out(), vec.idf_,
+                          np.zeros((2, len(vec.idf_) + 3)), np.zeros(2), ["A", "B"])
+
+    def test_predict_output(self, fitted, tmp_path):
+        vec, _, clf = fitted
+        save_artifact(tmp_path / "m.npz", vec.get_feature_names_out(), vec.idf_, clf.coef_,
+                      clf.intercept_, ["Revenue", "Debt"])
+        model = ModelArtifact(tmp_path / "m.npz")
+        out = model.predict([["Revenue", "Cash"]], threshold=0.5, top_k=1)
+        assert out[0]["labels"][0] == "Revenue" and list(out[0]["scores"]) == ["Revenue"]
+
+
+class TestFilingText:
+    """Test accepted input forms"""
+
+    def test_forms_agree(self):
+        facts = [{"ns": "us-gaap", "concept": "Assets"},
+                 {"ns": "us-gaap", "concept": "CashAndCashEquivalents"}]
+        expected = "assets cashandcashequivalents"
+        assert filing_text(["Assets", "us-gaap:CashAndCashEquivalents"]) == expected
+        assert filing_text({"concepts": ["Assets", "CashAndCashEquivalents"]}) == expected
+        assert filing_text({"facts": facts}) == expected
+        assert filing_text(facts) == expected
+        assert filing_text({"text": "raw text"}) == "raw text"
+
+    @pytest.mark.parametrize("filing", [5, None, 1.5])
+    def test_rejects_scalars(self, filing):
+        with pytest.raises(ValueError, match="unsupported filing"):
+            filing_text(filing)
+
+
+class TestMicroBatcher:
+    """Test dynamic batching"""
+
+    def test_results_in_order_and_batched(self):
+        sizes = []
+
+        def fn(batch):
+            sizes.append(len(batch))
+            return [x * 2 for x in batch]
+
+        batcher = MicroBatcher(fn, max_batch=8, max_wait_ms=50)
+        try:
+            assert batcher(list(range(20))) == [x * 2 for x in range(20)]
+            stats = batcher.stats()
+        finally:
+            batcher.close()
+        assert max(sizes) == 8 and stats["requests"] == 20 and stats["batches"] < 20
+        assert stats["p50_ms"] <= stats["p99_ms"]
+
+    def test_concurrent_submitters(self):
+        batcher = MicroBatcher(lambda b: [x + 1 for x in b], max_batch=16, max_wait_ms=5)
+        results = {}
+
+        def call(i):
+            results[i] = batcher.submit(i).result()
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(32)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        batcher.close()
+        assert results == {i: i + 1 for i in range(32)}
+
+    def test_errors_reach_callers(self):
+        def fn(batch):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(fn)
+        with pytest.raises(RuntimeError, match="boom"):
+            batcher.submit(1).result(timeout=5)
+        batcher.close()
+
+    def test_bad_request_fails_alone(self):
+        def prepare(x):
+            if x < 0:
+                raise ValueError("negative")
+            return x
+
+        batcher = MicroBatcher(lambda b: [x * 2 for x in b], max_batch=8, max_wait_ms=50,
+                               prepare=prepare)
+        futures = [batcher.submit(x) for x in [1, -1, 3]]
+        try:
+            assert futures[0].result(timeout=5) == 2 and futures[2].result(timeout=5) == 6
+            with pytest.raises(ValueError, match="negative"):
+                futures[1].result(timeout=5)
+        finally:
+            batcher.close()
+
+
+class TestHttpHandler:
+    """Test per-request errors over HTTP"""
+
+    @pytest.fixture
+    def url(self, fitted, tmp_path):
+        vec, _, clf = fitted
+        save_artifact(tmp_path / "m.npz", vec.get_feature_names_out(), vec.idf_, clf.coef_,
+                      clf.intercept_, ["Revenue", "Debt"])
+        model = ModelArtifact(tmp_path / "m.npz")
+        batcher = MicroBatcher(lambda texts: model.predict_texts(texts), max_wait_ms=20,
+                               prepare=filing_text)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(batcher))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_port}/predict"
+        server.shutdown()
+        server.server_close()
+        batcher.close()
+
+    @staticmethod
+    def post(url, payload):
+        req = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                return resp.status, json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_malformed_filing_gets_400_without_failing_others(self, url):
+        results = {}
+
+        def call(key, payload):
+            results[key] = self.post(url, payload)
+
+        threads = [threading.Thread(target=call, args=(k, p))
+                   for k, p in [("bad", 5), ("null", None), ("good", ["Revenue", "Cash"])]]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results["bad"][0] == 400 and "unsupported filing" in results["bad"][1]["error"]
+        assert results["null"][0] == 400
+        assert results["good"][0] == 200 and results["good"][1]["labels"][0] == "Revenue"
+        assert self.post(url, {"filings": 5})[0] == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,99 @@
+"""
+Tests for the successive-halving sweep engine.
+"""
+import joblib
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.cli.sweep import DEFAULTS, baseline_trial, feature_key, joint_trial
+from src.utils.sweep import (
+    budget_spent, expand_space, leaderboard, rung_budgets, successive_halving
+)
+
+
+class TestSpace:
+    """Test configuration expansion and budgets"""
+
+    def test_grid_and_sample(self):
+        space = {"lr": [1e-3, 1e-2], "batch": [64, 128, 256], "min_df": 2}
+        grid = expand_space(space)
+        assert len(grid) == 6 and all(c["min_df"] == 2 for c in grid)
+        sample = expand_space(space, n_trials=4, seed=1)
+        assert len(sample) == 4 and all(c in grid for c in sample)
+        assert sample == expand_space(space, n_trials=4, seed=1)
+
+    def test_rung_budgets(self):
+        assert rung_budgets(1, 9, 3) == [1, 3, 9]
+        assert rung_budgets(1, 10, 3) == [1, 3, 9, 10]
+        assert rung_budgets(5, 5, 2) == [5]
+        with pytest.raises(ValueError):
+            rung_budgets(0, 9, 3)
+
+
+class TestSuccessiveHalving:
+    """Test pruning, resumption bookkeeping and ranking"""
+
+    def test_keeps_best_and_resumes(self):
+        configs = [{"q": q} for q in (0.1, 0.9, 0.5, 0.3, 0.7, 0.2, 0.8, 0.4, 0.6)]
+        calls = []
+
+        def evaluate(jobs):
+            calls.append(jobs)
+            return [{"score": j["config"]["q"] * j["budget"]} for j in jobs]
+
+        trials = successive_halving(configs, evaluate, [1, 3, 9], eta=3)
+        assert [len(c) for c in calls] == [9, 3, 1]
+        assert calls[1][0]["prev_budget"] == 1 and calls[2][0]["prev_budget"] == 3
+        assert calls[2][0]["config"] == {"q": 0.9} and calls[2][0]["final"]
+        assert budget_spent(trials) == 6 * 1 + 2 * 3 + 9
+        board = leaderboard(trials)
+        assert board[0]["q"] == 0.9 and board[0]["budget"] == 9
+        assert [r["rank"] for r in board] == list(range(1, 10))
+
+    def test_single_survivor_trains_to_max_budget(self):
+        calls = []
+
+        def evaluate(jobs):
+            calls.append(jobs)
+            return [{"score": float(j["config"]["a"])} for j in jobs]
+
+        trials = successive_halving([{"a": 1}, {"a": 2}], evaluate, [1, 3, 9], eta=3)
+        assert [len(c) for c in calls] == [2, 1]
+        last = calls[1][0]
+        assert last["config"] == {"a": 2} and last["final"]
+        assert (last["prev_budget"], last["budget"]) == (1, 9)
+        assert trials[1]["budget"] == 9 and trials[1]["rung"] == 2
+        assert leaderboard(trials)[0]["trial"] == 1
+
+
+@pytest.fixture
+def arrays():
+    rng = np.random.default_rng(0)
+    X = sparse.random(60, 20, density=0.3, format="csr", random_state=rng)
+    Y = (X.toarray()[:, :3] > 0).astype(np.float32)
+    S = Y / np.maximum(Y.sum(1, keepdims=True), 1)
+    idx = np.arange(60)
+    return {"Y": Y, "S": S.astype(np.float32), "train": idx[:40], "val": idx[40:50],
+            "test": idx[50:], "X": X}
+
+
+class TestTrials:
+    """Test that staged trials match uninterrupted training"""
+
+    @pytest.mark.parametrize("target,trial", [("joint", joint_trial), ("baseline", baseline_trial)])
+    def test_resume_matches_straight_run(self, arrays, tmp_path, target, trial):
+        config = dict(DEFAULTS[target], max_features=20, min_df=1)
+        arrays = dict(arrays, **{feature_key(config): arrays["X"]})
+        straight = trial(arrays, config, 3, 0, True, tmp_path / "a", 0, 1)
+        trial(arrays, config, 1, 0, False, tmp_path / "b", 0, 1)
+        staged = trial(arrays, config, 3, 1, True, tmp_path / "b", 0, 1)
+        assert "test" in staged
+        assert staged == straight
+        if target == "baseline":
+            a, b = (joblib.load(tmp_path / d / "clf.joblib") for d in ("a", "b"))
+            np.testing.assert_array_equal(a.coef_, b.coef_)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,36 @@
+"""
+Tests for the incremental taxonomy rule-decision cache.
+"""
+import pytest
+
+from src.utils.taxonomy_cache import RuleDecisionCache, rules_key
+
+
+class TestDecisionInvalidation:
+    """Test decisions are kept or dropped based on the rules hash"""
+
+    def test_pending_and_rules_change(self, tmp_path):
+        shorts = {"Cash", "InventoryNet"}
+        cache = RuleDecisionCache(tmp_path / "cache.json", rules_key("a"))
+        assert cache.pending(shorts) == ["Cash", "InventoryNet"]
+        cache.decisions = {s: {"pattern": [], "freq": None} for s in cache.pending(shorts)}
+        cache.save()
+
+        same = RuleDecisionCache.load(tmp_path / "cache.json", rules_key("a"))
+        assert same.pending(shorts | {"Goodwill"}) == ["Goodwill"]
+        assert not same.rules_changed
+
+        changed = RuleDecisionCache.load(tmp_path / "cache.json", rules_key("b"))
+        assert changed.rules_changed
+        assert changed.pending(shorts) == ["Cash", "InventoryNet"]
+
+    def test_rules_key_hashes_file_content(self, tmp_path):
+        rules = tmp_path / "rules.yaml"
+        rules.write_text("parents: {}\n", encoding="utf-8")
+        before = rules_key(str(rules))
+        rules.write_text("parents: {A: ['^A']}\n", encoding="utf-8")
+        assert rules_key(str(rules)) != before
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
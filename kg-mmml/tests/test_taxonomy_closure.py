@@ -0,0 +1,97 @@
+"""
+Tests for the bitset transitive closure engine.
+Validates Goal A: Taxonomy closure without recursion limits or cycle hangs.
+"""
+import pytest
+
+from src.utils.taxonomy_closure import TaxonomyClosure, TaxonomyCycleError
+
+
+@pytest.fixture
+def small_edges():
+    return [
+        ("us-gaap:AccountsReceivableNet", "us-gaap:AssetsCurrent"),
+        ("us-gaap:InventoryNet", "us-gaap:AssetsCurrent"),
+        ("us-gaap:AssetsCurrent", "us-gaap:Assets"),
+        ("us-gaap:Goodwill", "us-gaap:AssetsNoncurrent"),
+        ("us-gaap:AssetsNoncurrent", "us-gaap:Assets"),
+    ]
+
+
+class TestClosureBuild:
+    """Test closure construction from edge lists"""
+
+    def test_transitive_ancestors(self, small_edges):
+        cl = TaxonomyClosure.from_edges(small_edges)
+        assert set(cl.ancestors("us-gaap:InventoryNet")) == {
+            "us-gaap:AssetsCurrent", "us-gaap:Assets"
+        }
+        assert cl.ancestors("us-gaap:Assets") == []
+        assert cl.is_ancestor("us-gaap:Assets", "us-gaap:Goodwill")
+        assert not cl.is_ancestor("us-gaap:Goodwill", "us-gaap:Assets")
+
+    def test_frame_matches_pairs(self, small_edges):
+        df = TaxonomyClosure.from_edges(small_edges).to_frame()
+        assert list(df.columns) == ["child", "parent"]
+        assert len(df) == 8, "5 direct + 3 inherited ancestor pairs"
+        assert df.equals(df.sort_values(["child", "parent"], ignore_index=True))
+
+    def test_deep_chain_no_recursion_limit(self):
+        """Test hierarchies deeper than Python's recursion limit"""
+        chain = [(f"c{i + 1}", f"c{i}") for i in range(3000)]
+        cl = TaxonomyClosure.from_edges(chain)
+        assert len(cl.ancestors("c3000")) == 3000
+
+    def test_self_loops_ignored(self):
+        cl = TaxonomyClosure.from_edges([("a", "a"), ("a", "b")])
+        assert cl.ancestors("a") == ["b"]
+        assert not cl.cycles
+
+
+class TestClosureCycles:
+    """Test cycle detection and reporting"""
+
+    def test_cycle_edge_rejected(self):
+        cl = TaxonomyClosure.from_edges([("a", "b"), ("b", "c"), ("c", "a"), ("d", "a")])
+        assert len(cl.cycles) == 1
+        cycle = cl.cycles[0]
+        assert cycle[0] == cycle[-1], "Reported cycle should be closed"
+        assert set(cycle) == {"a", "b", "c"}
+        assert set(cl.ancestors("d")) <= {"a", "b", "c"}
+        assert "a" in cl.ancestors("d")
+
+    def test_strict_raises(self):
+        with pytest.raises(TaxonomyCycleError):
+            TaxonomyClosure.from_edges([("a", "b"), ("b", "a")], strict=True)
+
+
+class TestIncrementalUpdate:
+    """Test incremental edge insertion"""
+
+    def test_add_edge_propagates_to_descendants(self, small_edges):
+        cl = TaxonomyClosure.from_edges(small_edges)
+        assert cl.add_edge("us-gaap:Assets", "us-gaap:BalanceSheet")
+        assert "us-gaap:BalanceSheet" in cl.ancestors("us-gaap:InventoryNet")
+        assert "us-gaap:BalanceSheet" in cl.ancestors("us-gaap:Goodwill")
+
+    def test_incremental_equals_batch(self, small_edges):
+        inc = TaxonomyClosure()
+        for c, p in reversed(small_edges):
+            inc.add_edge(c, p)
+        batch = TaxonomyClosure.from_edges(small_edges)
+        assert inc.to_frame().equals(batch.to_frame())
+
+    def test_add_edge_grows_capacity(self):
+        cl = TaxonomyClosure()
+        for i in range(200):
+            cl.add_edge(f"n{i + 1}", f"n{i}")
+        assert len(cl.ancestors("n200")) == 200
+
+    def test_add_cycle_edge_returns_false(self, small_edges):
+        cl = TaxonomyClosure.from_edges(small_edges)
+        assert not cl.add_edge("us-gaap:Assets", "us-gaap:InventoryNet")
+        assert cl.rejected == [("us-gaap:Assets", "us-gaap:InventoryNet")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
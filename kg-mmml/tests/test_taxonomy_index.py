@@ -0,0 +1,77 @@
+"""
+Tests for the taxonomy reasoning index (hierarchy queries and label expansion).
+"""
+import numpy as np
+import pytest
+
+from src.utils.taxonomy_index import TaxonomyIndex
+
+
+@pytest.fixture
+def child_to_parents():
+    return {
+        "us-gaap:Cash": {"us-gaap:CurrentAssets"},
+        "us-gaap:InventoryNet": {"us-gaap:CurrentAssets"},
+        "us-gaap:Goodwill": {"us-gaap:NoncurrentAssets"},
+        "us-gaap:CurrentAssets": {"us-gaap:Assets"},
+        "us-gaap:NoncurrentAssets": {"us-gaap:Assets"},
+    }
+
+
+@pytest.fixture
+def index(child_to_parents):
+    return TaxonomyIndex.from_parents(child_to_parents)
+
+
+class TestHierarchyQueries:
+    """Test point queries"""
+
+    def test_ancestors_and_descendants(self, index):
+        assert index.ancestors("us-gaap:Cash") == ["us-gaap:Assets", "us-gaap:CurrentAssets"]
+        assert index.descendants("us-gaap:CurrentAssets") == [
+            "us-gaap:Cash", "us-gaap:InventoryNet"]
+        assert index.parents("us-gaap:Goodwill") == ["us-gaap:NoncurrentAssets"]
+        assert index.ancestors("us-gaap:Unknown") == []
+
+    def test_is_ancestor(self, index):
+        assert index.is_ancestor("us-gaap:Assets", "us-gaap:Goodwill")
+        assert not index.is_ancestor("us-gaap:CurrentAssets", "us-gaap:Goodwill")
+
+    def test_lowest_common_ancestor(self, index):
+        assert index.lca("us-gaap:Cash", "us-gaap:InventoryNet") == ["us-gaap:CurrentAssets"]
+        assert index.lca("us-gaap:Cash", "us-gaap:Goodwill") == ["us-gaap:Assets"]
+        assert index.lca("us-gaap:Cash", "us-gaap:CurrentAssets") == ["us-gaap:CurrentAssets"]
+
+
+class TestLabelExpansion:
+    """Test corpus-level label expansion via sparse products"""
+
+    def test_labels_match_dict_walk(self, index, child_to_parents):
+        docs = [
+            ["us-gaap:Cash", "us-gaap:Cash", "us-gaap:Goodwill"],
+            ["us-gaap:Revenue"],
+            ["us-gaap:InventoryNet", "us-gaap:CurrentAssets"],
+        ]
+        expected = [sorted({p for c in d for p in child_to_parents.get(c, [])}) for d in docs]
+        assert index.labels(docs) == expected
+
+    def test_closure_labels(self, index):
+        assert index.labels([["us-gaap:Cash"]], closure=True) == [
+            ["us-gaap:Assets", "us-gaap:CurrentAssets"]
+        ]
+
+    def test_support_counts_repeats(self, index):
+        S = index.support(
+            [["us-gaap:Cash", "us-gaap:Cash", "us-gaap:InventoryNet"]],
+            ["us-gaap:CurrentAssets", "us-gaap:Missing"],
+        )
+        np.testing.assert_array_equal(S, [[3.0, 0.0]])
+
+    def test_closure_matrix_shape(self, index):
+        C = index.closure_matrix(reflexive=True)
+        assert C.shape == (len(index), len(index))
+        assert C.nnz == len(index) + 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
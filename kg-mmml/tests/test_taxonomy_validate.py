@@ -0,0 +1,77 @@
+"""
+Tests for structural taxonomy validation.
+"""
+import numpy as np
+import pytest
+
+from src.utils.taxonomy_closure import TaxonomyClosure
+from src.utils.taxonomy_validate import strongly_connected_components, validate_taxonomy
+
+
+@pytest.fixture
+def redundant_edges():
+    return [
+        ("us-gaap:InventoryNet", "us-gaap:AssetsCurrent"),
+        ("us-gaap:InventoryNet", "us-gaap:Assets"),  # implied via AssetsCurrent
+        ("us-gaap:AssetsCurrent", "us-gaap:Assets"),
+        ("us-gaap:AccountsPayableCurrent", "us-gaap:Liabilities"),
+        ("us-gaap:AccountsPayableCurrent", "us-gaap:AssetsCurrent"),
+        ("us-gaap:AccountsPayableCurrent", "us-gaap:Liabilities"),
+    ]
+
+
+class TestSCC:
+    """Test Tarjan strongly connected components"""
+
+    def test_components(self):
+        src = np.array([0, 1, 2, 3, 4])
+        dst = np.array([1, 2, 0, 0, 3])
+        comp = strongly_connected_components(5, src, dst)
+        assert comp[0] == comp[1] == comp[2]
+        assert len({comp[0], comp[3], comp[4]}) == 3
+
+    def test_long_cycle_no_recursion_limit(self):
+        n = 5000
+        src = np.arange(n)
+        dst = (src + 1) % n
+        comp = strongly_connected_components(n, src, dst)
+        assert len(set(comp.tolist())) == 1
+
+
+class TestValidation:
+    """Test reduction, cycle, orphan and conflict reporting"""
+
+    def test_reduction_preserves_closure(self, redundant_edges):
+        report = validate_taxonomy(redundant_edges)
+        assert report.redundant_edges == [("us-gaap:InventoryNet", "us-gaap:Assets")]
+        assert report.n_duplicates == 1
+        reduced = report.reduced_frame()
+        before = TaxonomyClosure.from_edges(redundant_edges).to_frame()
+        after = TaxonomyClosure.from_edges(reduced.itertuples(index=False)).to_frame()
+        assert before.equals(after)
+
+    def test_conflicts_and_orphans(self, redundant_edges):
+        report = validate_taxonomy(redundant_edges, expected_roots={"us-gaap:Assets"})
+        assert report.orphan_parents == ["us-gaap:Liabilities"]
+        assert report.conflicts == {
+            "us-gaap:AccountsPayableCurrent": ["us-gaap:AssetsCurrent", "us-gaap:Liabilities"]
+        }
+        assert not report.ok
+
+    def test_cycles_reported_and_excluded(self):
+        edges = [("a", "b"), ("b", "c"), ("c", "a"), ("d", "a"), ("d", "x")]
+        report = validate_taxonomy(edges)
+        assert report.cycles == [["a", "b", "c"]]
+        assert len(report.cycle_edges) == 3
+        reduced = set(report.reduced_frame().itertuples(index=False, name=None))
+        assert reduced == {("d", "a"), ("d", "x")}
+        assert report.summary()["cycles"] == 1
+
+    def test_clean_taxonomy_ok(self):
+        report = validate_taxonomy([("a", "r"), ("b", "r")], expected_roots={"r"})
+        assert report.ok
+        assert report.summary()["redundant_edges"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
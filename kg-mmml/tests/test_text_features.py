@@ -0,0 +1,67 @@
+"""
+Tests for the sharded TF-IDF featuriser.
+"""
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.utils import text_features
+from src.utils.text_features import ShardedTfidf, tfidf_features
+
+
+@pytest.fixture
+def texts():
+    rng = np.random.default_rng(0)
+    words = [f"term{i}" for i in range(60)]
+    corpus = [" ".join(rng.choice(words, size=rng.integers(3, 25))) for _ in range(300)]
+    return corpus + ["", "Revenues assets x"]
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(text_features, "MIN_SHARD", 50)
+
+
+class TestShardedTfidf:
+    """Test parity with TfidfVectorizer"""
+
+    @pytest.mark.parametrize("min_df,max_features", [(1, None), (2, 20), (0.05, 35)])
+    def test_matches_sklearn(self, texts, small_shards, min_df, max_features):
+        ref = TfidfVectorizer(min_df=min_df, max_features=max_features)
+        R = ref.fit_transform(texts)
+        vec = ShardedTfidf(min_df, max_features, n_jobs=3)
+        X = vec.fit_transform(texts)
+
+        assert list(vec.get_feature_names_out()) == list(ref.get_feature_names_out())
+        assert np.allclose(vec.idf_, ref.idf_)
+        assert abs(X - R).max() < 1e-12
+        assert abs(vec.transform(texts[:40]) - ref.transform(texts[:40])).max() < 1e-12
+
+    def test_empty_vocabulary(self):
+        with pytest.raises(ValueError):
+            ShardedTfidf().fit(["a", ""])
+
+    def test_save_load(self, texts, tmp_path):
+        vec = ShardedTfidf(2, 30, n_jobs=1).fit(texts)
+        vec.save(str(tmp_path))
+        loaded = ShardedTfidf.load(str(tmp_path), n_jobs=1)
+        assert loaded.vocabulary_ == vec.vocabulary_
+        assert (loaded.transform(texts) != vec.transform(texts)).nnz == 0
+
+
+class TestTfidfStore:
+    """Test per-corpus reuse through the feature store"""
+
+    def test_reuse(self, texts, tmp_path):
+        store = str(tmp_path / "store")
+        X1, v1 = tfidf_features(texts, min_df=2, max_features=30, n_jobs=1, store=store)
+        X2, v2 = tfidf_features(texts, min_df=2, max_features=30, n_jobs=1, store=store)
+        assert len(list((tmp_path / "store").iterdir())) == 1
+        assert (X1 != X2).nnz == 0 and v2.vocabulary_ == v1.vocabulary_
+
+        tfidf_features(texts[:-1], min_df=2, max_features=30, n_jobs=1, store=store)
+        assert len(list((tmp_path / "store").iterdir())) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
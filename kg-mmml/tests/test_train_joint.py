@@ -0,0 +1,46 @@
+"""
+Tests for the joint classifier training path.
+"""
+import numpy as np
+import pytest
+import torch
+from scipy import sparse
+
+from src.cli.train_joint import LogReg, to_tensor
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(0)
+    X = sparse.random(32, 50, density=0.1, format="csr", dtype=np.float32, random_state=rng)
+    return X, rng.integers(0, 2, size=(32, 4)).astype(np.float32)
+
+
+class TestSparseMinibatch:
+    """Test that sparse batches match the dense path"""
+
+    def test_to_tensor(self, features):
+        X, _ = features
+        t = to_tensor(X[[5, 1, 9]])
+        assert t.is_sparse and t.shape == (3, 50)
+        assert np.allclose(t.to_dense().numpy(), X[[5, 1, 9]].toarray())
+        assert not to_tensor(X.toarray()).is_sparse
+
+    def test_forward_and_gradients_match(self, features):
+        X, Y = features
+        torch.manual_seed(0)
+        model = LogReg(50, 4)
+        loss_fn = torch.nn.BCEWithLogitsLoss()
+        grads = []
+        for xb in (to_tensor(X), to_tensor(X.toarray())):
+            model.zero_grad()
+            loss = loss_fn(model(xb), torch.from_numpy(Y))
+            loss.backward()
+            grads.append((loss.item(), model.lin.weight.grad.clone(), model.lin.bias.grad.clone()))
+        (l1, w1, b1), (l2, w2, b2) = grads
+        assert l1 == pytest.approx(l2, rel=1e-6)
+        assert torch.allclose(w1, w2, atol=1e-6) and torch.allclose(b1, b2, atol=1e-6)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])